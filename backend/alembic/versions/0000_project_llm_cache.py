@@ -0,0 +1,35 @@
+"""projects.llm_cache_enabled (per-project switch for the LLM response cache)
+
+Databases created before migrations existed were built by Base.metadata.create_all,
+so the column is only added when missing.
+
+Revision ID: 0000
+Revises:
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0000"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("projects"):
+        return
+    if "llm_cache_enabled" not in {c["name"] for c in inspector.get_columns("projects")}:
+        with op.batch_alter_table("projects") as batch:
+            batch.add_column(sa.Column("llm_cache_enabled", sa.Boolean(), nullable=False, server_default=sa.true()))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("projects") as batch:
+        batch.drop_column("llm_cache_enabled")
@@ -0,0 +1,68 @@
+"""Result/paper indexes, unique (paper_id, column_id)
+
+Databases created before migrations existed were built by Base.metadata.create_all,
+so every step checks the live schema first and is a no-op when already applied.
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = "0000"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _indexes(inspector, table):
+    return {ix["name"] for ix in inspector.get_indexes(table)}
+
+
+def _dedupe_results(bind):
+    """Keep the most recently updated row per (paper_id, column_id) so the unique index can be built"""
+    rows = bind.execute(sa.text(
+        "SELECT id, paper_id, column_id FROM results "
+        "ORDER BY paper_id, column_id, updated_at DESC, created_at DESC"
+    )).fetchall()
+    seen = set()
+    duplicates = []
+    for id_, paper_id, column_id in rows:
+        if (paper_id, column_id) in seen:
+            duplicates.append(id_)
+        else:
+            seen.add((paper_id, column_id))
+    for start in range(0, len(duplicates), 500):
+        bind.execute(
+            sa.text("DELETE FROM results WHERE id IN :ids").bindparams(sa.bindparam("ids", expanding=True)),
+            {"ids": duplicates[start:start + 500]}
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if inspector.has_table("results"):
+        existing = _indexes(inspector, "results")
+        if "uq_results_paper_column" not in existing:
+            _dedupe_results(bind)
+            # Also serves paper_id lookups (leading column)
+            op.create_index("uq_results_paper_column", "results", ["paper_id", "column_id"], unique=True)
+        if "ix_results_column_id" not in existing:
+            op.create_index("ix_results_column_id", "results", ["column_id"])
+
+    if inspector.has_table("papers") and "ix_papers_project_status" not in _indexes(inspector, "papers"):
+        op.create_index("ix_papers_project_status", "papers", ["project_id", "status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_papers_project_status", table_name="papers")
+    op.drop_index("ix_results_column_id", table_name="results")
+    op.drop_index("uq_results_paper_column", table_name="results")
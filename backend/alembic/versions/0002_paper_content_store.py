@@ -0,0 +1,106 @@
+"""Move papers.raw_content into the compressed, content-addressed paper_contents table
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+"""
+import hashlib
+import zlib
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 200
+
+
+def _move_raw_content(bind):
+    """Copy raw_content into paper_contents in batches and point each paper at its hash"""
+    contents = sa.table(
+        "paper_contents",
+        sa.column("hash", sa.String), sa.column("encoding", sa.String), sa.column("data", sa.LargeBinary),
+        sa.column("size", sa.Integer), sa.column("compressed_size", sa.Integer), sa.column("created_at", sa.DateTime),
+    )
+    stored = {row[0] for row in bind.execute(sa.text("SELECT hash FROM paper_contents"))}
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, raw_content FROM papers "
+                "WHERE raw_content IS NOT NULL AND content_hash IS NULL AND id > :last_id "
+                "ORDER BY id LIMIT :limit"
+            ),
+            {"last_id": last_id, "limit": BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+
+        new_contents = []
+        for paper_id, text in rows:
+            raw = text.encode("utf-8")
+            key = hashlib.sha256(raw).hexdigest()
+            if key not in stored:
+                data = zlib.compress(raw, 6)
+                new_contents.append({
+                    "hash": key, "encoding": "zlib", "data": data,
+                    "size": len(raw), "compressed_size": len(data), "created_at": datetime.utcnow()
+                })
+                stored.add(key)
+            bind.execute(sa.text("UPDATE papers SET content_hash = :hash WHERE id = :id"), {"hash": key, "id": paper_id})
+        if new_contents:
+            bind.execute(contents.insert(), new_contents)
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    if not inspector.has_table("paper_contents"):
+        op.create_table(
+            "paper_contents",
+            sa.Column("hash", sa.String(), primary_key=True),
+            sa.Column("encoding", sa.String(), nullable=False),
+            sa.Column("data", sa.LargeBinary(), nullable=False),
+            sa.Column("size", sa.Integer(), nullable=False),
+            sa.Column("compressed_size", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+
+    if not inspector.has_table("papers"):
+        return
+    columns = {c["name"] for c in inspector.get_columns("papers")}
+    if "content_hash" not in columns:
+        with op.batch_alter_table("papers") as batch:
+            batch.add_column(sa.Column("content_hash", sa.String(), nullable=True))
+    if "ix_papers_content_hash" not in {ix["name"] for ix in inspector.get_indexes("papers")}:
+        op.create_index("ix_papers_content_hash", "papers", ["content_hash"])
+
+    if "raw_content" in columns:
+        _move_raw_content(bind)
+        with op.batch_alter_table("papers") as batch:
+            batch.drop_column("raw_content")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    with op.batch_alter_table("papers") as batch:
+        batch.add_column(sa.Column("raw_content", sa.Text(), nullable=True))
+    for key, _encoding, data in bind.execute(sa.text("SELECT hash, encoding, data FROM paper_contents")).fetchall():
+        bind.execute(
+            sa.text("UPDATE papers SET raw_content = :text WHERE content_hash = :hash"),
+            {"text": zlib.decompress(data).decode("utf-8"), "hash": key}
+        )
+    op.drop_index("ix_papers_content_hash", table_name="papers")
+    with op.batch_alter_table("papers") as batch:
+        batch.drop_column("content_hash")
+    op.drop_table("paper_contents")
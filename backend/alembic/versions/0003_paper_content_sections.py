@@ -0,0 +1,32 @@
+"""paper_contents.sections: section offsets from the section segmenter
+
+Existing rows are left NULL and segmented on first load.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "sections" not in {c["name"] for c in inspector.get_columns("paper_contents")}:
+        with op.batch_alter_table("paper_contents") as batch:
+            batch.add_column(sa.Column("sections", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("paper_contents") as batch:
+        batch.drop_column("sections")
@@ -0,0 +1,47 @@
+"""batch_runs: bulk analysis runs executed through provider batch APIs
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("batch_runs"):
+        return
+    op.create_table(
+        "batch_runs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("project_id", sa.String(), nullable=True),
+        sa.Column("provider", sa.String(), nullable=False),
+        sa.Column("model", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("provider_batch_id", sa.String(), nullable=True),
+        sa.Column("paper_ids", sa.Text(), nullable=False),
+        sa.Column("request_count", sa.Integer(), nullable=True),
+        sa.Column("succeeded_count", sa.Integer(), nullable=True),
+        sa.Column("failed_count", sa.Integer(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.Column("submitted_at", sa.DateTime(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_batch_runs_status", "batch_runs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_batch_runs_status", table_name="batch_runs")
+    op.drop_table("batch_runs")
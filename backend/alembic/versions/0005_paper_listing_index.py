@@ -0,0 +1,28 @@
+"""papers (project_id, created_at, id) index for paginated listing
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if "ix_papers_project_created" not in {ix["name"] for ix in inspector.get_indexes("papers")}:
+        op.create_index("ix_papers_project_created", "papers", ["project_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_papers_project_created", table_name="papers")
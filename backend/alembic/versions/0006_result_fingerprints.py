@@ -0,0 +1,38 @@
+"""results.fingerprint and analysis_jobs.column_ids for incremental re-analysis
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # Existing results keep a NULL fingerprint: their inputs are unknown, so they count as stale
+    if inspector.has_table("results") and "fingerprint" not in {c["name"] for c in inspector.get_columns("results")}:
+        with op.batch_alter_table("results") as batch:
+            batch.add_column(sa.Column("fingerprint", sa.String(), nullable=True))
+    if inspector.has_table("analysis_jobs") and "column_ids" not in {c["name"] for c in inspector.get_columns("analysis_jobs")}:
+        with op.batch_alter_table("analysis_jobs") as batch:
+            batch.add_column(sa.Column("column_ids", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    # Databases migrated with Alembic alone have no analysis_jobs before 0010
+    if sa.inspect(op.get_bind()).has_table("analysis_jobs"):
+        with op.batch_alter_table("analysis_jobs") as batch:
+            batch.drop_column("column_ids")
+    with op.batch_alter_table("results") as batch:
+        batch.drop_column("fingerprint")
@@ -0,0 +1,48 @@
+"""papers.file_hash, paper_contents.normalized_hash and a results.fingerprint index for cross-project dedup
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _add_indexed_column(inspector, table: str, column: str):
+    if not inspector.has_table(table):
+        return
+    if column not in {c["name"] for c in inspector.get_columns(table)}:
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column(column, sa.String(), nullable=True))
+    index = f"ix_{table}_{column}"
+    if index not in {ix["name"] for ix in inspector.get_indexes(table)}:
+        op.create_index(index, table, [column])
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # Existing rows keep NULL hashes: their text/files were stored before and only dedup by exact text hash
+    _add_indexed_column(inspector, "papers", "file_hash")
+    _add_indexed_column(inspector, "paper_contents", "normalized_hash")
+    if inspector.has_table("results") and "ix_results_fingerprint" not in {ix["name"] for ix in inspector.get_indexes("results")}:
+        op.create_index("ix_results_fingerprint", "results", ["fingerprint"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_results_fingerprint", table_name="results")
+    op.drop_index("ix_paper_contents_normalized_hash", table_name="paper_contents")
+    with op.batch_alter_table("paper_contents") as batch:
+        batch.drop_column("normalized_hash")
+    op.drop_index("ix_papers_file_hash", table_name="papers")
+    with op.batch_alter_table("papers") as batch:
+        batch.drop_column("file_hash")
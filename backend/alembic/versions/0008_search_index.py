@@ -0,0 +1,97 @@
+"""SQLite FTS5 full-text index over paper titles, result values and paper section text
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+
+"""
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TOKENIZE = "porter unicode61 remove_diacritics 2"
+
+# papers_fts / results_fts index the base tables' text in place (external content);
+# triggers keep them in sync however rows are written (ORM, bulk upsert, raw SQL)
+TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS papers_fts_ai AFTER INSERT ON papers BEGIN
+        INSERT INTO papers_fts(rowid, title) VALUES (new.rowid, new.title);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS papers_fts_ad AFTER DELETE ON papers BEGIN
+        INSERT INTO papers_fts(papers_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS papers_fts_au AFTER UPDATE OF title ON papers BEGIN
+        INSERT INTO papers_fts(papers_fts, rowid, title) VALUES ('delete', old.rowid, old.title);
+        INSERT INTO papers_fts(rowid, title) VALUES (new.rowid, new.title);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS results_fts_ai AFTER INSERT ON results BEGIN
+        INSERT INTO results_fts(rowid, value) VALUES (new.rowid, new.value);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS results_fts_ad AFTER DELETE ON results BEGIN
+        INSERT INTO results_fts(results_fts, rowid, value) VALUES ('delete', old.rowid, old.value);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS results_fts_au AFTER UPDATE OF value ON results BEGIN
+        INSERT INTO results_fts(results_fts, rowid, value) VALUES ('delete', old.rowid, old.value);
+        INSERT INTO results_fts(rowid, value) VALUES (new.rowid, new.value);
+    END""",
+]
+
+
+def _index_contents(bind):
+    """Section text of already stored papers (compressed in paper_contents, so no triggers)"""
+    last = ""
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT hash, encoding, data, sections FROM paper_contents WHERE hash > :last ORDER BY hash LIMIT 100"),
+            {"last": last}
+        ).fetchall()
+        if not rows:
+            break
+        for key, encoding, data, sections in rows:
+            text = zlib.decompress(data).decode("utf-8") if encoding == "zlib" else ""
+            parts = json.loads(sections) if sections else [{"name": "", "start": 0, "end": len(text)}]
+            values = [{"body": text[s["start"]:s["end"]], "hash": key, "section": s["name"]} for s in parts if s["end"] > s["start"]]
+            if values:
+                bind.execute(sa.text("INSERT INTO content_fts(body, hash, section) VALUES (:body, :hash, :section)"), values)
+        last = rows[-1][0]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        # Other databases use the LIKE fallback in app.services.search_index
+        return
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if "papers_fts" not in tables:
+        op.execute(f"CREATE VIRTUAL TABLE papers_fts USING fts5(title, content='papers', content_rowid='rowid', tokenize='{TOKENIZE}')")
+        op.execute("INSERT INTO papers_fts(papers_fts) VALUES ('rebuild')")
+    if "results_fts" not in tables:
+        op.execute(f"CREATE VIRTUAL TABLE results_fts USING fts5(value, content='results', content_rowid='rowid', tokenize='{TOKENIZE}')")
+        op.execute("INSERT INTO results_fts(results_fts) VALUES ('rebuild')")
+    if "content_fts" not in tables:
+        # hash is indexed (not UNINDEXED) so a content's rows can be found by MATCH when it is deleted
+        op.execute(f"CREATE VIRTUAL TABLE content_fts USING fts5(body, hash, section UNINDEXED, tokenize='{TOKENIZE}')")
+        _index_contents(bind)
+    for trigger in TRIGGERS:
+        op.execute(trigger)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for name in ("papers_fts_ai", "papers_fts_ad", "papers_fts_au", "results_fts_ai", "results_fts_ad", "results_fts_au"):
+        op.execute(f"DROP TRIGGER IF EXISTS {name}")
+    for table in ("content_fts", "results_fts", "papers_fts"):
+        op.execute(f"DROP TABLE IF EXISTS {table}")
@@ -0,0 +1,47 @@
+"""content_chunks: passages of stored paper text and their rows in the embedding index
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    # Vectors live in files under DATA_DIR/embeddings; existing papers are embedded on first use
+    if not inspector.has_table("content_chunks"):
+        op.create_table(
+            "content_chunks",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("model", sa.String(), nullable=False),
+            sa.Column("content_hash", sa.String(), nullable=False),
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("row", sa.Integer(), nullable=False),
+            sa.Column("section", sa.String(), nullable=True),
+            sa.Column("start", sa.Integer(), nullable=False),
+            sa.Column("end", sa.Integer(), nullable=False),
+        )
+        inspector = sa.inspect(op.get_bind())
+    indexes = {ix["name"] for ix in inspector.get_indexes("content_chunks")}
+    if "ix_content_chunks_model_hash" not in indexes:
+        op.create_index("ix_content_chunks_model_hash", "content_chunks", ["model", "content_hash", "kind", "row"])
+    if "uq_content_chunks_model_row" not in indexes:
+        op.create_index("uq_content_chunks_model_row", "content_chunks", ["model", "row"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_content_chunks_model_row", table_name="content_chunks")
+    op.drop_index("ix_content_chunks_model_hash", table_name="content_chunks")
+    op.drop_table("content_chunks")
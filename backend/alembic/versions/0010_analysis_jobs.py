@@ -0,0 +1,52 @@
+"""analysis_jobs: persistent analysis job queue with worker leases
+
+The table predates the migrations and was only created by Base.metadata.create_all, so it
+is created here when missing (a database migrated with Alembic alone), with column_ids
+from 0006 included.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if sa.inspect(op.get_bind()).has_table("analysis_jobs"):
+        return
+    op.create_table(
+        "analysis_jobs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("paper_id", sa.String(), sa.ForeignKey("papers.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("project_id", sa.String(), nullable=False),
+        sa.Column("column_ids", sa.Text(), nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=True),
+        sa.Column("max_attempts", sa.Integer(), nullable=True),
+        sa.Column("lease_owner", sa.String(), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_analysis_jobs_paper_id", "analysis_jobs", ["paper_id"])
+    op.create_index("ix_analysis_jobs_status", "analysis_jobs", ["status"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_analysis_jobs_status", table_name="analysis_jobs")
+    op.drop_index("ix_analysis_jobs_paper_id", table_name="analysis_jobs")
+    op.drop_table("analysis_jobs")
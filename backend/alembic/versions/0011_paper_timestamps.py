@@ -0,0 +1,34 @@
+"""papers.created_at / updated_at: backfill NULLs
+
+Rows written before the model set these defaults can have NULL timestamps, which the
+paper listing can neither order nor encode in its cursor. Each missing value falls back
+to the other timestamp, or the migration time.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not sa.inspect(op.get_bind()).has_table("papers"):
+        return
+    op.execute("UPDATE papers SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+    op.execute("UPDATE papers SET updated_at = created_at WHERE updated_at IS NULL")
+
+
+def downgrade() -> None:
+    # The original NULLs are not recorded
+    pass
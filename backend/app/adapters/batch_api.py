@@ -0,0 +1,249 @@
+import glob
+import json
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Union
+import httpx
+from app.adapters.model_adapter import BaseModelAdapter, ClaudeAdapter, OpenAIAdapter
+from app.config import settings
+
+
+class BatchPending(Exception):
+    """Raised by ReplayAdapter for a prompt whose batch response is not available (yet)"""
+
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__(f"No batch response for request {key[:12]}")
+
+
+@dataclass
+class BatchStatus:
+    state: str  # in_progress, ended, failed
+    detail: str = ""
+    results_ref: Optional[str] = None
+    errors_ref: Optional[str] = None
+
+
+@dataclass
+class BatchResult:
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchClient(ABC):
+    """Submits JSONL request files to a provider batch endpoint and reads back the results"""
+
+    # Provider limit on one batch's input file (request body); larger runs are split into several batches
+    max_file_bytes: int = 100 * 1024 * 1024
+
+    def __init__(self, adapter: BaseModelAdapter, client: Optional[httpx.AsyncClient] = None):
+        self.adapter = adapter
+        self.http = client or adapter.client
+
+    @abstractmethod
+    def request_line(self, custom_id: str, prompt: str, system_prompt: Optional[str]) -> dict:
+        """One batch request in the provider's format"""
+
+    @abstractmethod
+    async def submit(self, path: str) -> str:
+        """Submit the request lines in the file at path; returns the provider batch id"""
+
+    @abstractmethod
+    async def status(self, batch_id: str) -> BatchStatus:
+        pass
+
+    @abstractmethod
+    async def results(self, status: BatchStatus) -> Dict[str, BatchResult]:
+        """custom_id -> result for an ended batch"""
+
+    async def _lines(self, url: str, **kwargs) -> AsyncIterator[dict]:
+        async with self.http.stream("GET", url, **kwargs) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+class OpenAIBatchClient(BatchClient):
+    """OpenAI Batch API: upload a JSONL file, create a batch, download the output file"""
+
+    max_file_bytes = 200 * 1024 * 1024
+
+    def __init__(self, adapter: OpenAIAdapter, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(adapter, client)
+        self.root = adapter.base_url.rsplit("/chat/completions", 1)[0]
+        self.auth = {"Authorization": f"Bearer {adapter.api_key}"}
+
+    def request_line(self, custom_id: str, prompt: str, system_prompt: Optional[str]) -> dict:
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": self.adapter._payload(prompt, system_prompt)
+        }
+
+    async def submit(self, path: str) -> str:
+        with open(path, "rb") as f:
+            upload = await self.http.post(
+                f"{self.root}/files",
+                headers=self.auth,
+                data={"purpose": "batch"},
+                files={"file": ("batch.jsonl", f, "application/jsonl")}
+            )
+        upload.raise_for_status()
+        response = await self.http.post(
+            f"{self.root}/batches",
+            headers=self.auth,
+            json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h"
+            }
+        )
+        response.raise_for_status()
+        return response.json()["id"]
+
+    async def status(self, batch_id: str) -> BatchStatus:
+        response = await self.http.get(f"{self.root}/batches/{batch_id}", headers=self.auth)
+        response.raise_for_status()
+        batch = response.json()
+        state = batch["status"]
+        output, errors = batch.get("output_file_id"), batch.get("error_file_id")
+        if state == "completed" or (state in ("expired", "cancelled") and (output or errors)):
+            return BatchStatus("ended", state, output, errors)
+        if state in ("failed", "expired", "cancelled"):
+            detail = "; ".join(e.get("message", "") for e in (batch.get("errors") or {}).get("data", [])) or state
+            return BatchStatus("failed", detail)
+        return BatchStatus("in_progress", state)
+
+    async def results(self, status: BatchStatus) -> Dict[str, BatchResult]:
+        results = {}
+        for file_id in (status.results_ref, status.errors_ref):
+            if not file_id:
+                continue
+            async for line in self._lines(f"{self.root}/files/{file_id}/content", headers=self.auth):
+                response = line.get("response") or {}
+                if line.get("error") or response.get("status_code") != 200:
+                    error = line.get("error") or response.get("body", {}).get("error") or {}
+                    results[line["custom_id"]] = BatchResult(error=error.get("message") or "Batch request failed")
+                else:
+                    results[line["custom_id"]] = BatchResult(text=response["body"]["choices"][0]["message"]["content"])
+        return results
+
+
+class AnthropicBatchClient(BatchClient):
+    """Anthropic Message Batches API: one JSON body of requests, results as JSONL from results_url"""
+
+    max_file_bytes = 256 * 1024 * 1024
+
+    def __init__(self, adapter: ClaudeAdapter, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(adapter, client)
+        self.url = f"{adapter.base_url}/batches"
+
+    def request_line(self, custom_id: str, prompt: str, system_prompt: Optional[str]) -> dict:
+        return {"custom_id": custom_id, "params": self.adapter._payload(prompt, system_prompt)}
+
+    async def submit(self, path: str) -> str:
+        async def body():
+            # {"requests": [line, line, ...]} streamed from the JSONL file
+            yield b'{"requests": ['
+            with open(path, "rb") as f:
+                for i, line in enumerate(f):
+                    yield (b"," if i else b"") + line.rstrip(b"\n")
+            yield b"]}"
+
+        response = await self.http.post(self.url, headers=self.adapter.headers, content=body())
+        response.raise_for_status()
+        return response.json()["id"]
+
+    async def status(self, batch_id: str) -> BatchStatus:
+        response = await self.http.get(f"{self.url}/{batch_id}", headers=self.adapter.headers)
+        response.raise_for_status()
+        batch = response.json()
+        if batch["processing_status"] == "ended":
+            return BatchStatus("ended", "ended", batch.get("results_url") or f"{self.url}/{batch_id}/results")
+        return BatchStatus("in_progress", batch["processing_status"])
+
+    async def results(self, status: BatchStatus) -> Dict[str, BatchResult]:
+        results = {}
+        async for line in self._lines(status.results_ref, headers=self.adapter.headers):
+            result = line.get("result") or {}
+            if result.get("type") == "succeeded":
+                text = "".join(b.get("text", "") for b in result["message"]["content"] if b.get("type") == "text")
+                results[line["custom_id"]] = BatchResult(text=text)
+            else:
+                error = (result.get("error") or {}).get("error") or result.get("error") or {}
+                message = error.get("message") if isinstance(error, dict) else None
+                results[line["custom_id"]] = BatchResult(error=message or f"Batch request {result.get('type', 'failed')}")
+        return results
+
+
+BATCH_CLIENTS = {
+    "openai": OpenAIBatchClient,
+    "claude": AnthropicBatchClient,
+}
+
+_fake_client: Optional[httpx.AsyncClient] = None
+
+
+def get_batch_client(adapter: BaseModelAdapter) -> BatchClient:
+    """Batch client for the adapter's provider (routed to the in-process fake server when BATCH_FAKE_SERVER is set)"""
+    global _fake_client
+    client_class = BATCH_CLIENTS.get(adapter.provider)
+    if client_class is None:
+        raise ValueError(f"Provider '{adapter.provider}' has no batch API (supported: {', '.join(BATCH_CLIENTS)})")
+    client = None
+    if settings.BATCH_FAKE_SERVER:
+        from app.adapters.fake_batch_server import FakeBatchServer
+        if _fake_client is None:
+            _fake_client = httpx.AsyncClient(transport=FakeBatchServer().transport)
+        client = _fake_client
+    return client_class(adapter, client)
+
+
+class ReplayAdapter(BaseModelAdapter):
+    """
+    Stands in for a real adapter while running tools in batch mode. Known prompts are answered
+    from batch results; any other prompt is reported to on_request and raises BatchPending.
+    Prompts are keyed like the response cache, so identical prompts share one batch request.
+    """
+
+    def __init__(self, inner: BaseModelAdapter, results: Optional[Dict[str, BatchResult]] = None, on_request=None):
+        super().__init__(inner.api_key, inner._client)
+        self.inner = inner
+        self.results = results or {}
+        self.on_request = on_request
+        self.provider = inner.provider
+        self.model = getattr(inner, "model", "")
+        self.context_window = inner.context_window
+        self.max_output_tokens = inner.max_output_tokens
+
+    def key(self, prompt: str, system_prompt: Optional[str]) -> str:
+        from app.adapters.response_cache import make_cache_key
+        return make_cache_key(self.provider, self.model, system_prompt, prompt)
+
+    async def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        key = self.key(prompt, system_prompt)
+        result = self.results.get(key)
+        if result is None:
+            if self.on_request:
+                self.on_request(key, prompt, system_prompt)
+            raise BatchPending(key)
+        if result.error is not None:
+            raise Exception(result.error)
+        return result.text
+
+    async def test_connection(self) -> bool:
+        return await self.inner.test_connection()
+
+
+def batch_requests_path(run_id: str, part: Union[int, str] = 0) -> str:
+    """Request file of one provider batch of a run (part counts the batches a large run is split into)"""
+    path = os.path.join(settings.DATA_DIR, "batches")
+    os.makedirs(path, exist_ok=True)
+    return os.path.join(path, f"{run_id}.{part}.jsonl")
+
+
+def batch_request_files(run_id: str) -> List[str]:
+    return sorted(glob.glob(batch_requests_path(run_id, "*")))
@@ -0,0 +1,131 @@
+import json
+import re
+import uuid
+from typing import Callable, Dict, Optional
+import httpx
+
+# (prompt, system_prompt) -> response text
+Responder = Callable[[str, Optional[str]], str]
+
+
+def default_responder(prompt: str, system_prompt: Optional[str]) -> str:
+    return "{}" if "JSON" in prompt else "Fake batch response."
+
+
+class FakeBatchServer:
+    """
+    In-process stand-in for the OpenAI Batch and Anthropic Message Batches APIs, for offline testing.
+    Use it as an httpx transport: httpx.AsyncClient(transport=FakeBatchServer().transport).
+    A batch reports in progress for polls_until_done status checks, then ends with responder's answers.
+    """
+
+    def __init__(self, responder: Optional[Responder] = None, polls_until_done: int = 1):
+        self.responder = responder or default_responder
+        self.polls_until_done = polls_until_done
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, dict] = {}
+        self.transport = httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path, method = request.url.path, request.method
+        routes = [
+            ("POST", r"/v1/files", self._openai_upload),
+            ("POST", r"/v1/batches", self._openai_create),
+            ("GET", r"/v1/batches/(?P<id>[^/]+)", self._openai_status),
+            ("GET", r"/v1/files/(?P<id>[^/]+)/content", self._openai_file),
+            ("POST", r"/v1/messages/batches", self._anthropic_create),
+            ("GET", r"/v1/messages/batches/(?P<id>[^/]+)", self._anthropic_status),
+            ("GET", r"/v1/messages/batches/(?P<id>[^/]+)/results", self._anthropic_results),
+        ]
+        for route_method, pattern, handler in routes:
+            match = re.fullmatch(pattern, path)
+            if match and method == route_method:
+                return handler(request, **match.groupdict())
+        return httpx.Response(404, json={"error": {"message": f"No route for {method} {path}"}})
+
+    def _poll(self, batch: dict) -> bool:
+        """Count a status check; True once the batch is done"""
+        batch["polls"] += 1
+        return batch["polls"] > self.polls_until_done
+
+    # OpenAI
+
+    def _openai_upload(self, request: httpx.Request) -> httpx.Response:
+        # Multipart body: keep only the JSONL request lines
+        lines = [line for line in request.content.split(b"\r\n") if line.startswith(b'{"custom_id"')]
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.files[file_id] = b"\n".join(lines)
+        return httpx.Response(200, json={"id": file_id, "purpose": "batch"})
+
+    def _openai_create(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        self.batches[batch_id] = {"input": self.files[body["input_file_id"]], "polls": 0}
+        return httpx.Response(200, json={"id": batch_id, "status": "validating"})
+
+    def _openai_status(self, request: httpx.Request, id: str) -> httpx.Response:
+        batch = self.batches.get(id)
+        if batch is None:
+            return httpx.Response(404, json={"error": {"message": "Batch not found"}})
+        if not self._poll(batch):
+            return httpx.Response(200, json={"id": id, "status": "in_progress"})
+
+        if "output_file_id" not in batch:
+            output = []
+            for line in batch["input"].splitlines():
+                req = json.loads(line)
+                messages = req["body"]["messages"]
+                system = next((m["content"] for m in messages if m["role"] == "system"), None)
+                prompt = next(m["content"] for m in messages if m["role"] == "user")
+                output.append(json.dumps({
+                    "id": f"req_{uuid.uuid4().hex}",
+                    "custom_id": req["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {"choices": [{"message": {"role": "assistant", "content": self.responder(prompt, system)}}]}
+                    },
+                    "error": None
+                }))
+            file_id = f"file-{uuid.uuid4().hex}"
+            self.files[file_id] = "\n".join(output).encode()
+            batch["output_file_id"] = file_id
+        return httpx.Response(200, json={"id": id, "status": "completed", "output_file_id": batch["output_file_id"], "error_file_id": None})
+
+    def _openai_file(self, request: httpx.Request, id: str) -> httpx.Response:
+        if id not in self.files:
+            return httpx.Response(404, json={"error": {"message": "File not found"}})
+        return httpx.Response(200, content=self.files[id])
+
+    # Anthropic
+
+    def _anthropic_create(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        batch_id = f"msgbatch_{uuid.uuid4().hex}"
+        self.batches[batch_id] = {"requests": body["requests"], "polls": 0}
+        return httpx.Response(200, json={"id": batch_id, "type": "message_batch", "processing_status": "in_progress"})
+
+    def _anthropic_status(self, request: httpx.Request, id: str) -> httpx.Response:
+        batch = self.batches.get(id)
+        if batch is None:
+            return httpx.Response(404, json={"error": {"message": "Batch not found"}})
+        if not self._poll(batch):
+            return httpx.Response(200, json={"id": id, "processing_status": "in_progress"})
+        return httpx.Response(200, json={
+            "id": id,
+            "processing_status": "ended",
+            "results_url": f"{request.url.scheme}://{request.url.host}/v1/messages/batches/{id}/results"
+        })
+
+    def _anthropic_results(self, request: httpx.Request, id: str) -> httpx.Response:
+        batch = self.batches.get(id)
+        if batch is None:
+            return httpx.Response(404, json={"error": {"message": "Batch not found"}})
+        lines = []
+        for req in batch["requests"]:
+            params = req["params"]
+            text = self.responder(params["messages"][0]["content"], params.get("system"))
+            lines.append(json.dumps({
+                "custom_id": req["custom_id"],
+                "result": {"type": "succeeded", "message": {"content": [{"type": "text", "text": text}]}}
+            }))
+        return httpx.Response(200, content="\n".join(lines).encode())
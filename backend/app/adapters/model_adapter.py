@@ -1,52 +1,202 @@
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 import httpx
-from typing import Optional
+import json
+from typing import AsyncIterator, Dict, Optional
+from app.adapters.rate_limiter import ProviderRateLimiter, RateLimitError, THROTTLE_STATUSES, parse_retry_after, rate_limiters
 from app.config import settings
 
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Providers whose API endpoints negotiate HTTP/2
+HTTP2_PROVIDERS = {"claude", "openai", "gemini", "grok"}
+
+
+class HTTPClientPool:
+    """
+    One long-lived httpx.AsyncClient per provider, so LLM calls reuse
+    keep-alive (and HTTP/2) connections instead of a new TCP/TLS handshake each time.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+
+    def _create(self, provider: str) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=settings.HTTP2_ENABLED and HTTP2_AVAILABLE and provider in HTTP2_PROVIDERS,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+        )
+
+    def get(self, provider: str) -> httpx.AsyncClient:
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._create(provider)
+            self._clients[provider] = client
+        return client
+
+    def open(self, providers):
+        """Create clients up front (app startup); no connection is made until first use"""
+        for provider in providers:
+            self.get(provider)
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+
+http_clients = HTTPClientPool()
+
+
 class BaseModelAdapter(ABC):
+    provider: str = ""
+    # Default model id; instances may override it (e.g. a batch run pinned to its submission model)
+    model: str = ""
+    # Model limits in tokens, used by the prompt budget (app.tools.prompt_budget)
+    context_window: int = 8192
+    max_output_tokens: int = 4096
+
+    def __init__(self, api_key: str, client: Optional[httpx.AsyncClient] = None):
+        self.api_key = api_key
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = http_clients.get(self.provider)
+        return self._client
+
+    def _estimate_request_tokens(self, body: Optional[dict]) -> int:
+        """Tokens a request counts against the provider's TPM limit: prompt estimate plus max output"""
+        from app.tools.prompt_budget import estimate_tokens
+        if not body:
+            return 0
+        return estimate_tokens(json.dumps(body, ensure_ascii=False)) + body.get("max_tokens", self.max_output_tokens)
+
+    @asynccontextmanager
+    async def _rate_limited(self, body: Optional[dict]) -> AsyncIterator[Optional[ProviderRateLimiter]]:
+        """
+        Hold a slot of the provider's rate limiter for one request (yields None when rate limiting is off).
+        Successes grow the concurrency limit, RateLimitError shrinks it, other errors leave it.
+        """
+        if not settings.RATE_LIMIT_ENABLED:
+            yield None
+            return
+        limiter = rate_limiters.get(self.provider)
+        await limiter.acquire(self._estimate_request_tokens(body))
+        try:
+            yield limiter
+        except RateLimitError as e:
+            await limiter.release(False, throttled=True, retry_after=e.retry_after)
+            raise
+        except BaseException:
+            await limiter.release(False)
+            raise
+        else:
+            await limiter.release(True)
+
+    def _check_response(self, response: httpx.Response, limiter: Optional[ProviderRateLimiter]):
+        """Learn rate limits from the headers; throttling raises RateLimitError, other HTTP errors raise as usual"""
+        if limiter:
+            limiter.update_from_headers(response.headers)
+        if response.status_code in THROTTLE_STATUSES:
+            raise RateLimitError(self.provider, response.status_code, parse_retry_after(response.headers))
+        response.raise_for_status()
+
+    async def _post(self, url: str, **kwargs) -> httpx.Response:
+        """POST on the shared provider client through the provider's rate limiter"""
+        async with self._rate_limited(kwargs.get("json")) as limiter:
+            response = await self.client.post(url, **kwargs)
+            self._check_response(response, limiter)
+            return response
+
+    async def _stream_events(self, url: str, **kwargs) -> AsyncIterator[dict]:
+        """Streaming POST (rate limited like _post); yields the JSON data of each server-sent event"""
+        async with self._rate_limited(kwargs.get("json")) as limiter:
+            async with self.client.stream("POST", url, **kwargs) as response:
+                if response.is_error:
+                    # Read the error body so the raised HTTPStatusError can show it
+                    await response.aread()
+                self._check_response(response, limiter)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data and data != "[DONE]":
+                        yield json.loads(data)
+
+    async def _stream_chat_completions(self, url: str, headers: Dict[str, str], body: dict) -> AsyncIterator[str]:
+        """Text deltas from an OpenAI-compatible chat completions stream (OpenAI, Grok, Solar)"""
+        async for event in self._stream_events(url, headers=headers, json={**body, "stream": True}):
+            for choice in event.get("choices") or []:
+                text = (choice.get("delta") or {}).get("content")
+                if text:
+                    yield text
+
     @abstractmethod
     async def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
         pass
     
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Yield the completion as text chunks while it is generated. Joined, the chunks equal
+        complete()'s result. Adapters without a streaming API yield the whole completion once.
+        """
+        yield await self.complete(prompt, system_prompt)
+    
     @abstractmethod
     async def test_connection(self) -> bool:
         pass
 
 
 class ClaudeAdapter(BaseModelAdapter):
-    def __init__(self, api_key: str):
-        self.api_key = api_key
+    provider = "claude"
+    # Using a currently known, stable model version
+    model = "claude-3-5-sonnet-20240620"
+    context_window = 200000
+    max_output_tokens = 4096
+
+    def __init__(self, api_key: str, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(api_key, client)
         self.base_url = "https://api.anthropic.com/v1/messages"
-        # Using a stable recent model version
-        self.model = "claude-3-sonnet-20240229" 
-        # Note: The prompt mentioned "claude-sonnet-4-20250514", but that seems to be a futuristic hallucination/placeholder?
-        # I will use a valid current model or keep the placeholder if required, but safer to use real one or latest alias.
-        # User prompt specified "claude-sonnet-4-20250514", I will stick to it if they insisted, but "claude-3-sonnet..." is safer.
-        # Let's use the one in prompt but maybe comment about it being future-dated. 
-        # Actually, let's stick to the prompt's value "claude-sonnet-4-20250514" as requested, 
-        # or fall back to "claude-3-5-sonnet-20240620" if that fails. 
-        # For this implementation, I will use a currently known valid model to avoid instant errors if tested.
-        self.model = "claude-3-5-sonnet-20240620" 
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "x-api-key": self.api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json"
+        }
+    
+    def _payload(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
+        """Messages API request body (shared with the batch API)"""
+        return {
+            "model": self.model,
+            "max_tokens": self.max_output_tokens,
+            "system": system_prompt or "You are a research paper analyzer.",
+            "messages": [{"role": "user", "content": prompt}]
+        }
     
     async def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                self.base_url,
-                headers={
-                    "x-api-key": self.api_key,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "max_tokens": 4096,
-                    "system": system_prompt or "You are a research paper analyzer.",
-                    "messages": [{"role": "user", "content": prompt}]
-                },
-                timeout=60.0
-            )
-            response.raise_for_status()
-            return response.json()["content"][0]["text"]
+        response = await self._post(self.base_url, headers=self.headers, json=self._payload(prompt, system_prompt))
+        return response.json()["content"][0]["text"]
+    
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        body = {**self._payload(prompt, system_prompt), "stream": True}
+        async for event in self._stream_events(self.base_url, headers=self.headers, json=body):
+            if event.get("type") == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                yield event["delta"]["text"]
+            elif event.get("type") == "error":
+                raise Exception(event["error"].get("message", "Stream error"))
     
     async def test_connection(self) -> bool:
         try:
@@ -57,33 +207,41 @@ class ClaudeAdapter(BaseModelAdapter):
 
 
 class OpenAIAdapter(BaseModelAdapter):
-    def __init__(self, api_key: str):
-        self.api_key = api_key
+    provider = "openai"
+    model = "gpt-4o"
+    context_window = 128000
+    max_output_tokens = 4096
+
+    def __init__(self, api_key: str, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(api_key, client)
         self.base_url = "https://api.openai.com/v1/chat/completions"
-        self.model = "gpt-4o"
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    def _payload(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
+        """Chat completions request body (shared with the batch API)"""
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": self.max_output_tokens
+        }
     
     async def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        async with httpx.AsyncClient() as client:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = await client.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "max_tokens": 4096
-                },
-                timeout=60.0
-            )
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+        response = await self._post(self.base_url, headers=self.headers, json=self._payload(prompt, system_prompt))
+        return response.json()["choices"][0]["message"]["content"]
+    
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        async for text in self._stream_chat_completions(self.base_url, self.headers, self._payload(prompt, system_prompt)):
+            yield text
     
     async def test_connection(self) -> bool:
         try:
@@ -94,30 +252,45 @@ class OpenAIAdapter(BaseModelAdapter):
 
 
 class GeminiAdapter(BaseModelAdapter):
-    def __init__(self, api_key: str):
-        self.api_key = api_key
-        self.model = "gemini-1.5-pro"
+    provider = "gemini"
+    model = "gemini-1.5-pro"
+    context_window = 1048576
+    max_output_tokens = 8192
+
+    def __init__(self, api_key: str, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(api_key, client)
+    
+    def _url(self, method: str) -> str:
+        return f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:{method}"
+    
+    def _payload(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
+        full_prompt = prompt
+        if system_prompt:
+            # Gemini API (REST) puts system instructions differently or we can prepend
+            # For simplicity here, prepending
+            full_prompt = f"{system_prompt}\n\n{prompt}"
+        return {
+            "contents": [{"parts": [{"text": full_prompt}]}]
+        }
     
     async def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
-        
-        async with httpx.AsyncClient() as client:
-            full_prompt = prompt
-            if system_prompt:
-                # Gemini API (REST) puts system instructions differently or we can prepend
-                # For simplicity here, prepending
-                full_prompt = f"{system_prompt}\n\n{prompt}"
-            
-            response = await client.post(
-                url,
-                params={"key": self.api_key},
-                json={
-                    "contents": [{"parts": [{"text": full_prompt}]}]
-                },
-                timeout=60.0
-            )
-            response.raise_for_status()
-            return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+        response = await self._post(
+            self._url("generateContent"),
+            params={"key": self.api_key},
+            json=self._payload(prompt, system_prompt)
+        )
+        return response.json()["candidates"][0]["content"]["parts"][0]["text"]
+    
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        async for event in self._stream_events(
+            self._url("streamGenerateContent"),
+            params={"key": self.api_key, "alt": "sse"},
+            json=self._payload(prompt, system_prompt)
+        ):
+            for candidate in event.get("candidates") or []:
+                for part in (candidate.get("content") or {}).get("parts") or []:
+                    if part.get("text"):
+                        yield part["text"]
     
     async def test_connection(self) -> bool:
         try:
@@ -128,32 +301,39 @@ class GeminiAdapter(BaseModelAdapter):
 
 
 class GrokAdapter(BaseModelAdapter):
-    def __init__(self, api_key: str):
-        self.api_key = api_key
+    provider = "grok"
+    model = "grok-beta"
+    context_window = 131072
+    max_output_tokens = 4096
+
+    def __init__(self, api_key: str, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(api_key, client)
         self.base_url = "https://api.x.ai/v1/chat/completions"
-        self.model = "grok-beta"
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    def _payload(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return {
+            "model": self.model,
+            "messages": messages
+        }
     
     async def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        async with httpx.AsyncClient() as client:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = await client.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "messages": messages
-                },
-                timeout=60.0
-            )
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+        response = await self._post(self.base_url, headers=self.headers, json=self._payload(prompt, system_prompt))
+        return response.json()["choices"][0]["message"]["content"]
+    
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        async for text in self._stream_chat_completions(self.base_url, self.headers, self._payload(prompt, system_prompt)):
+            yield text
     
     async def test_connection(self) -> bool:
         try:
@@ -165,34 +345,40 @@ class GrokAdapter(BaseModelAdapter):
 
 class SolarAdapter(BaseModelAdapter):
     """Upstage Solar - Korean-optimized, cost-effective"""
+    provider = "solar"
+    model = "solar-pro"
+    context_window = 32768
+    max_output_tokens = 4096
     
-    def __init__(self, api_key: str):
-        self.api_key = api_key
+    def __init__(self, api_key: str, client: Optional[httpx.AsyncClient] = None):
+        super().__init__(api_key, client)
         self.base_url = "https://api.upstage.ai/v1/chat/completions"
-        self.model = "solar-pro"
+    
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+    
+    def _payload(self, prompt: str, system_prompt: Optional[str] = None) -> dict:
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": self.max_output_tokens
+        }
     
     async def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
-        async with httpx.AsyncClient() as client:
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            response = await client.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "messages": messages,
-                    "max_tokens": 4096
-                },
-                timeout=60.0
-            )
-            response.raise_for_status()
-            return response.json()["choices"][0]["message"]["content"]
+        response = await self._post(self.base_url, headers=self.headers, json=self._payload(prompt, system_prompt))
+        return response.json()["choices"][0]["message"]["content"]
+    
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        async for text in self._stream_chat_completions(self.base_url, self.headers, self._payload(prompt, system_prompt)):
+            yield text
     
     async def test_connection(self) -> bool:
         try:
@@ -202,17 +388,25 @@ class SolarAdapter(BaseModelAdapter):
             return False
 
 
-def get_model_adapter(provider: str, api_key: str) -> BaseModelAdapter:
-    """Factory function to get the appropriate model adapter"""
-    adapters = {
-        "claude": ClaudeAdapter,
-        "openai": OpenAIAdapter,
-        "gemini": GeminiAdapter,
-        "grok": GrokAdapter,
-        "solar": SolarAdapter
-    }
-    
-    if provider not in adapters:
+MODEL_ADAPTERS = {
+    "claude": ClaudeAdapter,
+    "openai": OpenAIAdapter,
+    "gemini": GeminiAdapter,
+    "grok": GrokAdapter,
+    "solar": SolarAdapter
+}
+
+
+def get_model_adapter(provider: str, api_key: str, use_cache: bool = False) -> BaseModelAdapter:
+    """
+    Factory function to get the appropriate model adapter (sharing the provider's pooled client).
+    use_cache wraps it with the LLM response cache when caching is enabled.
+    """
+    if provider not in MODEL_ADAPTERS:
         raise ValueError(f"Unknown provider: {provider}")
     
-    return adapters[provider](api_key)
+    adapter = MODEL_ADAPTERS[provider](api_key, client=http_clients.get(provider))
+    if use_cache and settings.LLM_CACHE_ENABLED:
+        from app.adapters.response_cache import CachedModelAdapter, get_response_cache
+        adapter = CachedModelAdapter(adapter, get_response_cache())
+    return adapter
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from tenacity.stop import stop_base
+from tenacity.wait import wait_base
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Statuses providers use for throttling / overload (529 = Anthropic "overloaded")
+THROTTLE_STATUSES = {429, 529}
+
+
+class RateLimitError(Exception):
+    """Provider throttled the request; retry_after is the server-suggested delay in seconds"""
+
+    def __init__(self, provider: str, status_code: int, retry_after: Optional[float] = None):
+        self.provider = provider
+        self.status_code = status_code
+        self.retry_after = retry_after
+        hint = f", retry after {retry_after:.1f}s" if retry_after is not None else ""
+        super().__init__(f"{provider} rate limited the request (HTTP {status_code}{hint})")
+
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _parse_reset(value: Optional[str]) -> Optional[float]:
+    """Seconds until a rate-limit reset: "1.5", "6m0s" / "20ms" (OpenAI) or an RFC 3339 timestamp (Anthropic)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if parts and "".join(n + u for n, u in parts) == value:
+        return sum(float(n) * _DURATION_UNITS[u] for n, u in parts)
+    try:
+        reset = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return max(0.0, (reset - datetime.now(timezone.utc)).total_seconds())
+    except ValueError:
+        return None
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Retry-After as seconds or HTTP date, or the non-standard retry-after-ms"""
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _header_int(headers, *names) -> Optional[int]:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return int(float(value))
+            except ValueError:
+                pass
+    return None
+
+
+class TokenBucket:
+    """
+    Per-minute budget refilled continuously. reserve() deducts immediately (the balance may go
+    negative) and returns how long the caller must wait, so waiters are served in arrival order.
+    A bucket without a rate is unlimited.
+    """
+
+    def __init__(self, per_minute: Optional[int] = None):
+        self.per_minute: Optional[int] = None
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.set_rate(per_minute)
+
+    def set_rate(self, per_minute: Optional[int]):
+        if per_minute == self.per_minute:
+            return
+        if per_minute and self.per_minute is None:
+            self.tokens = float(per_minute)
+        self.per_minute = per_minute or None
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.per_minute:
+            self.tokens = min(float(self.per_minute), self.tokens + (now - self.updated) * self.per_minute / 60.0)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        if not self.per_minute:
+            return 0.0
+        self._refill()
+        self.tokens -= min(amount, self.per_minute)
+        return max(0.0, -self.tokens * 60.0 / self.per_minute)
+
+    def sync(self, remaining: Optional[int]):
+        """Adopt the server's view when it has less budget left than we think"""
+        if self.per_minute and remaining is not None:
+            self._refill()
+            self.tokens = min(self.tokens, float(remaining))
+
+
+class ProviderRateLimiter:
+    """
+    Client-side limits for one provider:
+    - requests/minute and tokens/minute buckets (from settings, or learned from rate-limit headers)
+    - AIMD concurrency: +1/limit per success, halved on throttling (at most once per second)
+    - a pause until Retry-After (or the header reset time) when the provider throttles
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        rpm: Optional[int] = None,
+        tpm: Optional[int] = None,
+        initial_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_concurrency: int = 32,
+    ):
+        self.provider = provider
+        self.configured_rpm = rpm
+        self.configured_tpm = tpm
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.limit = float(min(max(initial_concurrency, self.min_concurrency), self.max_concurrency))
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.succeeded = 0
+        self._last_decrease = 0.0
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self, tokens: int):
+        """Wait for a concurrency slot, then for request/token budget and any throttling pause"""
+        cond = self._condition()
+        async with cond:
+            while self.in_flight >= int(self.limit):
+                await cond.wait()
+            self.in_flight += 1
+        try:
+            wait = max(
+                self.blocked_until - time.monotonic(),
+                self.requests.reserve(1),
+                self.tokens.reserve(tokens),
+            )
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            await self._release()
+            raise
+
+    async def release(self, succeeded: bool, throttled: bool = False, retry_after: Optional[float] = None):
+        """Free the slot; successes grow the concurrency limit, throttling halves it, other errors leave it"""
+        now = time.monotonic()
+        if throttled:
+            self.throttled += 1
+            self.blocked_until = max(self.blocked_until, now + (retry_after if retry_after is not None else 1.0))
+            # Concurrent requests all see the same overload; count it as one congestion event
+            if now - self._last_decrease >= 1.0:
+                self.limit = max(float(self.min_concurrency), self.limit / 2)
+                self._last_decrease = now
+                logger.warning(f"{self.provider} throttled: concurrency limit now {int(self.limit)}")
+        elif succeeded:
+            self.succeeded += 1
+            self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+        await self._release()
+
+    async def _release(self):
+        cond = self._condition()
+        async with cond:
+            self.in_flight -= 1
+            cond.notify_all()
+
+    def update_from_headers(self, headers):
+        """Learn limits and remaining budget from OpenAI-style and Anthropic-style rate-limit headers"""
+        rpm = _header_int(headers, "x-ratelimit-limit-requests", "anthropic-ratelimit-requests-limit")
+        tpm = _header_int(headers, "x-ratelimit-limit-tokens", "anthropic-ratelimit-tokens-limit")
+        # Configured limits are a ceiling; the header can only lower them
+        if rpm:
+            self.requests.set_rate(min(rpm, self.configured_rpm or rpm))
+        if tpm:
+            self.tokens.set_rate(min(tpm, self.configured_tpm or tpm))
+
+        remaining_requests = _header_int(headers, "x-ratelimit-remaining-requests", "anthropic-ratelimit-requests-remaining")
+        remaining_tokens = _header_int(headers, "x-ratelimit-remaining-tokens", "anthropic-ratelimit-tokens-remaining")
+        self.requests.sync(remaining_requests)
+        self.tokens.sync(remaining_tokens)
+
+        # Out of budget: hold new requests until the window resets
+        for remaining, reset_names in (
+            (remaining_requests, ("x-ratelimit-reset-requests", "anthropic-ratelimit-requests-reset")),
+            (remaining_tokens, ("x-ratelimit-reset-tokens", "anthropic-ratelimit-tokens-reset")),
+        ):
+            if remaining == 0:
+                reset = next((_parse_reset(headers.get(n)) for n in reset_names if headers.get(n)), None)
+                if reset:
+                    self.blocked_until = max(self.blocked_until, time.monotonic() + reset)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "rpm": self.requests.per_minute,
+            "tpm": self.tokens.per_minute,
+            "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 2),
+            "succeeded": self.succeeded,
+            "throttled": self.throttled,
+        }
+
+
+class RateLimiterRegistry:
+    """One limiter per provider, created on first use from settings"""
+
+    def __init__(self):
+        self._limiters: Dict[str, ProviderRateLimiter] = {}
+
+    def get(self, provider: str) -> ProviderRateLimiter:
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            limiter = ProviderRateLimiter(
+                provider,
+                rpm=settings.RATE_LIMIT_RPM.get(provider),
+                tpm=settings.RATE_LIMIT_TPM.get(provider),
+                initial_concurrency=settings.RATE_LIMIT_INITIAL_CONCURRENCY,
+                min_concurrency=settings.RATE_LIMIT_MIN_CONCURRENCY,
+                max_concurrency=settings.RATE_LIMIT_MAX_CONCURRENCY,
+            )
+            self._limiters[provider] = limiter
+        return limiter
+
+    def stats(self) -> dict:
+        return {provider: limiter.stats() for provider, limiter in self._limiters.items()}
+
+
+rate_limiters = RateLimiterRegistry()
+
+
+class wait_retry_after(wait_base):
+    """Tenacity wait that honours a RateLimitError's Retry-After, otherwise defers to fallback"""
+
+    def __init__(self, fallback: wait_base, max_wait: float = 120.0):
+        self.fallback = fallback
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state) -> float:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        if isinstance(exc, RateLimitError) and exc.retry_after is not None:
+            return min(exc.retry_after, self.max_wait)
+        return self.fallback(retry_state)
+
+
+class stop_after_attempts(stop_base):
+    """Tenacity stop with a separate (larger) attempt budget for rate-limited calls"""
+
+    def __init__(self, attempts: int, rate_limited_attempts: int):
+        self.attempts = attempts
+        self.rate_limited_attempts = rate_limited_attempts
+
+    def __call__(self, retry_state) -> bool:
+        exc = retry_state.outcome.exception() if retry_state.outcome else None
+        limit = self.rate_limited_attempts if isinstance(exc, RateLimitError) else self.attempts
+        return retry_state.attempt_number >= limit
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import AsyncIterator, Optional
+from app.adapters.model_adapter import BaseModelAdapter
+from app.config import settings
+
+
+def make_cache_key(provider: str, model: str, system_prompt: Optional[str], prompt: str) -> str:
+    """Content address of a completion request"""
+    payload = json.dumps([provider, model, system_prompt, prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    LLM response cache stored in its own SQLite file (separate from the app DB,
+    so cache writes never contend with analysis writes). Its methods block on SQLite;
+    async callers run them in a worker thread.
+    Entries expire after ttl_seconds; least recently used entries are evicted
+    once max_entries or max_bytes is exceeded.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_entries: int, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_accessed_at ON llm_cache (accessed_at)")
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, size, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[2] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._entries -= 1
+                self._bytes -= row[1]
+                row = None
+            if not row:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str, provider: str = "", model: str = ""):
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, provider, model, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, value, size, now, now)
+            )
+            if old:
+                self._bytes += size - old[0]
+            else:
+                self._entries += 1
+                self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        """
+        Drop expired entries, then least recently used ones down to 90% of the limits
+        (headroom so eviction doesn't run on every insert). Caller holds the lock.
+        """
+        if self._entries <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        entries, total = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()
+        target_entries, target_bytes = int(self.max_entries * 0.9), int(self.max_bytes * 0.9)
+        evicted = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at"):
+            if entries <= target_entries and total <= target_bytes:
+                break
+            evicted.append((key,))
+            entries -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", evicted)
+        self.evictions += len(evicted)
+        self._entries, self._bytes = entries, total
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._entries, self._bytes = 0, 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": settings.LLM_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": self._entries,
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+
+class CachedModelAdapter(BaseModelAdapter):
+    """Wraps another adapter and serves identical requests from the response cache"""
+
+    def __init__(self, inner: BaseModelAdapter, cache: "ResponseCache"):
+        super().__init__(inner.api_key, inner._client)
+        self.inner = inner
+        self.cache = cache
+        self.provider = inner.provider
+        self.model = getattr(inner, "model", "")
+        self.context_window = inner.context_window
+        self.max_output_tokens = inner.max_output_tokens
+
+    async def complete(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+        key = make_cache_key(self.provider, self.model, system_prompt, prompt)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached
+        response = await self.inner.complete(prompt, system_prompt)
+        await asyncio.to_thread(self.cache.set, key, response, self.provider, self.model)
+        return response
+
+    async def stream(self, prompt: str, system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        key = make_cache_key(self.provider, self.model, system_prompt, prompt)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            yield cached
+            return
+        chunks = []
+        async for chunk in self.inner.stream(prompt, system_prompt):
+            chunks.append(chunk)
+            yield chunk
+        await asyncio.to_thread(self.cache.set, key, "".join(chunks), self.provider, self.model)
+
+    async def test_connection(self) -> bool:
+        return await self.inner.test_connection()
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            path=settings.LLM_CACHE_PATH or os.path.join(settings.DATA_DIR, "llm_cache.sqlite"),
+            ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+            max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+            max_bytes=settings.LLM_CACHE_MAX_BYTES,
+        )
+    return _response_cache
@@ -1,74 +1,176 @@
-from typing import List, Dict, Any
+import asyncio
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
 from app.tools.registry import TOOL_REGISTRY
+from app.tools.fused import FusedExtractor
 from app.adapters.model_adapter import BaseModelAdapter
 from app.models.column import ColumnDef
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from app.config import settings
+from app.adapters.rate_limiter import stop_after_attempts, wait_retry_after
+from app.tools.prompt_budget import partial_listener
+from tenacity import retry, wait_exponential, retry_if_exception_type
 # from app.models.result import Result
 
+async def run_tool(model: BaseModelAdapter, tool_name: str, paper_content: str, custom_prompt: str = None, sections: Optional[List[dict]] = None):
+    """Run one tool once (no retry)"""
+    tool_class = TOOL_REGISTRY.get(tool_name)
+    
+    if not tool_class:
+        raise ValueError(f"Unknown tool: {tool_name}")
+        
+    tool = tool_class(model)
+    
+    if tool_name == "custom_prompt":
+        return await tool.run(paper_content, custom_prompt=custom_prompt, sections=sections)
+    else:
+        return await tool.run(paper_content, sections=sections)
+
 class OrchestratorAgent:
-    def __init__(self, model: BaseModelAdapter):
+    def __init__(self, model: BaseModelAdapter, max_concurrency: Optional[int] = None, fuse: Optional[bool] = None):
         self.model = model
+        # Max columns running at once for a single paper (1 = sequential)
+        self.max_concurrency = max(1, max_concurrency or settings.ANALYSIS_COLUMN_CONCURRENCY)
+        # Fused mode: compatible JSON tools share a single LLM call
+        self.fuse = settings.ANALYSIS_FUSED_EXTRACTION if fuse is None else fuse
     
     @retry(
-        stop=stop_after_attempt(3), 
-        wait=wait_exponential(multiplier=1, min=2, max=10),
+        stop=stop_after_attempts(3, rate_limited_attempts=6),
+        wait=wait_retry_after(wait_exponential(multiplier=1, min=2, max=10)),
         retry=retry_if_exception_type(Exception),
         reraise=True
     )
-    async def _run_tool_with_retry(self, tool_name: str, paper_content: str, custom_prompt: str = None):
+    async def _run_tool_with_retry(self, tool_name: str, paper_content: str, custom_prompt: str = None, sections: Optional[List[dict]] = None):
         """Execute a tool with retry logic"""
-        tool_class = TOOL_REGISTRY.get(tool_name)
-        
-        if not tool_class:
-            raise ValueError(f"Unknown tool: {tool_name}")
-            
-        tool = tool_class(self.model)
-        
-        if tool_name == "custom_prompt":
-            return await tool.run(paper_content, custom_prompt=custom_prompt)
-        else:
-            return await tool.run(paper_content)
+        return await run_tool(self.model, tool_name, paper_content, custom_prompt, sections)
+
+    @retry(
+        stop=stop_after_attempts(3, rate_limited_attempts=6),
+        wait=wait_retry_after(wait_exponential(multiplier=1, min=2, max=10)),
+        retry=retry_if_exception_type(Exception),
+        reraise=True
+    )
+    async def _run_fused_with_retry(self, extractor: FusedExtractor, paper_content: str, sections: Optional[List[dict]] = None) -> Dict[str, Any]:
+        """Execute a fused extraction with retry logic"""
+        return await extractor.run(paper_content, sections=sections)
+
+    def _split_fusable(self, columns: List[ColumnDef]):
+        """Split columns into (fusable, individual); fusing only pays off with 2+ distinct tools"""
+        if not self.fuse:
+            return [], list(columns)
+        fusable = [c for c in columns if getattr(TOOL_REGISTRY.get(c.tool_name), "fusable", False)]
+        if len({c.tool_name for c in fusable}) < 2:
+            return [], list(columns)
+        fusable_ids = {c.id for c in fusable}
+        return fusable, [c for c in columns if c.id not in fusable_ids]
+
+    @contextmanager
+    def _streaming(self, column_ids: List[str], progress=None):
+        """Announce column_ids as started and route streamed model output to progress while inside"""
+        if progress is None:
+            yield
+            return
+        progress.started(column_ids)
+        token = partial_listener.set(progress.partial_listener(column_ids))
+        try:
+            yield
+        finally:
+            partial_listener.reset(token)
+
+    async def _report(self, results: Dict[str, Any], progress=None):
+        """Hand finished columns to progress (persisted and announced right away)"""
+        if progress is not None:
+            for column_id, result in results.items():
+                await progress.finished(column_id, result)
+
+    async def _analyze_fused(self, paper_content: str, columns: List[ColumnDef], sections: Optional[List[dict]] = None, progress=None) -> Dict[str, Any]:
+        """One LLM call for all fusable columns; any column whose slice is missing or fails to parse runs individually"""
+        tools = {}
+        for column in columns:
+            if column.tool_name not in tools:
+                tools[column.tool_name] = TOOL_REGISTRY[column.tool_name](self.model)
+        extractor = FusedExtractor(self.model, list(tools.values()))
+
+        try:
+            with self._streaming([c.id for c in columns], progress):
+                fused = await self._run_fused_with_retry(extractor, paper_content, sections)
+        except Exception as e:
+            print(f"Fused extraction failed, falling back to individual calls: {e}")
+            fused = {}
 
-    async def analyze_paper(self, paper_content: str, columns: List[ColumnDef]) -> Dict[str, Any]:
-        """
-        Analyze paper content using the specified columns/tools.
-        Returns dict mapping column_id to result.
-        """
         results = {}
-        
+        fallback = []
         for column in columns:
             try:
-                # Use the retry logic wrapper
-                value = await self._run_tool_with_retry(
-                    column.tool_name, 
-                    paper_content, 
-                    custom_prompt=column.custom_prompt
-                )
-                
+                if column.tool_name not in fused:
+                    raise ValueError(f"{column.tool_name}: missing from the fused response")
+                value = tools[column.tool_name].parse_fused(fused[column.tool_name])
                 results[column.id] = {
                     "status": "done",
                     "value": value,
                     "error_message": None
                 }
-                
-            except Exception as e:
-                # If retries fail, capture the error
-                print(f"Failed to analyze col {column.id} after retries: {e}")
-                results[column.id] = {
-                    "status": "error",
-                    "value": None,
-                    "error_message": str(e)
-                }
-        
+            except ValueError:
+                fallback.append(column)
+        await self._report(results, progress)
+
+        for column in fallback:
+            results[column.id] = await self._analyze_column(paper_content, column, sections, progress)
+        return results
+
+    async def _analyze_column(self, paper_content: str, column: ColumnDef, sections: Optional[List[dict]] = None, progress=None) -> Dict[str, Any]:
+        with self._streaming([column.id], progress):
+            result = await self.analyze_single_column(paper_content, column, sections)
+        await self._report({column.id: result}, progress)
+        return result
+
+    async def analyze_paper(self, paper_content: str, columns: List[ColumnDef], sections: Optional[List[dict]] = None, progress=None) -> Dict[str, Any]:
+        """
+        Analyze paper content using the specified columns/tools.
+        sections (from the section segmenter) let each tool send only the parts of the paper it needs.
+        Columns run concurrently (bounded by max_concurrency), each with its own retry.
+        In fused mode, fusable JSON tools are merged into one call that counts as a single slot.
+        progress (app.services.progress.PaperProgress) receives each column's result as it finishes.
+        Returns dict mapping column_id to result.
+        """
+        fused_columns, columns = self._split_fusable(columns)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_fused() -> Dict[str, Any]:
+            async with semaphore:
+                return await self._analyze_fused(paper_content, fused_columns, sections, progress)
+
+        async def run_column(column: ColumnDef) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._analyze_column(paper_content, column, sections, progress)
+
+        results = {}
+        if self.max_concurrency == 1:
+            if fused_columns:
+                results.update(await run_fused())
+            for column in columns:
+                results[column.id] = await run_column(column)
+            return results
+
+        # analyze_single_column never raises, so one failing column can't cancel the others
+        jobs = [run_column(column) for column in columns]
+        if fused_columns:
+            jobs.append(run_fused())
+        outcomes = await asyncio.gather(*jobs)
+
+        for column, outcome in zip(columns, outcomes):
+            results[column.id] = outcome
+        if fused_columns:
+            results.update(outcomes[-1])
         return results
     
-    async def analyze_single_column(self, paper_content: str, column: ColumnDef) -> Dict[str, Any]:
+    async def analyze_single_column(self, paper_content: str, column: ColumnDef, sections: Optional[List[dict]] = None) -> Dict[str, Any]:
         """Analyze a single column (for retry functionality)"""
         try:
             value = await self._run_tool_with_retry(
                 column.tool_name, 
                 paper_content, 
-                custom_prompt=column.custom_prompt
+                custom_prompt=column.custom_prompt,
+                sections=sections
             )
             
             return {
@@ -78,6 +180,8 @@ class OrchestratorAgent:
             }
             
         except Exception as e:
+            # If retries fail, capture the error
+            print(f"Failed to analyze col {column.id} after retries: {e}")
             return {
                 "status": "error",
                 "value": None,
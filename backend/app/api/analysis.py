@@ -1,25 +1,59 @@
-from fastapi import APIRouter, Depends, BackgroundTasks, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db, SessionLocal
-from app.schemas.analysis import AnalysisRequest
+from app.schemas.analysis import AnalysisRequest, BatchRunResponse
 from app.models.project import Project
 from app.models.paper import Paper
 from app.models.settings import Settings
 from app.models.result import Result
 from app.models.column import ColumnDef
+from app.models.batch import BatchRun
 from app.agents.orchestrator import OrchestratorAgent
-from app.adapters.model_adapter import get_model_adapter
+from app.adapters.model_adapter import get_model_adapter, MODEL_ADAPTERS
+from app.adapters.batch_api import BATCH_CLIENTS
+from app.adapters.rate_limiter import rate_limiters
+from app.services.scheduler import analysis_scheduler, PRIORITY_BULK, PRIORITY_RETRY
+from app.services.job_queue import enqueue_job
+from app.services.result_writer import build_result_rows, result_writer
+from app.services.content_store import load_document
+from app.services.embedding_index import load_tool_sections
+from app.services.batch_runner import batch_runner, create_batch_run
+from app.services.event_bus import event_bus
+from app.services.progress import PaperProgress
+from app.services.fingerprint import column_fingerprints, find_stale_cells, shared_results
+from app.tools.prompt_budget import token_usage
+from app.config import settings
+import asyncio
 import logging
 import json
-from typing import List
+from typing import Dict, List, Optional
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-async def process_paper_task(paper_id: str, project_id: str):
+def get_model_provider(db: Session) -> str:
+    """Currently configured LLM provider (used for scheduler rate limits)"""
+    setting = db.query(Settings).filter(Settings.key == 'model_provider').first()
+    return setting.value if setting and setting.value else 'claude'
+
+def get_api_key(db: Session) -> str:
+    setting = db.query(Settings).filter(Settings.key == 'api_key').first()
+    return setting.value if setting and setting.value else ''
+
+def get_model_name(provider: str) -> str:
+    """Model the provider's adapter calls (part of result fingerprints); 400 for an unknown provider"""
+    adapter_class = MODEL_ADAPTERS.get(provider)
+    if adapter_class is None:
+        raise HTTPException(status_code=400, detail=f"Unknown model provider '{provider}' (use {', '.join(MODEL_ADAPTERS)})")
+    return adapter_class.model
+
+async def process_paper_task(paper_id: str, project_id: str, column_ids: Optional[List[str]] = None):
     """
-    Background task to process a single paper.
+    Background task to process a single paper (the job queue worker's processor).
     Creates its own DB session.
+    column_ids limits the run to those columns (stale cells); other results are kept.
+    A failure is recorded on the paper and re-raised, so the worker retries the job
+    (up to its max_attempts) or marks it failed.
     """
     db = SessionLocal()
     try:
@@ -33,88 +67,76 @@ async def process_paper_task(paper_id: str, project_id: str):
         paper.status = "processing"
         paper.error_message = None
         db.commit()
+        event_bus.publish(project_id, {"type": "paper", "paper_id": paper_id, "status": "processing"})
         
         # 2. Setup Agent
         # Fetch settings to get API Key
         # Settings are stored as key/value rows.
         # We need to query for 'model_provider' and 'api_key'
-        model_provider_setting = db.query(Settings).filter(Settings.key == 'model_provider').first()
-        api_key_setting = db.query(Settings).filter(Settings.key == 'api_key').first()
-        
-        provider = model_provider_setting.value if model_provider_setting else 'claude'
-        api_key = api_key_setting.value if api_key_setting else ''
+        provider = get_model_provider(db)
+        api_key = get_api_key(db)
         
         if not api_key:
             raise ValueError("API Key not found in settings. Please configure settings first.")
 
-        # Initialize Adapter and Agent
-        adapter = get_model_adapter(provider, api_key)
+        # Initialize Adapter and Agent (identical prompts are served from the response cache
+        # unless the project opted out)
+        project = db.query(Project).filter(Project.id == project_id).first()
+        use_cache = project.llm_cache_enabled if project else True
+        adapter = get_model_adapter(provider, api_key, use_cache=use_cache)
         agent = OrchestratorAgent(adapter)
         
         # 3. Fetch Columns (Schema)
-        columns = db.query(ColumnDef).filter(ColumnDef.project_id == project_id).all()
+        query = db.query(ColumnDef).filter(ColumnDef.project_id == project_id)
+        if column_ids is not None:
+            query = query.filter(ColumnDef.id.in_(column_ids))
+        columns = query.all()
         if not columns:
              logger.warning(f"No columns defined for project {project_id}")
              # Nothing to do, but mark done?
              paper.status = "done"
              db.commit()
+             event_bus.publish(project_id, {"type": "paper", "paper_id": paper_id, "status": "done"})
              return
 
         # 4. Run Analysis
-        # Ensure raw_content exists
-        if not paper.raw_content:
+        # Load the paper text from the content store (only analysis needs it)
+        paper_content, sections = load_document(db, paper.content_hash)
+        if not paper_content:
              raise ValueError("Paper has no content to analyze. Please re-upload the PDF.")
 
-        # Agent returns Dict[column_id, dict(status, value, error)]
-        results_map = await agent.analyze_paper(paper.raw_content, columns)
-        
-        # 5. Save Results
-        # Map column IDs to tool names
-        col_tool_map = {c.id: c.tool_name for c in columns}
+        # Each done result records the inputs it was computed from, for the "stale" analysis mode
+        fingerprints = column_fingerprints(columns, adapter.model, paper.content_hash)
+        # Cells computed from identical inputs for another paper (the same content in another
+        # project) are copied instead of re-run, unless the project opted out of caching
+        shared = shared_results(db, fingerprints, paper_id) if use_cache else {}
+
+        # Detach what we loaded and end the read transaction so it isn't held open
+        # for the whole (long) LLM phase
+        db.expunge_all()
+        db.commit()
+
+        progress = PaperProgress(project_id, paper_id, columns, fingerprints)
+        copied_fields = await progress.copied(shared) if shared else {}
+        columns = [c for c in columns if c.id not in shared]
+        # Embed the paper (similar papers / passage search); tools whose sections this paper lacks
+        # read the passages most relevant to them instead of its first pages. Runs off the event
+        # loop, with its own session.
+        sections = await asyncio.to_thread(load_tool_sections, paper.content_hash, sections, [c.tool_name for c in columns])
 
+        # Agent returns Dict[column_id, dict(status, value, error)]; each column is saved
+        # and announced to progress subscribers as soon as it finishes
+        results_map = await agent.analyze_paper(paper_content, columns, sections, progress)
+        
         # 5. Save Results
-        for col_id, res_data in results_map.items():
-            # Check if result exists
-            existing_result = db.query(Result).filter(
-                Result.paper_id == paper.id, 
-                Result.column_id == col_id
-            ).first()
-            
-            value = res_data['value']
-            
-            # Special Handling: If this is metadata_extractor, try to update Paper Title
-            tool_name = col_tool_map.get(col_id)
-            if tool_name == "metadata_extractor" and value and isinstance(value, dict):
-                extracted_title = value.get("title") or value.get("Title")
-                if extracted_title and isinstance(extracted_title, str):
-                    paper.title = extracted_title
-            
-            if value is None:
-                value_str = None
-            elif isinstance(value, (dict, list)):
-                value_str = json.dumps(value)
-            else:
-                value_str = str(value)
-            
-            if existing_result:
-                existing_result.value = value_str
-                existing_result.status = res_data['status']
-                existing_result.error_message = res_data['error_message']
-            else:
-                new_result = Result(
-                    paper_id=paper.id,
-                    column_id=col_id,
-                    value=value_str,
-                    status=res_data['status'],
-                    error_message=res_data['error_message']
-                )
-                db.add(new_result)
+        result_rows, paper_fields = build_result_rows(columns, results_map, fingerprints)
+        result_rows = {k: v for k, v in result_rows.items() if k not in progress.persisted}
+        paper_fields = {**copied_fields, **paper_fields}
         
-        # 6. Final Status Update
-        # If any column failed, we might mark paper as partial error?
-        # Current logic: 'done' if process finished, even if individual cols failed.
-        paper.status = "done"
-        db.commit()
+        # 6. Remaining results and final status go through the single result writer, batched
+        # with other papers finishing at the same time
+        await result_writer.write(paper_id, result_rows, paper_fields)
+        progress.paper(**paper_fields)
         
     except Exception as e:
         logger.error(f"Error processing paper {paper_id}: {e}")
@@ -126,46 +148,187 @@ async def process_paper_task(paper_id: str, project_id: str):
             paper.status = "error"
             paper.error_message = str(e)
             db.commit()
+            event_bus.publish(project_id, {"type": "paper", "paper_id": paper_id, "status": "error", "error_message": str(e)})
+        raise
             
     finally:
         db.close()
 
 
-@router.post("/analyze")
-async def trigger_analysis(
-    request: AnalysisRequest, 
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    project_id = request.project_id
-    
-    # 1. Determine papers to analyze
-    target_papers = []
-    
-    if project_id:
+def schedule_retry(db: Session, paper_id: str, project_id: str, column_ids: Optional[List[str]] = None):
+    """
+    Re-run a paper, or only the given cells of it, through the shared scheduler at retry priority.
+    Retries arriving within RETRY_COALESCE_SECONDS of each other are merged into the paper's
+    queued job and run together. While the paper is running, the retry becomes a follow-up job
+    that runs right after it (the running job may already be past those cells).
+    Commits the session. Callable from sync handlers (worker threads).
+    """
+    job, _ = enqueue_job(db, paper_id, project_id, PRIORITY_RETRY, column_ids, absorb_running=False)
+    db.commit()
+    analysis_scheduler.submit_later(
+        paper_id, project_id, get_model_provider(db), PRIORITY_RETRY, settings.RETRY_COALESCE_SECONDS
+    )
+    return job
+
+
+def select_target_papers(db: Session, request: AnalysisRequest) -> List[Paper]:
+    if request.project_id:
         # Fetch all QUEUED (or error/processing?) papers for project
         # Usually we only pick 'queued'. If user wants retry, they can manually reset to queued.
         # But 'Run Analysis' implies running pending work.
-        target_papers = db.query(Paper).filter(
-            Paper.project_id == project_id,
+        return db.query(Paper).filter(
+            Paper.project_id == request.project_id,
             Paper.status == 'queued'
         ).all()
-        
-    elif request.paper_ids:
-        target_papers = db.query(Paper).filter(Paper.id.in_(request.paper_ids)).all()
-        project_id = target_papers[0].project_id if target_papers else None 
-        # Note: if mixed projects, we assume same project context or handle per paper.
-        # But for 'process_paper_task', we pass project_id.
+    if request.paper_ids:
+        return db.query(Paper).filter(Paper.id.in_(request.paper_ids)).all()
+    return []
+
+def select_stale_cells(db: Session, request: AnalysisRequest, provider: str) -> Dict[str, List[str]]:
+    """paper_id -> stale column ids for the request's project (optionally only its paper_ids/column_ids)"""
+    if not request.project_id:
+        raise HTTPException(status_code=400, detail="Stale mode needs a project_id")
+    stale = find_stale_cells(db, request.project_id, get_model_name(provider), request.column_ids)
+    if request.paper_ids:
+        stale = {paper_id: stale[paper_id] for paper_id in request.paper_ids if paper_id in stale}
+    return stale
+
+@router.post("/analyze")
+async def trigger_analysis(
+    request: AnalysisRequest, 
+    db: Session = Depends(get_db)
+):
+    """
+    mode "queued" (default) analyzes the project's queued papers (or the given paper_ids).
+    mode "stale" recomputes only cells whose result is missing, failed or outdated because its
+    inputs changed (column prompt, tool prompt version, model, paper content); other cells are kept.
+    column_ids limits either mode to those columns.
+    """
+    provider = get_model_provider(db)
+
+    # 1. Determine papers (and columns) to analyze
+    if request.mode == "stale":
+        stale = select_stale_cells(db, request, provider)
+        targets = db.query(Paper).filter(Paper.id.in_(list(stale))).all() if stale else []
+        column_ids = {paper.id: stale[paper.id] for paper in targets}
+        priority = PRIORITY_BULK
+    else:
+        targets = select_target_papers(db, request)
+        column_ids = {paper.id: request.column_ids for paper in targets}
+        # Explicitly selected papers (retries) jump ahead of project-wide bulk runs
+        priority = PRIORITY_BULK if request.project_id else PRIORITY_RETRY
     
-    if not target_papers:
-        return {"status": "ignored", "message": "No queued papers found to analyze."}
+    if not targets:
+        message = "No stale results found." if request.mode == "stale" else "No queued papers found to analyze."
+        return {"status": "ignored", "message": message}
+
+    # 2. Persist jobs first so they survive a restart, then hand them to the scheduler
+    jobs = [
+        enqueue_job(db, paper.id, paper.project_id, priority, column_ids[paper.id])
+        for paper in targets
+    ]
+    db.commit()
 
-    # 2. Queue Background Tasks
     count = 0
-    for paper in target_papers:
-        # We pass paper.id and paper.project_id
-        # Note: paper object might be detached if we don't use IDs
-        background_tasks.add_task(process_paper_task, paper.id, paper.project_id)
-        count += 1
-        
+    for job, created in jobs:
+        # Pass IDs only; the worker opens its own session
+        if await analysis_scheduler.submit(job.paper_id, job.project_id, provider, job.priority) or created:
+            count += 1
+
+    if request.mode == "stale":
+        cells = sum(len(ids) for ids in column_ids.values())
+        return {"status": "accepted", "message": f"Re-analysis started for {cells} stale cells in {count} papers"}
     return {"status": "accepted", "message": f"Analysis started for {count} papers"}
+
+
+@router.get("/analyze/stale")
+def get_stale_cells(project_id: str, db: Session = Depends(get_db)):
+    """Preview of mode "stale": how many cells (per column) would be recomputed"""
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+    stale = find_stale_cells(db, project_id, get_model_name(get_model_provider(db)))
+    by_column: Dict[str, int] = {}
+    for column_ids in stale.values():
+        for column_id in column_ids:
+            by_column[column_id] = by_column.get(column_id, 0) + 1
+    return {"papers": len(stale), "cells": sum(by_column.values()), "by_column": by_column}
+
+
+@router.post("/analyze/batch", response_model=BatchRunResponse)
+def trigger_batch_analysis(
+    request: AnalysisRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Analyze papers through the provider's batch API (about half the price, results within
+    24h) instead of interactive calls. Poll GET /analyze/batches/{id} for progress.
+    """
+    provider = get_model_provider(db)
+    if provider not in BATCH_CLIENTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch mode is not available for '{provider}' (supported: {', '.join(BATCH_CLIENTS)})"
+        )
+    if not get_api_key(db):
+        raise HTTPException(status_code=400, detail="API Key not found in settings. Please configure settings first.")
+    if request.mode == "stale":
+        raise HTTPException(status_code=400, detail="Batch mode analyzes whole papers; use POST /analyze for stale cells")
+
+    target_papers = select_target_papers(db, request)
+    if not target_papers:
+        raise HTTPException(status_code=400, detail="No queued papers found to analyze.")
+
+    model = get_model_name(provider)
+    run = create_batch_run(db, target_papers, provider, model, request.project_id)
+    db.commit()
+    db.refresh(run)
+    for paper in target_papers:
+        event_bus.publish(paper.project_id, {"type": "paper", "paper_id": paper.id, "status": "processing"})
+    batch_runner.poke()
+    return run
+
+@router.get("/analyze/batches", response_model=List[BatchRunResponse])
+def list_batch_runs(project_id: Optional[str] = None, db: Session = Depends(get_db)):
+    query = db.query(BatchRun)
+    if project_id:
+        query = query.filter(BatchRun.project_id == project_id)
+    return query.order_by(BatchRun.created_at.desc()).all()
+
+@router.get("/analyze/batches/{run_id}", response_model=BatchRunResponse)
+def get_batch_run(run_id: str, db: Session = Depends(get_db)):
+    run = db.query(BatchRun).filter(BatchRun.id == run_id).first()
+    if not run:
+        raise HTTPException(status_code=404, detail="Batch run not found")
+    return run
+
+
+@router.get("/analyze/cache")
+def get_cache_stats():
+    """LLM response cache hit/miss counters and size"""
+    from app.adapters.response_cache import get_response_cache
+    return get_response_cache().stats()
+
+
+@router.delete("/analyze/cache")
+def clear_cache():
+    from app.adapters.response_cache import get_response_cache
+    get_response_cache().clear()
+    return {"status": "success"}
+
+
+@router.get("/analyze/status")
+def get_analysis_status(db: Session = Depends(get_db)):
+    """Scheduler queue depth and in-flight counts, persistent job counts, estimated token usage, provider rate limits and event bus subscribers"""
+    from sqlalchemy import func
+    from app.models.job import AnalysisJob
+
+    job_counts = dict(
+        db.query(AnalysisJob.status, func.count(AnalysisJob.id)).group_by(AnalysisJob.status).all()
+    )
+    return {
+        **analysis_scheduler.stats(),
+        "jobs": job_counts,
+        "token_estimates": token_usage.stats(),
+        "rate_limits": rate_limiters.stats(),
+        "event_bus": event_bus.stats(),
+    }
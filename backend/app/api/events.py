@@ -0,0 +1,58 @@
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import get_db
+from app.models.project import Project
+from app.services.event_bus import event_bus
+
+router = APIRouter()
+
+
+@router.get("/projects/{project_id}/events")
+async def project_events(
+    project_id: str,
+    request: Request,
+    cursor: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Server-sent events with incremental changes to a project's papers and results:
+    - paper:         {paper_id, status, title?, error_message?}
+    - paper_deleted: {paper_id}
+    - cell:          {paper_id, column_id, status, value?, error_message?}
+    - partial:       {paper_id, column_id, text} streamed model output so far (live only, no id)
+    - resync:        events were missed; re-fetch the papers
+    Every other event carries an id. Reconnecting with Last-Event-ID (EventSource does this
+    automatically) or ?cursor= resumes after that event.
+    """
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+    # The stream outlives the request's session; don't hold a connection
+    db.close()
+
+    subscription = await event_bus.subscribe(project_id, cursor or last_event_id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                delivery = await subscription.get(timeout=settings.PROGRESS_HEARTBEAT_SECONDS)
+                if delivery is None:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield ": ping\n\n"
+                    continue
+                event_id, event = delivery
+                id_line = f"id: {event_id}\n" if event_id else ""
+                yield f"{id_line}event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            await subscription.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
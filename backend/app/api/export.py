@@ -1,52 +1,45 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from app.database import get_db, SessionLocal
+from typing import Iterator, List
 import pandas as pd
+import csv
 import io
+import tempfile
 import zipfile
 import json
 
+# Papers loaded per round trip when streaming exports
+EXPORT_CHUNK_SIZE = 500
+# Excel rejects cells longer than this
+EXCEL_MAX_CELL_LENGTH = 32767
+
 router = APIRouter()
 
 @router.get("/projects/{id}/export/excel")
 def export_excel(id: str, db: Session = Depends(get_db)):
-    try:
-        project, df = _get_project_dataframe(id, db)
-        
-        # Apply Excel formatting
-        df_formatted = df.map(_format_for_excel)
-        
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df_formatted.to_excel(writer, index=False, sheet_name='Analysis Results')
-        output.seek(0)
-        
-        headers = {
-            'Content-Disposition': f'attachment; filename="{project.name}_analysis.xlsx"'
-        }
-        return StreamingResponse(output, headers=headers, media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+    project = _get_project_or_404(id, db)
+    
+    headers = {
+        'Content-Disposition': f'attachment; filename="{project.name}_analysis.xlsx"'
+    }
+    return StreamingResponse(
+        _stream_excel(id),
+        headers=headers,
+        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
 
 @router.get("/projects/{id}/export/csv")
 def export_csv(id: str, db: Session = Depends(get_db)):
-    project, df = _get_project_dataframe(id, db)
-    
-    # Apply Excel/CSV formatting
-    df_formatted = df.map(_format_for_excel)
-    
-    output = io.StringIO()
-    df_formatted.to_csv(output, index=False)
-    output.seek(0)
+    project = _get_project_or_404(id, db)
     
     headers = {
         'Content-Disposition': f'attachment; filename="{project.name}_analysis.csv"'
     }
     return StreamingResponse(
-        iter([output.getvalue()]), 
+        _stream_csv(id),
         headers=headers, 
         media_type='text/csv'
     )
@@ -93,14 +86,97 @@ def export_markdown(id: str, db: Session = Depends(get_db)):
         media_type='application/zip'
     )
 
+def _get_project_or_404(project_id: str, db: Session):
+    from app.models.project import Project
+
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+def _iter_export_rows(project_id: str) -> Iterator[List[str]]:
+    """
+    Yield the header, then one formatted row per paper, loading papers and their
+    results EXPORT_CHUNK_SIZE papers at a time so memory stays flat for any project size.
+    Uses its own session because the response body is produced after the request returns.
+    """
+    from app.models.column import ColumnDef
+    from app.models.paper import Paper
+    from app.models.result import Result
+    
+    db = SessionLocal()
+    try:
+        columns = db.query(ColumnDef.id, ColumnDef.name).filter(ColumnDef.project_id == project_id).all()
+        yield ['Paper'] + [name for _, name in columns]
+        
+        papers = db.execute(
+            select(Paper.id, Paper.title)
+            .where(Paper.project_id == project_id)
+            .order_by(Paper.created_at, Paper.id)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+        
+        for chunk in papers.partitions():
+            values = {}
+            for paper_id, column_id, value in db.query(Result.paper_id, Result.column_id, Result.value).filter(
+                Result.paper_id.in_([paper_id for paper_id, _ in chunk])
+            ):
+                values[(paper_id, column_id)] = value
+            
+            for paper_id, title in chunk:
+                yield [title or "Untitled"] + [
+                    _format_for_excel(values.get((paper_id, column_id))) for column_id, _ in columns
+                ]
+    finally:
+        db.close()
+
+def _stream_csv(project_id: str) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for i, row in enumerate(_iter_export_rows(project_id)):
+        writer.writerow(row)
+        # Flush roughly once per chunk (and right after the header so bytes go out immediately)
+        if i % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _stream_excel(project_id: str, chunk_bytes: int = 64 * 1024) -> Iterator[bytes]:
+    """
+    Write rows into a write-only (constant memory) workbook backed by a temp file,
+    then stream the finished file. XLSX is a zip, so bytes can only go out once it is complete.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Analysis Results')
+    for row in _iter_export_rows(project_id):
+        sheet.append([ILLEGAL_CHARACTERS_RE.sub("", cell)[:EXCEL_MAX_CELL_LENGTH] for cell in row])
+    
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            data = output.read(chunk_bytes)
+            if not data:
+                break
+            yield data
+
 def _get_project_dataframe(project_id: str, db: Session):
     from app.models.project import Project
     from app.models.paper import Paper
     from app.models.result import Result
     
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = db.query(Project).options(selectinload(Project.columns)).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
+    
+    # Papers with their results in two queries instead of one per paper
+    papers = db.query(Paper).options(selectinload(Paper.results)).filter(
+        Paper.project_id == project_id
+    ).order_by(Paper.created_at, Paper.id).all()
         
     # Prepare data rows
     data = []
@@ -109,7 +185,7 @@ def _get_project_dataframe(project_id: str, db: Session):
     # Default columns
     column_names = {col.id: col.name for col in project.columns}
     
-    for paper in project.papers:
+    for paper in papers:
         row = {'Paper': paper.title or "Untitled"}
         
         # Add metadata if available (basic stuff)
@@ -239,6 +315,7 @@ def _sanitize_filename(name: str) -> str:
 @router.post("/projects/{id}/export/notion")
 async def export_notion(id: str, db: Session = Depends(get_db)):
     from app.models.project import Project
+    from app.models.paper import Paper
     from app.models.settings import Settings
     from app.adapters.notion_exporter import NotionExporter
     
@@ -252,7 +329,10 @@ async def export_notion(id: str, db: Session = Depends(get_db)):
     if not notion_key or not notion_db_id:
          raise HTTPException(status_code=400, detail="Notion credentials not configured in settings")
          
-    project = db.query(Project).filter(Project.id == id).first()
+    project = db.query(Project).options(
+        selectinload(Project.columns),
+        selectinload(Project.papers).selectinload(Paper.results)
+    ).filter(Project.id == id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
         
@@ -1,22 +1,145 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Query, Request, Response
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import datetime
+from contextlib import ExitStack
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import uuid
+import zipfile
+from app.config import settings
+from app.database import SessionLocal, get_db
 from app.models.paper import Paper
 from app.models.project import Project
-from app.schemas.paper import PaperCreate, PaperUpdate, PaperResponse
+from app.models.result import Result
+from app.schemas.paper import PaperCreate, PaperUpdate, PaperResponse, BatchUploadItem, BatchUploadResponse
+from app.services.content_store import file_hash, known_file_contents, store_content, release_content
+from app.services.event_bus import event_bus
 # from app.agents.input_router import InputRouterAgent # Phase 2
 
-from app.parsers.pdf_parser import PDFParser
+from app.parsers.pdf_parser import PDFParser, parse_concurrency
 
 router = APIRouter()
 
+# Sortable fields: SQL expression, value of a loaded paper (for the next cursor), cursor value parser
+SORT_FIELDS = {
+    "created_at": (Paper.created_at, lambda p: p.created_at.isoformat(), datetime.fromisoformat),
+    "updated_at": (Paper.updated_at, lambda p: p.updated_at.isoformat(), datetime.fromisoformat),
+    "title": (func.coalesce(Paper.title, ""), lambda p: p.title or "", str),
+    "status": (Paper.status, lambda p: p.status, str),
+}
+
+def _encode_cursor(value: str, paper_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, paper_id]).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        value, paper_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return value, paper_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _split_param(value: Optional[str]) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()] if value else []
+
+def _like_pattern(value: str) -> str:
+    """Substring pattern for ilike(..., escape="\\") matching the value literally"""
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+def _list_etag(db: Session, project_id: str, query_string: str) -> str:
+    """
+    Weak ETag from the project's paper and result counts and latest update times, so an
+    unchanged listing is answered with 304 before any paper is loaded or serialized.
+    """
+    paper_count, papers_updated = db.query(func.count(Paper.id), func.max(Paper.updated_at)).filter(
+        Paper.project_id == project_id
+    ).one()
+    result_count, results_updated = db.query(func.count(Result.id), func.max(Result.updated_at)).join(
+        Paper, Result.paper_id == Paper.id
+    ).filter(Paper.project_id == project_id).one()
+    state = f"{paper_count}|{papers_updated}|{result_count}|{results_updated}|{query_string}"
+    return f'W/"{hashlib.sha1(state.encode()).hexdigest()}"'
+
 @router.get("/projects/{project_id}/papers", response_model=List[PaperResponse])
-def list_papers(project_id: str, db: Session = Depends(get_db)):
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+def list_papers(
+    project_id: str,
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; all papers when omitted"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    status: Optional[str] = Query(None, description="Comma-separated statuses, e.g. done,error"),
+    q: Optional[str] = Query(None, description="Case-insensitive title search"),
+    sort: str = Query("created_at", description="created_at, updated_at, title or status; prefix - for descending"),
+    columns: Optional[str] = Query(None, description="Comma-separated column ids whose results to embed; empty for none, omitted for all"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Papers of a project, optionally paged (keyset cursor in the X-Next-Cursor header),
+    filtered and with only some result columns embedded. X-Total-Count is the number of
+    papers matching the filters. Responses carry an ETag; If-None-Match gets a 304 when unchanged.
+    """
+    if not db.query(Project.id).filter(Project.id == project_id).first():
         raise HTTPException(status_code=404, detail="Project not found")
-    return project.papers
+
+    descending = sort.startswith("-")
+    field = sort.lstrip("-")
+    if field not in SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort field '{field}' (use {', '.join(SORT_FIELDS)})")
+
+    etag = _list_etag(db, project_id, request.url.query)
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    query = db.query(Paper).filter(Paper.project_id == project_id)
+    statuses = _split_param(status)
+    if statuses:
+        query = query.filter(Paper.status.in_(statuses))
+    if q:
+        query = query.filter(Paper.title.ilike(_like_pattern(q), escape="\\"))
+    total = query.count()
+
+    sort_expr, sort_value, parse_value = SORT_FIELDS[field]
+    if cursor:
+        value, last_id = _decode_cursor(cursor)
+        try:
+            value = parse_value(value)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if descending:
+            query = query.filter(or_(sort_expr < value, and_(sort_expr == value, Paper.id < last_id)))
+        else:
+            query = query.filter(or_(sort_expr > value, and_(sort_expr == value, Paper.id > last_id)))
+    order = [sort_expr.desc(), Paper.id.desc()] if descending else [sort_expr, Paper.id]
+
+    # Results are embedded in each PaperResponse; load the requested columns in one extra query
+    if columns is None:
+        query = query.options(selectinload(Paper.results))
+    elif _split_param(columns):
+        query = query.options(selectinload(Paper.results.and_(Result.column_id.in_(_split_param(columns)))))
+    else:
+        # No results embedded: never loaded, set to empty below
+        query = query.options(raiseload(Paper.results))
+
+    query = query.order_by(*order)
+    papers = query.limit(limit + 1).all() if limit else query.all()
+    if columns is not None and not _split_param(columns):
+        for paper in papers:
+            set_committed_value(paper, "results", [])
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Total-Count"] = str(total)
+    if limit and len(papers) > limit:
+        papers = papers[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(sort_value(papers[-1]), papers[-1].id)
+    return papers
 
 @router.post("/projects/{project_id}/papers", response_model=PaperResponse)
 async def create_paper(
@@ -41,12 +164,26 @@ async def create_paper(
         db_paper.title = file.filename
         db_paper.source_type = "pdf"
         
-        # Parse PDF Content
+        content = await file.read()
+        db_paper.file_hash = file_hash(content)
+        # The same file again in this project: return the paper we already have
+        existing = db.query(Paper).options(selectinload(Paper.results)).filter(
+            Paper.project_id == project_id,
+            Paper.file_hash == db_paper.file_hash
+        ).first()
+        if existing:
+            return existing
+
+        # Parse PDF Content, unless another project already has this file (its text is shared,
+        # and so are results of identical columns, see app.services.fingerprint)
         try:
-            content = await file.read()
-            parser = PDFParser()
-            text = await parser.parse(content)
-            db_paper.raw_content = text
+            known = known_file_contents(db, [db_paper.file_hash])
+            if known:
+                db_paper.content_hash = known[db_paper.file_hash]
+            else:
+                parser = PDFParser()
+                text = await parser.parse(content)
+                db_paper.content_hash = await asyncio.to_thread(_store_text, text)
         except Exception as e:
             print(f"Error parsing PDF: {e}")
             db_paper.error_message = f"Failed to parse PDF: {str(e)}"
@@ -63,7 +200,7 @@ async def create_paper(
             url_parser = URLParser()
             # This fetches content from web (HTML text or PDF bytes -> text)
             text = await url_parser.parse(input_value)
-            db_paper.raw_content = text
+            db_paper.content_hash = await asyncio.to_thread(_store_text, text)
         except Exception as e:
             print(f"Error parsing URL: {e}")
             db_paper.error_message = f"Failed to fetch content from URL: {str(e)}"
@@ -77,9 +214,192 @@ async def create_paper(
     
     return db_paper
 
+class _UploadedPDF:
+    """One PDF of a batch upload (a plain upload or a zip member), read on demand instead of held in memory"""
+
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, filename: str, file: BinaryIO, archive: Optional[zipfile.ZipFile] = None, member: Optional[zipfile.ZipInfo] = None):
+        self.filename = filename
+        self.file = file
+        self.archive = archive
+        self.member = member
+
+    def chunks(self) -> Iterator[bytes]:
+        if self.archive is not None:
+            with self.archive.open(self.member) as stream:
+                while chunk := stream.read(self.CHUNK_SIZE):
+                    yield chunk
+        else:
+            self.file.seek(0)
+            while chunk := self.file.read(self.CHUNK_SIZE):
+                yield chunk
+
+    def digest(self) -> str:
+        sha = hashlib.sha256()
+        for chunk in self.chunks():
+            sha.update(chunk)
+        return sha.hexdigest()
+
+    def read(self) -> bytes:
+        return b"".join(self.chunks())
+
+def _list_upload_members(filename: str, file: BinaryIO, stack: ExitStack) -> Tuple[List[_UploadedPDF], List[BatchUploadItem]]:
+    """Expand one uploaded file into its PDFs; zip archives yield their PDF members (left open on stack)"""
+    lower = filename.lower()
+    if lower.endswith(".pdf"):
+        return [_UploadedPDF(filename, file)], []
+    if not lower.endswith(".zip"):
+        return [], [BatchUploadItem(filename=filename, status="skipped", error_message="Not a PDF or zip file")]
+
+    pdfs, skipped = [], []
+    try:
+        archive = stack.enter_context(zipfile.ZipFile(file))
+    except zipfile.BadZipFile:
+        return [], [BatchUploadItem(filename=filename, status="skipped", error_message="Invalid zip archive")]
+    for info in archive.infolist():
+        name = info.filename
+        if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+            continue
+        if not name.lower().endswith(".pdf"):
+            skipped.append(BatchUploadItem(filename=name, status="skipped", error_message="Not a PDF file"))
+        elif settings.PDF_MAX_BYTES and info.file_size > settings.PDF_MAX_BYTES:
+            skipped.append(BatchUploadItem(filename=name, status="skipped", error_message="File too large"))
+        else:
+            pdfs.append(_UploadedPDF(os.path.basename(name), file, archive, info))
+    return pdfs, skipped
+
+def _store_text(text: str) -> str:
+    """Store one parsed text in its own transaction (compression, sections, search index); returns its hash"""
+    db = SessionLocal()
+    try:
+        key = store_content(db, text)
+        db.commit()
+        return key
+    finally:
+        db.close()
+
+def _store_texts(texts: Dict[str, str]) -> Dict[str, str]:
+    """Store parsed texts (file hash -> text) in their own transaction; returns file hash -> content hash"""
+    db = SessionLocal()
+    try:
+        stored = {digest: store_content(db, text) for digest, text in texts.items()}
+        db.commit()
+        return stored
+    finally:
+        db.close()
+
+@router.post("/projects/{project_id}/papers/batch", response_model=BatchUploadResponse)
+async def create_papers_batch(
+    project_id: str,
+    files: List[UploadFile] = File(...),
+    analyze: bool = Form(False),
+    db: Session = Depends(get_db)
+):
+    """Upload many PDFs (or zip archives of PDFs): parse concurrently, insert in one transaction"""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    with ExitStack() as stack:
+        pdfs: List[_UploadedPDF] = []
+        items: List[BatchUploadItem] = []
+        for file in files:
+            members, skipped = _list_upload_members(file.filename or "upload", file.file, stack)
+            pdfs.extend(members)
+            items.extend(skipped)
+
+        if len(pdfs) > settings.BATCH_UPLOAD_MAX_FILES:
+            raise HTTPException(status_code=400, detail=f"Too many PDFs in one batch (max {settings.BATCH_UPLOAD_MAX_FILES})")
+
+        # Files already in this project are skipped; files known from other projects reuse their text.
+        # Hashing streams each file, so no more than a chunk of it is in memory.
+        hashes = await asyncio.to_thread(lambda: [pdf.digest() for pdf in pdfs])
+        in_project = dict(
+            db.query(Paper.file_hash, Paper.id).filter(Paper.project_id == project_id, Paper.file_hash.in_(set(hashes))).all()
+        ) if hashes else {}
+        known = known_file_contents(db, hashes)
+
+        # Parse each new file once on the PDF worker pool. A file is only read when a worker is
+        # about to take it, so at most pool-size files are held in memory at a time.
+        to_parse = {}
+        for pdf, digest in zip(pdfs, hashes):
+            if digest not in known and digest not in in_project:
+                to_parse.setdefault(digest, pdf)
+        parser = PDFParser()
+        slots = asyncio.Semaphore(parse_concurrency())
+
+        async def parse(pdf: _UploadedPDF) -> str:
+            async with slots:
+                return await parser.parse(await asyncio.to_thread(pdf.read))
+
+        parsed = dict(zip(
+            to_parse,
+            await asyncio.gather(*(parse(pdf) for pdf in to_parse.values()), return_exceptions=True)
+        ))
+
+    # Compressing, segmenting and indexing the texts is CPU work; keep it off the event loop
+    known.update(await asyncio.to_thread(
+        _store_texts, {digest: text for digest, text in parsed.items() if not isinstance(text, Exception)}
+    ))
+
+    papers = []
+    created = []
+    for pdf, digest in zip(pdfs, hashes):
+        filename = pdf.filename
+        if digest in in_project:
+            items.append(BatchUploadItem(
+                filename=filename,
+                status="skipped",
+                paper_id=in_project[digest],
+                error_message="Already in this project"
+            ))
+            continue
+        # IDs assigned up front so the response needs no refresh after commit
+        paper = Paper(id=str(uuid.uuid4()), project_id=project_id, status="queued", title=filename, source_type="pdf", file_hash=digest)
+        text = parsed.get(digest)
+        if isinstance(text, Exception):
+            paper.error_message = f"Failed to parse PDF: {str(text)}"
+            paper.status = "error"
+        else:
+            paper.content_hash = known[digest]
+            created.append(paper.id)
+        # Later copies of the same file in this upload are duplicates
+        in_project[digest] = paper.id
+        papers.append(paper)
+        items.append(BatchUploadItem(
+            filename=filename,
+            status=paper.status,
+            paper_id=paper.id,
+            error_message=paper.error_message
+        ))
+
+    # Single transaction for the whole batch (plus its analysis jobs)
+    db.add_all(papers)
+    if analyze and created:
+        from app.services.job_queue import enqueue_job
+        for paper_id in created:
+            enqueue_job(db, paper_id, project_id)
+    db.commit()
+
+    if analyze and created:
+        from app.api.analysis import get_model_provider
+        from app.services.scheduler import analysis_scheduler
+        provider = get_model_provider(db)
+        for paper_id in created:
+            await analysis_scheduler.submit(paper_id, project_id, provider)
+
+    return BatchUploadResponse(
+        created=len(created),
+        failed=len(papers) - len(created),
+        skipped=sum(1 for i in items if i.status == "skipped"),
+        enqueued=len(created) if analyze else 0,
+        items=items
+    )
+
 @router.get("/papers/{id}", response_model=PaperResponse)
 def get_paper(id: str, db: Session = Depends(get_db)):
-    paper = db.query(Paper).filter(Paper.id == id).first()
+    paper = db.query(Paper).options(selectinload(Paper.results)).filter(Paper.id == id).first()
     if not paper:
         raise HTTPException(status_code=404, detail="Paper not found")
     return paper
@@ -96,6 +416,7 @@ def update_paper(id: str, paper_update: PaperUpdate, db: Session = Depends(get_d
     
     db.commit()
     db.refresh(paper)
+    event_bus.publish(paper.project_id, {"type": "paper", "paper_id": paper.id, "status": paper.status, "title": paper.title})
     return paper
 
 @router.delete("/papers/{id}")
@@ -104,12 +425,19 @@ def delete_paper(id: str, db: Session = Depends(get_db)):
     if not paper:
         raise HTTPException(status_code=404, detail="Paper not found")
     
+    content_key, project_id = paper.content_hash, paper.project_id
     db.delete(paper)
+    db.flush()
+    release_content(db, content_key)
     db.commit()
+    event_bus.publish(project_id, {"type": "paper_deleted", "paper_id": id})
     return {"status": "success"}
 
 @router.post("/papers/{id}/retry")
 def retry_paper(id: str, db: Session = Depends(get_db)):
+    """Re-run all of the paper's columns (merged with any retries already queued for it)"""
+    from app.api.analysis import schedule_retry
+
     paper = db.query(Paper).filter(Paper.id == id).first()
     if not paper:
         raise HTTPException(status_code=404, detail="Paper not found")
@@ -117,7 +445,9 @@ def retry_paper(id: str, db: Session = Depends(get_db)):
     paper.status = "queued"
     paper.error_message = None
     db.commit()
+    event_bus.publish(paper.project_id, {"type": "paper", "paper_id": paper.id, "status": "queued"})
     
     # Trigger analysis again
+    job = schedule_retry(db, paper.id, paper.project_id)
     
-    return {"status": "queued"}
+    return {"status": "queued", "job_id": job.id}
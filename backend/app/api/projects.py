@@ -6,6 +6,7 @@ from app.models.project import Project
 from app.models.column import ColumnDef
 from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectResponse, ProjectDetailResponse
 from app.schemas.column import ColumnResponse
+from app.services.content_store import prune_orphaned_content
 
 router = APIRouter()
 
@@ -78,6 +79,9 @@ def delete_project(id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Project not found")
     
     db.delete(project)
+    db.flush()
+    # Drop stored paper text no other project shares
+    prune_orphaned_content(db)
     db.commit()
     return {"status": "success"}
 
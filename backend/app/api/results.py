@@ -5,10 +5,23 @@ from app.database import get_db
 from app.models.result import Result
 from app.models.paper import Paper
 from app.schemas.paper import ResultResponse
+from app.services.event_bus import event_bus
 # from app.schemas.result import ResultUpdate # Create if needed
 
 router = APIRouter()
 
+def publish_result(db: Session, result: Result):
+    """Announce a changed result cell to the project's event subscribers"""
+    project_id = db.query(Paper.project_id).filter(Paper.id == result.paper_id).scalar()
+    event_bus.publish(project_id, {
+        "type": "cell",
+        "paper_id": result.paper_id,
+        "column_id": result.column_id,
+        "value": result.value,
+        "status": result.status,
+        "error_message": result.error_message
+    })
+
 @router.get("/papers/{id}/results", response_model=List[ResultResponse])
 def get_paper_results(id: str, db: Session = Depends(get_db)):
     # Verify paper exists first?
@@ -29,18 +42,25 @@ def update_result(id: str, value: Any = Body(..., embed=True), db: Session = Dep
         
     db.commit()
     db.refresh(result)
+    publish_result(db, result)
     return result
 
 @router.post("/results/{id}/retry")
 def retry_result(id: str, db: Session = Depends(get_db)):
+    """Re-run just this cell; retries of several cells of one paper run as one job"""
+    from app.api.analysis import schedule_retry
+
     result = db.query(Result).filter(Result.id == id).first()
     if not result:
         raise HTTPException(status_code=404, detail="Result not found")
+    project_id = db.query(Paper.project_id).filter(Paper.id == result.paper_id).scalar()
     
     result.status = "pending"
     result.error_message = None
     db.commit()
+    publish_result(db, result)
     
     # Trigger single column analysis
+    job = schedule_retry(db, result.paper_id, project_id, [result.column_id])
     
-    return {"status": "pending"}
+    return {"status": "pending", "job_id": job.id}
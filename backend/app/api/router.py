@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api import projects, papers, columns, analysis, export, settings, results
+from app.api import projects, papers, columns, analysis, export, settings, results, events, search
 
 api_router = APIRouter()
 
@@ -10,3 +10,5 @@ api_router.include_router(papers.router, tags=["papers"])
 api_router.include_router(results.router, tags=["results"])
 api_router.include_router(analysis.router, tags=["analysis"])
 api_router.include_router(export.router, tags=["export"])
+api_router.include_router(events.router, tags=["events"])
+api_router.include_router(search.router, tags=["search"])
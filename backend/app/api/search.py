@@ -0,0 +1,104 @@
+from typing import List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models.paper import Paper
+from app.models.project import Project
+from app.schemas.search import ChunkHit, SearchResponse, SimilarPaper
+from app.services.embedding_index import embedding_index
+from app.services.search_index import fts_query, rebuild_index, search_project
+
+router = APIRouter()
+
+
+def _report_pending(response: Response, pending: int):
+    """Texts are still being embedded in the background: 202, results cover what is indexed so far"""
+    if pending:
+        response.status_code = 202
+        response.headers["X-Index-Pending"] = str(pending)
+
+
+@router.get("/projects/{project_id}/search", response_model=SearchResponse)
+def search_papers(
+    project_id: str,
+    q: str = Query(..., description='Words (all must match), "exact phrases" and prefix* terms'),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search over the project's paper titles, extracted section text and result values.
+    Papers are ranked by their best match (BM25, title matches weighted up) and returned with
+    up to three highlighted snippets each.
+    """
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not fts_query(q):
+        raise HTTPException(status_code=400, detail="Search query has no words")
+    total, hits = search_project(db, project_id, q, limit, offset)
+    return SearchResponse(query=q, total=total, limit=limit, offset=offset, hits=hits)
+
+
+@router.get("/papers/{paper_id}/similar", response_model=List[SimilarPaper])
+def similar_papers(
+    paper_id: str,
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    scope: Literal["project", "all"] = "project",
+    db: Session = Depends(get_db)
+):
+    """
+    Papers whose text is most similar to this one, from its project or from all projects.
+    Papers not embedded yet are indexed in the background; until then the response is a 202
+    with X-Index-Pending and leaves them out.
+    """
+    paper = db.query(Paper).filter(Paper.id == paper_id).first()
+    if not paper:
+        raise HTTPException(status_code=404, detail="Paper not found")
+    similar, pending = embedding_index.similar_papers(db, paper, paper.project_id if scope == "project" else None, limit)
+    _report_pending(response, pending)
+    return [
+        SimilarPaper(paper_id=p.id, project_id=p.project_id, title=p.title, status=p.status, score=round(score, 4))
+        for p, score in similar
+    ]
+
+
+@router.get("/projects/{project_id}/chunks", response_model=List[ChunkHit])
+def relevant_chunks(
+    project_id: str,
+    response: Response,
+    q: str = Query(..., min_length=1, description="Question or description of the passages wanted"),
+    limit: int = Query(10, ge=1, le=50),
+    paper_id: Optional[str] = Query(None, description="Only passages of this paper"),
+    db: Session = Depends(get_db)
+):
+    """
+    Passages of the project's papers most relevant to a question (semantic, not keyword, match).
+    Like /similar, a 202 with X-Index-Pending while some papers are still being indexed.
+    """
+    if not db.query(Project.id).filter(Project.id == project_id).first():
+        raise HTTPException(status_code=404, detail="Project not found")
+    hits, pending = embedding_index.relevant_chunks(db, project_id, q, limit, paper_id)
+    _report_pending(response, pending)
+    return [
+        ChunkHit(
+            paper_id=hit["paper"].id, title=hit["paper"].title, section=hit["section"],
+            start=hit["start"], end=hit["end"], text=hit["text"], score=round(hit["score"], 4)
+        )
+        for hit in hits
+    ]
+
+
+@router.post("/search/reindex")
+def reindex(db: Session = Depends(get_db)):
+    """Rebuild the full-text and embedding indexes from the stored papers and results"""
+    rebuild_index(db)
+    db.commit()
+    embedded = embedding_index.rebuild(db)
+    return {"status": "success", "embedded": embedded}
+
+
+@router.get("/search/stats")
+def search_stats():
+    """Embedding index: embedder in use, vector size and rows stored"""
+    return embedding_index.stats()
@@ -1,14 +1,102 @@
 import os
+from typing import Dict
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./data/scholarpilot.db"
     DATA_DIR: str = "./data"
+
+    # SQLite tuning applied on every connection (ignored for other databases)
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 10000
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    # Adds an X-Query-Count header to every response (development aid for spotting N+1 queries)
+    DEBUG_QUERY_COUNT: bool = False
     
     # Optional: External API Keys (can also be set in DB settings table)
     OPENAI_API_KEY: str | None = None
     ANTHROPIC_API_KEY: str | None = None
     GEMINI_API_KEY: str | None = None
+
+    # Analysis: max number of columns analyzed concurrently for one paper (1 = sequential)
+    ANALYSIS_COLUMN_CONCURRENCY: int = 4
+    # Merge fusable JSON tools (metadata, keywords, datasets, ...) into one LLM call per paper
+    ANALYSIS_FUSED_EXTRACTION: bool = True
+    # Analysis scheduler: papers processed at once across all projects
+    ANALYSIS_MAX_CONCURRENCY: int = 8
+    # Per-provider paper limits, e.g. '{"openai": 6, "claude": 3}' (JSON in env)
+    ANALYSIS_PROVIDER_CONCURRENCY: Dict[str, int] = {}
+    ANALYSIS_PROVIDER_DEFAULT_CONCURRENCY: int = 4
+    # Durable job queue: lease length, attempts before giving up, poll interval for recovery
+    JOB_LEASE_SECONDS: int = 120
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_POLL_INTERVAL: float = 15.0
+    # Cell/paper retries wait this long before running, so quick successive retries on one
+    # paper are merged into a single job
+    RETRY_COALESCE_SECONDS: float = 1.0
+    # Client-side rate limits per provider, e.g. '{"openai": 500}' (JSON in env); limits reported
+    # in response headers are learned automatically. Concurrency adapts (AIMD) between min and max.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_RPM: Dict[str, int] = {}
+    RATE_LIMIT_TPM: Dict[str, int] = {}
+    RATE_LIMIT_INITIAL_CONCURRENCY: int = 8
+    RATE_LIMIT_MIN_CONCURRENCY: int = 1
+    RATE_LIMIT_MAX_CONCURRENCY: int = 32
+    # Prompt budgets: multiplier on each tool's content_tokens (raise it for long-context models;
+    # the model's context window still caps it) and tokens reserved for instructions / system prompt
+    PROMPT_BUDGET_SCALE: float = 1.0
+    PROMPT_RESERVED_TOKENS: int = 1000
+    # Stream model output to progress subscribers (GET /projects/{id}/events) while a column runs;
+    # partial text is published at most once per PROGRESS_PARTIAL_INTERVAL seconds per column
+    ANALYSIS_STREAMING: bool = True
+    PROGRESS_PARTIAL_INTERVAL: float = 0.25
+    PROGRESS_HEARTBEAT_SECONDS: float = 15.0
+    # Event bus behind /projects/{id}/events: in-process unless EVENT_BUS_URL (redis://...) is set.
+    # Durable events kept per project for resuming clients, and per-subscriber queue size.
+    EVENT_BUS_URL: str | None = None
+    EVENT_BUS_BUFFER_SIZE: int = 1000
+    EVENT_BUS_QUEUE_SIZE: int = 1000
+
+    # Shared LLM HTTP clients (one pooled keep-alive client per provider)
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_TIMEOUT: float = 60.0
+    HTTP2_ENABLED: bool = True
+
+    # PDF parsing process pool (0 workers = parse in a thread; None = one per CPU)
+    PDF_PARSE_WORKERS: int | None = None
+    PDF_PARSE_TIMEOUT: float = 60.0
+    PDF_PARSE_MEMORY_MB: int = 1024
+    PDF_MAX_PAGES: int = 50
+    PDF_MAX_BYTES: int = 100 * 1024 * 1024
+    PDF_MAX_TEXT_CHARS: int = 2_000_000
+    # Batch upload: max PDFs per request (zip members included)
+    BATCH_UPLOAD_MAX_FILES: int = 500
+    # Provider batch APIs (POST /analyze/batch): status poll interval and max requests per provider batch
+    # (larger runs, and runs over the provider's file size limit, are split into several batches).
+    # BATCH_FAKE_SERVER routes batch calls to an in-process fake provider for offline testing.
+    BATCH_POLL_INTERVAL: float = 60.0
+    BATCH_MAX_REQUESTS: int = 50000
+    BATCH_FAKE_SERVER: bool = False
+
+    # Embedding index (similar papers, passage retrieval) stored under DATA_DIR/embeddings: a local
+    # sentence-transformers model run on CPU when EMBEDDING_MODEL is set (e.g. "all-MiniLM-L6-v2"),
+    # otherwise deterministic feature hashing of words and word pairs (no model download)
+    EMBEDDING_MODEL: str | None = None
+    EMBEDDING_HASH_DIM: int = 512
+    EMBEDDING_CHUNK_CHARS: int = 1500
+    EMBEDDING_CHUNK_OVERLAP: int = 200
+
+    # LLM response cache (SQLite file under DATA_DIR unless LLM_CACHE_PATH is set)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: str | None = None
+    LLM_CACHE_TTL_SECONDS: int = 30 * 24 * 3600
+    LLM_CACHE_MAX_ENTRIES: int = 50000
+    LLM_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
     
     class Config:
         env_file = ".env"
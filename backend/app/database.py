@@ -1,4 +1,7 @@
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -10,10 +13,64 @@ engine = create_engine(
     settings.DATABASE_URL, connect_args=connect_args
 )
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        """
+        WAL lets readers run alongside the (single) writer; NORMAL sync is safe under WAL.
+        busy_timeout makes writers wait for the lock instead of failing with "database is locked".
+        """
+        cursor = dbapi_connection.cursor()
+        if settings.SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        # Negative cache_size is in KiB
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+# Statements executed in the current context while count_queries() is active
+_query_log: ContextVar[Optional[List[str]]] = ContextVar("query_log", default=None)
+
+@event.listens_for(engine, "before_cursor_execute")
+def _log_query(conn, cursor, statement, parameters, context, executemany):
+    log = _query_log.get()
+    if log is not None:
+        log.append(statement)
+
+@contextmanager
+def count_queries():
+    """
+    Collect the SQL statements issued inside the block (per request/task context), e.g.
+        with count_queries() as queries: ...
+        assert len(queries) <= 3
+    """
+    log: List[str] = []
+    token = _query_log.set(log)
+    try:
+        yield log
+    finally:
+        _query_log.reset(token)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def run_migrations():
+    """Bring an existing database up to the latest Alembic revision (alembic/versions)"""
+    import os
+    from alembic import command
+    from alembic.config import Config
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config = Config(os.path.join(backend_dir, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(backend_dir, "alembic"))
+    # Keep the app's logging configuration
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, "head")
+
 def get_db():
     db = SessionLocal()
     try:
@@ -1,12 +1,41 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import api_router
-from app.database import engine, Base
+from app.api.analysis import process_paper_task
+from app.adapters.model_adapter import http_clients, MODEL_ADAPTERS
+from app.config import settings
+from app.database import engine, Base, count_queries, run_migrations
+from app.services.job_queue import job_queue_worker
+from app.parsers.pdf_parser import shutdown_parse_executor
+from app.services.result_writer import result_writer
+from app.services.batch_runner import batch_runner
+from app.services.event_bus import event_bus
 
-# Create tables
+# Create tables, then apply migrations for databases created by older versions
 Base.metadata.create_all(bind=engine)
+run_migrations()
 
-app = FastAPI(title="ScholarPilot API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled keep-alive clients shared by every model adapter
+    http_clients.open(MODEL_ADAPTERS.keys())
+    # Change events for live clients (in-process, or Redis when EVENT_BUS_URL is set)
+    await event_bus.start()
+    await result_writer.start()
+    # Recovers jobs whose lease expired (e.g. after a restart) and starts the scheduler
+    await job_queue_worker.start(process_paper_task)
+    # Submits and polls provider batch runs (resumes runs left over from before a restart)
+    await batch_runner.start()
+    yield
+    await batch_runner.stop()
+    await job_queue_worker.stop()
+    await result_writer.stop()
+    await event_bus.stop()
+    await http_clients.aclose()
+    shutdown_parse_executor()
+
+app = FastAPI(title="ScholarPilot API", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -15,8 +44,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paging/caching headers of the paper listing and the embedding indexer's backlog, readable by the browser app
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count", "X-Index-Pending"],
 )
 
+if settings.DEBUG_QUERY_COUNT:
+    @app.middleware("http")
+    async def query_count_header(request: Request, call_next):
+        with count_queries() as queries:
+            response = await call_next(request)
+        response.headers["X-Query-Count"] = str(len(queries))
+        return response
+
 app.include_router(api_router, prefix="/api")
 
 @app.get("/health")
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, DateTime, Text, Integer
+from datetime import datetime
+import uuid
+from app.database import Base
+
+class BatchRun(Base):
+    """A bulk analysis run executed through a provider batch API"""
+    __tablename__ = "batch_runs"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = Column(String, nullable=True)
+    provider = Column(String, nullable=False)
+    model = Column(String, nullable=True)
+    status = Column(String, default="pending", index=True)  # pending, submitted, completed, failed
+    provider_batch_id = Column(String, nullable=True)  # comma-separated when the run was split into several batches
+    paper_ids = Column(Text, nullable=False)  # JSON list
+    request_count = Column(Integer, default=0)
+    succeeded_count = Column(Integer, default=0)
+    failed_count = Column(Integer, default=0)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    submitted_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, String, DateTime, Index, Integer, LargeBinary, Text
+from datetime import datetime
+from app.database import Base
+
+class PaperContent(Base):
+    """Extracted paper text, compressed and addressed by the sha256 of the text (shared by identical papers)"""
+    __tablename__ = "paper_contents"
+
+    hash = Column(String, primary_key=True)
+    encoding = Column(String, nullable=False, default="zlib")  # zlib
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # uncompressed UTF-8 bytes
+    compressed_size = Column(Integer, nullable=False)
+    # sha256 of the whitespace/Unicode-normalized text: near-identical extractions share one row
+    normalized_hash = Column(String, nullable=True, index=True)
+    # JSON list of {"name", "title", "start", "end"} from app.parsers.section_segmenter
+    sections = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ContentChunk(Base):
+    """
+    A passage of stored paper text (or, kind "paper", the whole text) and the row of its vector
+    in the embedding index file for one embedder (see app.services.embedding_index)
+    """
+    __tablename__ = "content_chunks"
+    __table_args__ = (
+        # Covering: a text's (or a project's texts') vector rows are read from the index alone
+        Index("ix_content_chunks_model_hash", "model", "content_hash", "kind", "row"),
+        Index("uq_content_chunks_model_row", "model", "row", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    model = Column(String, nullable=False)  # embedder id; vectors of different embedders don't compare
+    content_hash = Column(String, nullable=False)
+    kind = Column(String, nullable=False)  # paper, chunk
+    row = Column(Integer, nullable=False)  # row in the embedder's vector file
+    section = Column(String, nullable=True)
+    start = Column(Integer, nullable=False)  # character offsets into the text
+    end = Column(Integer, nullable=False)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Integer
+from datetime import datetime
+import uuid
+from app.database import Base
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    paper_id = Column(String, ForeignKey("papers.id", ondelete="CASCADE"), nullable=False, index=True)
+    project_id = Column(String, nullable=False)
+    # JSON list of column ids to (re)compute; NULL = all of the project's columns
+    column_ids = Column(Text, nullable=True)
+    priority = Column(Integer, default=10)
+    status = Column(String, default="queued", index=True)  # queued, running, done, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -6,6 +6,11 @@ from app.database import Base
 
 class Paper(Base):
     __tablename__ = "papers"
+    __table_args__ = (
+        Index("ix_papers_project_status", "project_id", "status"),
+        # Default listing order (and keyset pagination) within a project
+        Index("ix_papers_project_created", "project_id", "created_at", "id"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     project_id = Column(String, ForeignKey("projects.id"), nullable=False)
@@ -14,7 +19,10 @@ class Paper(Base):
     pdf_path = Column(String, nullable=True)
     source_url = Column(String, nullable=True)
     source_type = Column(String, nullable=True)  # pdf, arxiv, link, title
-    raw_content = Column(Text, nullable=True)
+    # Extracted text lives in paper_contents (see app.services.content_store)
+    content_hash = Column(String, nullable=True, index=True)
+    # sha256 of the uploaded PDF bytes: the same file added again (in any project) skips parsing
+    file_hash = Column(String, nullable=True, index=True)
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -6,6 +6,13 @@ from app.database import Base
 
 class Result(Base):
     __tablename__ = "results"
+    __table_args__ = (
+        # One result per cell; also the conflict target for result upserts
+        Index("uq_results_paper_column", "paper_id", "column_id", unique=True),
+        Index("ix_results_column_id", "column_id"),
+        # Lookup of identical analyses to copy (app.services.fingerprint.shared_results)
+        Index("ix_results_fingerprint", "fingerprint"),
+    )
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     paper_id = Column(String, ForeignKey("papers.id"), nullable=False)
@@ -13,6 +20,8 @@ class Result(Base):
     value = Column(Text, nullable=True)
     status = Column(String, default="pending")  # pending, processing, done, error, skipped
     error_message = Column(Text, nullable=True)
+    # Hash of the inputs that produced a done value (see app.services.fingerprint); NULL = unknown/stale
+    fingerprint = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -1,53 +1,202 @@
+import asyncio
 import fitz  # PyMuPDF
-from typing import Optional
-import io
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Set
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+def _init_worker(memory_limit_mb: int):
+    """Process pool initializer: cap the worker's address space so a hostile PDF can't exhaust RAM"""
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+def _new_worker() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=1,
+        initializer=_init_worker,
+        initargs=(settings.PDF_PARSE_MEMORY_MB,)
+    )
+
+
+def _kill_worker(worker: ProcessPoolExecutor):
+    # A timed-out parse keeps its process busy; terminate it rather than wait
+    for process in list(getattr(worker, "_processes", {}).values()):
+        process.terminate()
+    worker.shutdown(wait=False, cancel_futures=True)
+
+
+class ParsePool:
+    """
+    Fixed set of single-process workers for PDF parsing. A parse first waits for an idle
+    worker, so its timeout covers only the parse itself; a worker that overruns (or dies)
+    is killed and replaced without disturbing the parses running on the others.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: List[ProcessPoolExecutor] = [_new_worker() for _ in range(size)]
+        self._busy: Set[ProcessPoolExecutor] = set()
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def run(self, timeout: float, func, *args):
+        cond = self._condition()
+        async with cond:
+            while not self._idle:
+                await cond.wait()
+            worker = self._idle.pop()
+            self._busy.add(worker)
+
+        healthy = False
+        try:
+            future = asyncio.get_running_loop().run_in_executor(worker, func, *args)
+            result = await asyncio.wait_for(future, timeout=timeout)
+            healthy = True
+            return result
+        except asyncio.TimeoutError:
+            raise Exception(f"timed out after {timeout:.0f}s")
+        except BrokenProcessPool:
+            raise Exception("parser process died (out of memory?)")
+        except Exception:
+            # The parse raised inside the worker; the process itself is fine
+            healthy = True
+            raise
+        finally:
+            # Timed out, cancelled or crashed: the process may still be busy, so replace it
+            self._busy.discard(worker)
+            if not healthy:
+                _kill_worker(worker)
+                worker = _new_worker()
+            async with cond:
+                self._idle.append(worker)
+                cond.notify()
+
+    def shutdown(self, kill: bool = False):
+        for worker in self._idle + list(self._busy):
+            if kill:
+                _kill_worker(worker)
+            else:
+                worker.shutdown(wait=True, cancel_futures=True)
+        self._idle = []
+        self._busy = set()
+
+
+_pool: Optional[ParsePool] = None
+
+
+def parse_concurrency() -> int:
+    """How many PDFs can be parsed at once"""
+    if settings.PDF_PARSE_WORKERS == 0:
+        return os.cpu_count() or 1
+    return settings.PDF_PARSE_WORKERS or os.cpu_count() or 1
+
+
+def get_parse_pool() -> Optional[ParsePool]:
+    """Shared worker pool for PDF parsing (None when PDF_PARSE_WORKERS=0: parse in a thread)"""
+    global _pool
+    if settings.PDF_PARSE_WORKERS == 0:
+        return None
+    if _pool is None:
+        _pool = ParsePool(parse_concurrency())
+    return _pool
+
+
+def shutdown_parse_executor(kill: bool = False):
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(kill=kill)
+
+
+def _clean_text(text: str) -> str:
+    """Clean extracted text"""
+    # Remove excessive whitespace
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r' {2,}', ' ', text)
+
+    # Remove page numbers (common patterns)
+    text = re.sub(r'\n\d+\n', '\n', text)
+
+    return text.strip()
+
+
+def _extract_text(pdf_data: bytes, max_pages: int, max_chars: int) -> str:
+    """Runs inside a pool worker: open the PDF, extract up to max_pages of text and clean it"""
+    # fitz.open expects bytes or filename. For bytes, use stream.
+    doc = fitz.open(stream=pdf_data, filetype="pdf")
+    try:
+        text_parts = []
+        total = 0
+        pages_to_process = min(len(doc), max_pages)
+
+        for page_num in range(pages_to_process):
+            text = doc[page_num].get_text()
+            text_parts.append(text)
+            total += len(text)
+            if max_chars and total >= max_chars:
+                break
+    finally:
+        doc.close()
+
+    full_text = "\n\n".join(text_parts)
+    if max_chars:
+        full_text = full_text[:max_chars]
+
+    # Basic cleaning
+    return _clean_text(full_text)
+
+
+def _count_pages(pdf_data: bytes) -> int:
+    doc = fitz.open(stream=pdf_data, filetype="pdf")
+    count = len(doc)
+    doc.close()
+    return count
+
 
 class PDFParser:
-    def __init__(self, max_pages: int = 50):
-        self.max_pages = max_pages
-    
+    def __init__(self, max_pages: Optional[int] = None, timeout: Optional[float] = None):
+        self.max_pages = max_pages or settings.PDF_MAX_PAGES
+        self.timeout = timeout or settings.PDF_PARSE_TIMEOUT
+
+    async def _run(self, func, *args):
+        """Run a parsing function off the event loop, bounded by the per-document timeout"""
+        pool = get_parse_pool()
+        if pool is not None:
+            return await pool.run(self.timeout, func, *args)
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(func, *args), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise Exception(f"timed out after {self.timeout:.0f}s")
+
     async def parse(self, pdf_data: bytes) -> str:
-        """Parse PDF and extract text content"""
+        """Parse PDF and extract text content (in the parse process pool)"""
         try:
-            # fitz.open expects bytes or filename. For bytes, use stream.
-            doc = fitz.open(stream=pdf_data, filetype="pdf")
-            
-            text_parts = []
-            pages_to_process = min(len(doc), self.max_pages)
-            
-            for page_num in range(pages_to_process):
-                page = doc[page_num]
-                text = page.get_text()
-                text_parts.append(text)
-            
-            doc.close()
-            
-            full_text = "\n\n".join(text_parts)
-            
-            # Basic cleaning
-            full_text = self._clean_text(full_text)
-            
-            return full_text
-            
+            if settings.PDF_MAX_BYTES and len(pdf_data) > settings.PDF_MAX_BYTES:
+                raise ValueError(f"file is larger than {settings.PDF_MAX_BYTES // (1024 * 1024)} MB")
+            return await self._run(_extract_text, pdf_data, self.max_pages, settings.PDF_MAX_TEXT_CHARS)
         except Exception as e:
             raise Exception(f"PDF parsing failed: {str(e)}")
-    
+
     def _clean_text(self, text: str) -> str:
         """Clean extracted text"""
-        import re
-        
-        # Remove excessive whitespace
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        text = re.sub(r' {2,}', ' ', text)
-        
-        # Remove page numbers (common patterns)
-        text = re.sub(r'\n\d+\n', '\n', text)
-        
-        return text.strip()
-    
+        return _clean_text(text)
+
     async def get_page_count(self, pdf_data: bytes) -> int:
         """Get total page count of PDF"""
-        doc = fitz.open(stream=pdf_data, filetype="pdf")
-        count = len(doc)
-        doc.close()
-        return count
+        return await self._run(_count_pages, pdf_data)
@@ -0,0 +1,106 @@
+import re
+from typing import Dict, List, Optional
+
+# Canonical section names, matched against heading text (first match wins)
+SECTION_PATTERNS = [
+    ("abstract", r"^abstract\b"),
+    ("related_work", r"\b(related work|prior work|previous work|literature review|related literature)\b"),
+    ("background", r"^(background|preliminaries|preliminary)\b"),
+    ("introduction", r"^(introduction|motivation)\b"),
+    ("limitations", r"\b(limitations?|threats to validity|validity threats|broader impact)\b"),
+    ("results", r"^(results?|main results|experimental results|findings|ablation)\b|\bablation stud"),
+    ("experiments", r"\b(experiments?|experimental (setup|settings?|design)|evaluation|empirical study|case study|benchmarks?)\b"),
+    ("method", r"\b(method|methods|methodology|approach|proposed|our model|model architecture|framework|system design|system overview|architecture|implementation|algorithm)\b"),
+    ("discussion", r"^discussion\b"),
+    ("conclusion", r"\b(conclusions?|concluding remarks|summary and future work|future work)\b"),
+    ("references", r"^(references|bibliography|works cited)$"),
+    ("appendix", r"^(appendix|appendices|supplementary material)\b"),
+]
+SECTION_NAMES = ["front"] + [name for name, _ in SECTION_PATTERNS]
+
+_COMPILED = [(name, re.compile(pattern, re.IGNORECASE)) for name, pattern in SECTION_PATTERNS]
+
+# Optional numbering: "3", "3.", "3.1", "III.", "A." followed by the heading title
+_HEADING = re.compile(r"^(?P<number>(?:\d+(?:\.\d+)*|[IVXLC]+|[A-H])[.)]?\s+)?(?P<title>[A-Z][A-Za-z0-9 ,&:/\-]{2,60}?)\s*:?$")
+# "Abstract—We propose ..." / "Abstract. We ..." run into the first paragraph
+_INLINE_ABSTRACT = re.compile(r"^abstract\s*[.:—–-]\s*\S", re.IGNORECASE)
+
+MAX_HEADING_WORDS = 7
+# Unnumbered headings must be Title Case (or this short) to tell them apart from wrapped body lines
+MAX_PLAIN_HEADING_WORDS = 3
+SMALL_WORDS = {"a", "an", "and", "as", "at", "for", "in", "of", "on", "or", "the", "to", "with", "vs"}
+
+
+def classify_heading(line: str) -> Optional[str]:
+    """Canonical section name for a heading line, or None if the line is not a recognised heading"""
+    line = line.strip()
+    if _INLINE_ABSTRACT.match(line):
+        return "abstract"
+    match = _HEADING.match(line)
+    if not match:
+        return None
+    title = match.group("title").strip()
+    words = title.split()
+    if len(words) > MAX_HEADING_WORDS:
+        return None
+    if not match.group("number") and len(words) > MAX_PLAIN_HEADING_WORDS:
+        if not all(w[0].isupper() or w.lower() in SMALL_WORDS for w in words):
+            return None
+    for name, pattern in _COMPILED:
+        if pattern.search(title):
+            return name
+    return None
+
+
+def segment_sections(text: str) -> List[Dict]:
+    """
+    Split extracted paper text into sections by detecting heading lines.
+    Returns [{"name", "title", "start", "end"}] with character offsets into text, in document order;
+    text before the first heading is "front" (title, authors, affiliations).
+    """
+    sections: List[Dict] = []
+    current = {"name": "front", "title": "", "start": 0}
+    in_references = False
+    offset = 0
+
+    for line in text.splitlines(keepends=True):
+        name = classify_heading(line)
+        # Reference entries look like headings; after the references only an appendix starts a section
+        if name and (not in_references or name == "appendix") and name != current["name"]:
+            if offset > current["start"]:
+                sections.append({**current, "end": offset})
+            current = {"name": name, "title": line.strip(), "start": offset}
+            in_references = name == "references"
+        offset += len(line)
+
+    if offset > current["start"]:
+        sections.append({**current, "end": offset})
+    return sections
+
+
+def select_sections(text: str, sections: Optional[List[Dict]], wanted: List[str], limit: int) -> Optional[str]:
+    """
+    Build prompt content from the wanted sections (in priority order) within limit characters.
+    Every found section first gets an equal share of the budget; leftover budget goes to the
+    wanted sections in priority order. Output keeps document order.
+    Returns None when none of the wanted sections were found (callers fall back to a prefix).
+    """
+    if not sections or not wanted:
+        return None
+    spans = [s for s in sections if s["name"] in wanted]
+    if not spans:
+        return None
+
+    spans.sort(key=lambda s: (wanted.index(s["name"]), s["start"]))
+    share = limit // len(spans)
+    sizes = [min(s["end"] - s["start"], share) for s in spans]
+    left = limit - sum(sizes)
+    for i, span in enumerate(spans):
+        if left <= 0:
+            break
+        extra = min(span["end"] - span["start"] - sizes[i], left)
+        sizes[i] += extra
+        left -= extra
+
+    parts = sorted(zip(spans, sizes), key=lambda item: item[0]["start"])
+    return "\n\n".join(text[span["start"]:span["start"] + size].strip() for span, size in parts if size > 0)
@@ -1,10 +1,38 @@
-from pydantic import BaseModel
-from typing import Optional, List
+import json
+from pydantic import BaseModel, field_validator
+from typing import Literal, Optional, List
+from datetime import datetime
 
 class AnalysisRequest(BaseModel):
     project_id: Optional[str] = None
     paper_ids: Optional[List[str]] = None
     column_ids: Optional[List[str]] = None # If null, analyze all columns
+    # queued: queued papers (or paper_ids); stale: only missing/outdated cells of the project
+    mode: Literal["queued", "stale"] = "queued"
 
 class RetryRequest(BaseModel):
     pass
+
+class BatchRunResponse(BaseModel):
+    id: str
+    project_id: Optional[str] = None
+    provider: str
+    model: Optional[str] = None
+    status: str
+    provider_batch_id: Optional[str] = None
+    paper_ids: List[str] = []
+    request_count: int = 0
+    succeeded_count: int = 0
+    failed_count: int = 0
+    error_message: Optional[str] = None
+    created_at: datetime
+    submitted_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    @field_validator('paper_ids', mode='before')
+    @classmethod
+    def parse_paper_ids(cls, v):
+        return json.loads(v) if isinstance(v, str) else v
+
+    class Config:
+        from_attributes = True
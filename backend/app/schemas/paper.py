@@ -31,6 +31,19 @@ class PaperUpdate(BaseModel):
     title: Optional[str] = None
     status: Optional[str] = None
 
+class BatchUploadItem(BaseModel):
+    filename: str
+    status: str  # queued, error, skipped
+    paper_id: Optional[str] = None
+    error_message: Optional[str] = None
+
+class BatchUploadResponse(BaseModel):
+    created: int
+    failed: int
+    skipped: int
+    enqueued: int = 0
+    items: List[BatchUploadItem]
+
 class PaperResponse(PaperBase):
     id: str
     project_id: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from typing import Optional, List
 from datetime import datetime
 from app.schemas.column import ColumnResponse
@@ -8,11 +8,20 @@ class ProjectBase(BaseModel):
     template: Optional[str] = None
 
 class ProjectCreate(ProjectBase):
-    pass
+    llm_cache_enabled: bool = True
 
 class ProjectUpdate(BaseModel):
     name: Optional[str] = None
     template: Optional[str] = None
+    # Omitted = unchanged (updates apply exclude_unset); an explicit null is rejected
+    llm_cache_enabled: Optional[bool] = None
+
+    @field_validator('llm_cache_enabled')
+    @classmethod
+    def reject_null(cls, v):
+        if v is None:
+            raise ValueError("llm_cache_enabled must be true or false")
+        return v
 
 class ProjectResponse(ProjectBase):
     id: str
@@ -20,6 +29,7 @@ class ProjectResponse(ProjectBase):
     updated_at: datetime
     # paper_count and status_summary will be computed fields or separate queries usually
     paper_count: Optional[int] = 0
+    llm_cache_enabled: bool = True
     
     class Config:
         from_attributes = True
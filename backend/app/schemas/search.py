@@ -0,0 +1,38 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+class SearchMatch(BaseModel):
+    kind: str  # title, result, section
+    column_id: Optional[str] = None  # kind == result
+    section: Optional[str] = None  # kind == section (front, abstract, method, ...)
+    snippet: str  # HTML-escaped text, matched terms wrapped in <mark></mark>
+
+class SearchHit(BaseModel):
+    paper_id: str
+    title: Optional[str] = None
+    status: str
+    score: float  # higher is more relevant
+    matches: List[SearchMatch] = []
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    limit: int
+    offset: int
+    hits: List[SearchHit]
+
+class SimilarPaper(BaseModel):
+    paper_id: str
+    project_id: str
+    title: Optional[str] = None
+    status: str
+    score: float  # cosine similarity of the papers' text embeddings
+
+class ChunkHit(BaseModel):
+    paper_id: str
+    title: Optional[str] = None
+    section: Optional[str] = None
+    start: int  # character offsets into the paper text
+    end: int
+    text: str
+    score: float  # cosine similarity to the question
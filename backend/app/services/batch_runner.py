@@ -0,0 +1,330 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.adapters.batch_api import (
+    BatchPending, BatchResult, ReplayAdapter, batch_request_files, batch_requests_path, get_batch_client
+)
+from app.adapters.model_adapter import MODEL_ADAPTERS, BaseModelAdapter
+from app.agents.orchestrator import run_tool
+from app.config import settings
+from app.database import SessionLocal
+from app.models.batch import BatchRun
+from app.models.column import ColumnDef
+from app.models.paper import Paper
+from app.models.project import Project
+from app.services.content_store import load_document
+from app.services.embedding_index import load_tool_sections
+from app.services.event_bus import event_bus
+from app.services.fingerprint import column_fingerprints
+from app.services.result_writer import build_result_rows, result_writer
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("pending", "submitted")
+
+# Papers written to the result writer at once (one writer transaction)
+WRITE_CHUNK = 50
+# Room left under a provider's file size limit for the upload's multipart / JSON wrapper
+FILE_HEADROOM_BYTES = 64 * 1024
+
+
+class RequestTooLarge(ValueError):
+    """A single request exceeds the provider's batch file limit (no split can help)"""
+
+
+class RequestFiles:
+    """
+    Writes a run's batch request lines, starting a new file (one provider batch each) before
+    a file would exceed max_bytes or max_requests
+    """
+
+    def __init__(self, run_id: str, max_bytes: int, max_requests: int):
+        self.run_id = run_id
+        self.max_bytes = max_bytes
+        self.max_requests = max_requests
+        self.paths: List[str] = []
+        self._file: Optional[BinaryIO] = None
+        self._bytes = 0
+        self._requests = 0
+
+    def write(self, line: bytes):
+        if len(line) > self.max_bytes:
+            raise RequestTooLarge(f"A batch request is larger than the provider's {self.max_bytes // (1024 * 1024)} MB file limit")
+        if self._file is None or self._bytes + len(line) > self.max_bytes or self._requests >= self.max_requests:
+            self.close()
+            self.paths.append(batch_requests_path(self.run_id, len(self.paths)))
+            self._file = open(self.paths[-1], "wb")
+            self._bytes = self._requests = 0
+        self._file.write(line)
+        self._bytes += len(line)
+        self._requests += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def remove_request_files(run_id: str):
+    for path in batch_request_files(run_id):
+        os.remove(path)
+
+
+def create_batch_run(db: Session, papers: List[Paper], provider: str, model: str, project_id: Optional[str] = None) -> BatchRun:
+    """Record a batch run for papers and mark them processing (caller commits)"""
+    run = BatchRun(
+        project_id=project_id,
+        provider=provider,
+        model=model,
+        status="pending",
+        paper_ids=json.dumps([paper.id for paper in papers])
+    )
+    db.add(run)
+    for paper in papers:
+        paper.status = "processing"
+        paper.error_message = None
+    return run
+
+
+class BatchRunner:
+    """
+    Drives batch runs through their lifecycle (state lives in batch_runs, so runs survive restarts):
+    pending   -> run every (paper, column) tool against a ReplayAdapter to capture prompts,
+                 write them as provider batch requests and submit -> submitted
+    submitted -> poll the provider; when the batch ends, replay the tools with the batch
+                 responses (same parsing as interactive runs) and write the results -> completed
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    async def start(self):
+        if self._task:
+            return
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._loop(), name="batch-runner")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def poke(self):
+        """Process runs now instead of waiting for the next poll"""
+        if self._wake:
+            self._wake.set()
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.step_all()
+            except Exception as e:
+                logger.error(f"Batch runner step failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    async def step_all(self):
+        db = SessionLocal()
+        try:
+            run_ids = [r.id for r in db.query(BatchRun.id).filter(BatchRun.status.in_(ACTIVE_STATUSES)).order_by(BatchRun.created_at)]
+        finally:
+            db.close()
+        for run_id in run_ids:
+            await self.step(run_id)
+
+    async def step(self, run_id: str):
+        db = SessionLocal()
+        try:
+            run = db.query(BatchRun).filter(BatchRun.id == run_id).first()
+            if not run or run.status not in ACTIVE_STATUSES:
+                return
+            try:
+                adapter = self._adapter(db, run)
+                if run.status == "pending":
+                    await self._submit(db, run, adapter)
+                else:
+                    await self._poll(db, run, adapter)
+            except Exception as e:
+                logger.error(f"Batch run {run_id} failed: {e}")
+                db.rollback()
+                self._fail(db, run, str(e))
+        finally:
+            db.close()
+
+    def _adapter(self, db: Session, run: BatchRun) -> BaseModelAdapter:
+        from app.api.analysis import get_api_key
+        api_key = get_api_key(db)
+        if not api_key:
+            raise ValueError("API Key not found in settings. Please configure settings first.")
+        adapter = MODEL_ADAPTERS[run.provider](api_key)
+        # Prompts were keyed with the model at submission time
+        if run.model:
+            adapter.model = run.model
+        return adapter
+
+    async def _load_papers(self, db: Session, paper_ids: List[str]) -> Dict[str, Tuple[str, List[ColumnDef], Optional[str], List[dict], Optional[str]]]:
+        """paper_id -> (project_id, columns, text, sections, content_hash); text is None when the paper has no content"""
+        papers = db.query(Paper.id, Paper.project_id, Paper.content_hash).filter(Paper.id.in_(paper_ids)).all()
+        columns: Dict[str, List[ColumnDef]] = {}
+        for project_id in {p.project_id for p in papers}:
+            columns[project_id] = db.query(ColumnDef).filter(ColumnDef.project_id == project_id).all()
+        loaded = {}
+        for paper in papers:
+            text, sections = load_document(db, paper.content_hash)
+            if text is not None:
+                # Embedding is CPU work (and may load a model); own session in the worker thread
+                sections = await asyncio.to_thread(
+                    load_tool_sections, paper.content_hash, sections, [c.tool_name for c in columns[paper.project_id]]
+                )
+            loaded[paper.id] = (paper.project_id, columns[paper.project_id], text, sections, paper.content_hash)
+        return loaded
+
+    def _chunks(self, run: BatchRun) -> List[List[str]]:
+        paper_ids = json.loads(run.paper_ids)
+        return [paper_ids[i:i + WRITE_CHUNK] for i in range(0, len(paper_ids), WRITE_CHUNK)]
+
+    async def _submit(self, db: Session, run: BatchRun, adapter: BaseModelAdapter):
+        client = get_batch_client(adapter)
+        # Leftovers of an earlier attempt
+        remove_request_files(run.id)
+        files = RequestFiles(run.id, client.max_file_bytes - FILE_HEADROOM_BYTES, settings.BATCH_MAX_REQUESTS)
+        keys = set()
+
+        def on_request(key: str, prompt: str, system_prompt: Optional[str]):
+            if key not in keys:
+                keys.add(key)
+                line = json.dumps(client.request_line(key, prompt, system_prompt), ensure_ascii=False) + "\n"
+                files.write(line.encode("utf-8"))
+
+        try:
+            replay = ReplayAdapter(adapter, on_request=on_request)
+            for chunk in self._chunks(run):
+                for _, columns, text, sections, _ in (await self._load_papers(db, chunk)).values():
+                    if not text:
+                        continue
+                    for column in columns:
+                        try:
+                            await run_tool(replay, column.tool_name, text, column.custom_prompt, sections)
+                        except RequestTooLarge:
+                            raise
+                        except Exception:
+                            # BatchPending: prompt captured. Anything else fails again (and is recorded) on replay.
+                            pass
+                # Prompt building is CPU work; let other tasks run between chunks
+                await asyncio.sleep(0)
+        finally:
+            files.close()
+
+        run.request_count = len(keys)
+        if not keys:
+            # Nothing needs the model (e.g. no columns); finish straight away
+            await self._apply(db, run, adapter, {})
+            return
+        # One provider batch per request file
+        batch_ids = [await client.submit(path) for path in files.paths]
+        run.provider_batch_id = ",".join(batch_ids)
+        run.status = "submitted"
+        run.submitted_at = datetime.utcnow()
+        db.commit()
+        logger.info(f"Batch run {run.id}: submitted {len(keys)} requests as {run.provider_batch_id}")
+
+    async def _poll(self, db: Session, run: BatchRun, adapter: BaseModelAdapter):
+        client = get_batch_client(adapter)
+        statuses = [await client.status(batch_id) for batch_id in run.provider_batch_id.split(",")]
+        for batch_id, status in zip(run.provider_batch_id.split(","), statuses):
+            if status.state == "failed":
+                raise ValueError(f"Provider batch {batch_id} failed: {status.detail}")
+        if all(status.state == "ended" for status in statuses):
+            results: Dict[str, BatchResult] = {}
+            for status in statuses:
+                results.update(await client.results(status))
+            await self._apply(db, run, adapter, results)
+
+    async def _apply(self, db: Session, run: BatchRun, adapter: BaseModelAdapter, results: Dict[str, BatchResult]):
+        """Replay every paper's tools against the batch responses and write the results"""
+        replay = ReplayAdapter(adapter, results=results)
+        succeeded = sum(1 for r in results.values() if r.error is None)
+
+        for chunk in self._chunks(run):
+            writes, events = [], []
+            for paper_id, (project_id, columns, text, sections, content_hash) in (await self._load_papers(db, chunk)).items():
+                if not text:
+                    paper_fields = {
+                        "status": "error",
+                        "error_message": "Paper has no content to analyze. Please re-upload the PDF."
+                    }
+                    writes.append(result_writer.write(paper_id, {}, paper_fields))
+                    events.append((project_id, {"type": "paper", "paper_id": paper_id, **paper_fields}))
+                    continue
+                results_map = {}
+                for column in columns:
+                    try:
+                        value = await run_tool(replay, column.tool_name, text, column.custom_prompt, sections)
+                        results_map[column.id] = {"status": "done", "value": value, "error_message": None}
+                    except BatchPending:
+                        # Content or prompts changed after submission
+                        results_map[column.id] = {"status": "error", "value": None, "error_message": "No batch response for this cell; re-run the analysis"}
+                    except Exception as e:
+                        results_map[column.id] = {"status": "error", "value": None, "error_message": str(e)}
+                fingerprints = column_fingerprints(columns, adapter.model, content_hash)
+                result_rows, paper_fields = build_result_rows(columns, results_map, fingerprints)
+                writes.append(result_writer.write(paper_id, result_rows, paper_fields))
+                events.append((project_id, {"type": "paper", "paper_id": paper_id, **paper_fields}))
+            # One writer transaction per chunk
+            await asyncio.gather(*writes)
+            for project_id, event in events:
+                event_bus.publish(project_id, event)
+
+        await self._fill_cache(db, run, results)
+        run.status = "completed"
+        run.succeeded_count = succeeded
+        run.failed_count = len(results) - succeeded
+        run.completed_at = datetime.utcnow()
+        db.commit()
+        remove_request_files(run.id)
+        logger.info(f"Batch run {run.id}: completed ({succeeded}/{len(results)} requests succeeded)")
+
+    async def _fill_cache(self, db: Session, run: BatchRun, results: Dict[str, BatchResult]):
+        """Batch request ids are response cache keys; later interactive runs of the same prompts hit the cache"""
+        if not settings.LLM_CACHE_ENABLED or not run.project_id:
+            return
+        project = db.query(Project).filter(Project.id == run.project_id).first()
+        if not project or not project.llm_cache_enabled:
+            return
+        from app.adapters.response_cache import get_response_cache
+        cache = get_response_cache()
+        provider, model = run.provider, run.model or ""
+
+        def fill():
+            for key, result in results.items():
+                if result.error is None and result.text is not None:
+                    cache.set(key, result.text, provider, model)
+        # The cache blocks on its own SQLite file
+        await asyncio.to_thread(fill)
+
+    def _fail(self, db: Session, run: BatchRun, error: str):
+        run.status = "failed"
+        run.error_message = error
+        run.completed_at = datetime.utcnow()
+        papers = db.query(Paper.id, Paper.project_id).filter(
+            Paper.id.in_(json.loads(run.paper_ids)),
+            Paper.status == "processing"
+        ).all()
+        paper_fields = {"status": "error", "error_message": f"Batch analysis failed: {error}"}
+        db.query(Paper).filter(Paper.id.in_([p.id for p in papers])).update(paper_fields, synchronize_session=False)
+        db.commit()
+        for paper in papers:
+            event_bus.publish(paper.project_id, {"type": "paper", "paper_id": paper.id, **paper_fields})
+
+
+batch_runner = BatchRunner(poll_interval=settings.BATCH_POLL_INTERVAL)
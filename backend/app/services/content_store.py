@@ -0,0 +1,133 @@
+import hashlib
+import json
+import unicodedata
+import zlib
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.content import PaperContent
+from app.models.paper import Paper
+from app.parsers.section_segmenter import segment_sections
+from app.services.embedding_index import embedding_index
+from app.services.search_index import index_content, unindex_content
+
+COMPRESSION_LEVEL = 6
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def normalized_content_hash(text: str) -> str:
+    """Hash that ignores Unicode compatibility forms and whitespace layout (re-extracted copies of one paper)"""
+    normalized = " ".join(unicodedata.normalize("NFKC", text).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def file_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def known_file_contents(db: Session, file_hashes: List[str]) -> Dict[str, str]:
+    """file_hash -> content hash for files already parsed for some paper (in any project)"""
+    if not file_hashes:
+        return {}
+    return dict(
+        db.query(Paper.file_hash, Paper.content_hash).filter(
+            Paper.file_hash.in_(set(file_hashes)),
+            Paper.content_hash.isnot(None)
+        ).all()
+    )
+
+
+def decompress_text(data: bytes, encoding: str = "zlib") -> str:
+    if encoding != "zlib":
+        raise ValueError(f"Unknown content encoding: {encoding}")
+    return zlib.decompress(data).decode("utf-8")
+
+
+def store_content(db: Session, text: str) -> str:
+    """
+    Store paper text (compressed, deduplicated by hash) with its section offsets and return its hash.
+    Text that only differs from stored text in whitespace or Unicode forms maps to the stored row.
+    Runs immediately in the caller's transaction; the caller commits.
+    """
+    normalized_hash = normalized_content_hash(text)
+    existing = db.query(PaperContent.hash).filter(PaperContent.normalized_hash == normalized_hash).first()
+    if existing:
+        return existing.hash
+
+    key = content_hash(text)
+    raw = text.encode("utf-8")
+    data = zlib.compress(raw, COMPRESSION_LEVEL)
+    sections = segment_sections(text)
+    values = {
+        "hash": key, "encoding": "zlib", "data": data, "size": len(raw), "compressed_size": len(data),
+        "normalized_hash": normalized_hash, "sections": json.dumps(sections)
+    }
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        inserted = db.execute(insert(PaperContent).values(**values).on_conflict_do_nothing(index_elements=["hash"])).rowcount == 1
+    elif db.get(PaperContent, key) is None:
+        db.add(PaperContent(**values))
+        db.flush()
+        inserted = True
+    else:
+        inserted = False
+    # Full-text search over section text (the text is stored compressed, so not via triggers)
+    if inserted:
+        index_content(db, key, text, sections)
+    return key
+
+
+def load_content(db: Session, key: Optional[str]) -> Optional[str]:
+    """Load and decompress paper text by hash (None if missing)"""
+    if not key:
+        return None
+    row = db.query(PaperContent.data, PaperContent.encoding).filter(PaperContent.hash == key).first()
+    if not row:
+        return None
+    return decompress_text(row.data, row.encoding)
+
+
+def load_document(db: Session, key: Optional[str]) -> Tuple[Optional[str], List[Dict]]:
+    """
+    Load paper text and its sections by hash. Content stored before sections existed
+    is segmented on first load and the result saved (caller commits).
+    """
+    if not key:
+        return None, []
+    row = db.query(PaperContent).filter(PaperContent.hash == key).first()
+    if not row:
+        return None, []
+    text = decompress_text(row.data, row.encoding)
+    if row.sections is None:
+        sections = segment_sections(text)
+        row.sections = json.dumps(sections)
+        db.flush()
+    else:
+        sections = json.loads(row.sections)
+    return text, sections
+
+
+def release_content(db: Session, key: Optional[str]):
+    """Delete stored text no remaining paper references (call after the referencing papers are deleted/flushed)"""
+    if not key:
+        return
+    if not db.query(Paper.id).filter(Paper.content_hash == key).first():
+        db.query(PaperContent).filter(PaperContent.hash == key).delete(synchronize_session=False)
+        unindex_content(db, [key])
+        embedding_index.remove(db, [key])
+
+
+def prune_orphaned_content(db: Session) -> int:
+    """Delete all stored text that no paper references; returns the number of rows removed"""
+    referenced = db.query(Paper.content_hash).filter(Paper.content_hash.isnot(None))
+    orphaned = [row.hash for row in db.query(PaperContent.hash).filter(~PaperContent.hash.in_(referenced))]
+    unindex_content(db, orphaned)
+    embedding_index.remove(db, orphaned)
+    return db.query(PaperContent).filter(~PaperContent.hash.in_(referenced)).delete(synchronize_session=False)
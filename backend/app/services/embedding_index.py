@@ -0,0 +1,529 @@
+import logging
+import os
+import re
+import threading
+import zlib
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.content import ContentChunk, PaperContent
+from app.models.paper import Paper
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within the process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# The reference list matches every query that names a method; keep it out of the index
+SKIPPED_SECTIONS = {"references"}
+# Chunks handed to a tool whose own sections were not found (see tool_sections)
+TOOL_CHUNKS = 8
+# Candidate vectors scored per matrix product (bounds memory on large indexes)
+SCORE_BLOCK_ROWS = 65536
+
+_WORD = re.compile(r"[^\W_]{3,}")
+STOPWORDS = {
+    "the", "and", "for", "are", "was", "were", "with", "that", "this", "these", "those", "from", "which",
+    "our", "has", "have", "had", "not", "but", "can", "its", "their", "they", "than", "then", "such",
+    "also", "been", "into", "all", "any", "each", "more", "most", "other", "some", "use", "used", "using",
+    "via", "where", "when", "while", "both", "between", "over", "only", "may", "will", "would", "should",
+}
+
+
+@lru_cache(maxsize=1 << 18)
+def _word_hash(word: str) -> int:
+    return zlib.crc32(word.encode("utf-8"))
+
+
+class HashingEmbedder:
+    """
+    Deterministic embeddings without a model: words and adjacent word pairs are hashed into
+    dim signed buckets, counts are damped (log) and rows L2-normalized, so cosine similarity
+    approximates vocabulary overlap.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.id = f"hash-{dim}"
+
+    def _hashes(self, text: str) -> np.ndarray:
+        """32-bit hashes of the text's words and word pairs (pairs combined from the word hashes)"""
+        words = [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+        hashes = np.fromiter((_word_hash(w) for w in words), dtype=np.uint64, count=len(words))
+        pairs = (hashes[:-1] * 0x9E3779B1 + hashes[1:]) & 0xFFFFFFFF
+        pairs ^= pairs >> 16
+        return np.concatenate([hashes, pairs])
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            hashes = self._hashes(text)
+            if len(hashes):
+                signs = np.where(hashes >> 31, -1.0, 1.0)
+                vectors[i] = np.bincount(hashes % self.dim, weights=signs, minlength=self.dim)
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        return normalize(vectors)
+
+
+class LocalModelEmbedder:
+    """A sentence-transformers model run on the CPU (weights are downloaded once by the library)"""
+
+    def __init__(self, name: str):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise RuntimeError(
+                "EMBEDDING_MODEL is set but the 'sentence-transformers' package is not installed "
+                "(pip install sentence-transformers)"
+            )
+        self.model = SentenceTransformer(name, device="cpu")
+        self.dim = self.model.get_sentence_embedding_dimension()
+        self.id = f"{re.sub(r'[^A-Za-z0-9._-]+', '_', name)}-{self.dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = self.model.encode(texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return (vectors / np.where(norms == 0, 1.0, norms)).astype(np.float32)
+
+
+class VectorFile:
+    """
+    Append-only float32 matrix (one row per vector) in a file, read through a memory map that is
+    reopened when the file has grown. Appends hold an OS file lock, so several app processes
+    can share one file.
+    """
+
+    def __init__(self, path: str, dim: int):
+        self.path = path
+        self.dim = dim
+        self._row_bytes = dim * 4
+        self._map: Optional[np.memmap] = None
+        self._write_lock = threading.Lock()
+        self._map_lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @contextmanager
+    def locked(self):
+        """Serializes writers (threads and processes) for the duration of the block"""
+        with self._write_lock, open(self.path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def append(self, vectors: np.ndarray) -> int:
+        """Append rows (call inside locked()); returns the row number of the first one"""
+        with open(self.path, "ab") as f:
+            f.seek(0, os.SEEK_END)
+            # A torn write from a crashed process leaves a partial row; start after it
+            end = f.tell()
+            if end % self._row_bytes:
+                f.write(b"\0" * (self._row_bytes - end % self._row_bytes))
+            first = f.tell() // self._row_bytes
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        return first
+
+    @property
+    def rows(self) -> int:
+        return os.path.getsize(self.path) // self._row_bytes if os.path.exists(self.path) else 0
+
+    def matrix(self, min_rows: int = 0) -> np.ndarray:
+        """The memory-mapped vectors, remapped if they don't reach min_rows yet"""
+        with self._map_lock:
+            if self._map is None or len(self._map) < min_rows:
+                rows = self.rows
+                if rows:
+                    self._map = np.memmap(self.path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+                else:
+                    self._map = np.zeros((0, self.dim), dtype=np.float32)
+            return self._map
+
+    def close(self):
+        with self._map_lock:
+            self._map = None
+
+
+def top_k(vectors: VectorFile, rows: List[int], query: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    """Vectorized cosine top-k of the given rows against a normalized query: [(index into rows, score)]"""
+    if not rows or k <= 0:
+        return []
+    rows_array = np.asarray(rows, dtype=np.int64)
+    # Sorted rows read the memory map front to back
+    order = np.argsort(rows_array, kind="stable")
+    matrix = vectors.matrix(int(rows_array.max()) + 1)
+    scores = np.empty(len(rows_array), dtype=np.float32)
+    for start in range(0, len(order), SCORE_BLOCK_ROWS):
+        block = order[start:start + SCORE_BLOCK_ROWS]
+        scores[block] = matrix[rows_array[block]] @ query
+    if k < len(scores):
+        best = np.argpartition(-scores, k)[:k]
+    else:
+        best = np.arange(len(scores))
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return [(int(i), float(scores[i])) for i in best]
+
+
+def chunk_document(text: str, sections: List[Dict]) -> List[Dict]:
+    """
+    Split paper text into overlapping passages of about EMBEDDING_CHUNK_CHARS characters, within
+    sections (a passage never spans two) and ending at whitespace where possible.
+    Returns [{"section", "start", "end"}].
+    """
+    size = settings.EMBEDDING_CHUNK_CHARS
+    overlap = min(settings.EMBEDDING_CHUNK_OVERLAP, size // 2)
+    # A short section (title block, one-line heading) is joined to its neighbour; alone its
+    # passage would be too short to compare fairly with full-size ones
+    spans: List[List] = []
+    short: Optional[List] = None
+
+    def flush():
+        if short is not None:
+            if spans and spans[-1][2] == short[1]:
+                spans[-1][2] = short[2]
+            else:
+                spans.append(short)
+
+    for section in sections or [{"name": None, "start": 0, "end": len(text)}]:
+        if section["name"] in SKIPPED_SECTIONS:
+            flush()
+            short = None
+            continue
+        start = short[1] if short is not None else section["start"]
+        if section["end"] - start < size // 4:
+            short = [section["name"], start, section["end"]]
+            continue
+        spans.append([section["name"], start, section["end"]])
+        short = None
+    flush()
+
+    chunks = []
+    for name, start, end in spans:
+        while start < end:
+            stop = min(start + size, end)
+            # Don't leave a sliver for a last passage of its own
+            if end - stop < size // 4:
+                stop = end
+            if stop < end:
+                space = text.rfind(" ", start + size // 2, stop)
+                stop = space if space > 0 else stop
+            if text[start:stop].strip():
+                chunks.append({"section": name, "start": start, "end": stop})
+            if stop >= end:
+                break
+            start = max(stop - overlap, start + 1)
+    return chunks
+
+
+class EmbeddingIndex:
+    """
+    Vectors for stored paper text: one per passage, plus one per paper (the normalized mean of
+    its passages) for paper-to-paper similarity. Vectors are kept in a file per embedder under
+    DATA_DIR/embeddings; content_chunks rows map them back to text. Text is embedded once per
+    content hash, so papers shared across projects share vectors.
+    """
+
+    def __init__(self):
+        self._embedder = None
+        self._files: Dict[str, VectorFile] = {}
+        self._lock = threading.Lock()
+        # Texts waiting for the background indexer (see index_later)
+        self._pending: set = set()
+        self._pending_changed = threading.Condition()
+        self._indexer: Optional[threading.Thread] = None
+
+    @property
+    def embedder(self):
+        with self._lock:
+            if self._embedder is None:
+                if settings.EMBEDDING_MODEL:
+                    self._embedder = LocalModelEmbedder(settings.EMBEDDING_MODEL)
+                else:
+                    self._embedder = HashingEmbedder(settings.EMBEDDING_HASH_DIM)
+            return self._embedder
+
+    @property
+    def retrieval_id(self) -> str:
+        """
+        Embedder and chunking settings that decide which passages a retrieval_query finds, read
+        from the config so it needs no model load (part of result fingerprints)
+        """
+        model = settings.EMBEDDING_MODEL or f"hash-{settings.EMBEDDING_HASH_DIM}"
+        return f"{model}/{settings.EMBEDDING_CHUNK_CHARS}/{settings.EMBEDDING_CHUNK_OVERLAP}"
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(settings.DATA_DIR, "embeddings")
+
+    def vectors(self) -> VectorFile:
+        embedder = self.embedder
+        with self._lock:
+            if embedder.id not in self._files:
+                self._files[embedder.id] = VectorFile(os.path.join(self.directory, f"{embedder.id}.f32"), embedder.dim)
+            return self._files[embedder.id]
+
+    def _paper_rows(self, db: Session, keys: Iterable[str]) -> Dict[str, int]:
+        """content hash -> row of the whole-text vector, for the given texts that are indexed"""
+        keys = list(set(keys))
+        rows = {}
+        for i in range(0, len(keys), 500):
+            rows.update(db.query(ContentChunk.content_hash, ContentChunk.row).filter(
+                ContentChunk.model == self.embedder.id,
+                ContentChunk.kind == "paper",
+                ContentChunk.content_hash.in_(keys[i:i + 500])
+            ).all())
+        return rows
+
+    def ensure_indexed(self, db: Session, keys: Iterable[str]) -> int:
+        """Embed the stored texts that aren't indexed yet (commits); returns how many were added"""
+        from app.services.content_store import load_document
+
+        keys = {key for key in keys if key}
+        missing = keys - set(self._paper_rows(db, keys))
+        added = 0
+        for key in sorted(missing):
+            text, sections = load_document(db, key)
+            if text is None:
+                continue
+            chunks = chunk_document(text, sections) or [{"section": None, "start": 0, "end": len(text)}]
+            chunk_vectors = self.embedder.embed([text[c["start"]:c["end"]] for c in chunks])
+            paper_vector = normalize(chunk_vectors.mean(axis=0, keepdims=True))
+
+            vectors = self.vectors()
+            # End the read transaction so the check below sees other writers' commits
+            db.commit()
+            with vectors.locked():
+                if self._paper_rows(db, [key]):
+                    continue
+                first = vectors.append(np.vstack([paper_vector, chunk_vectors]))
+                db.execute(insert(ContentChunk), [
+                    {
+                        "model": self.embedder.id, "content_hash": key, "kind": "paper", "row": first,
+                        "section": None, "start": 0, "end": len(text)
+                    },
+                    *(
+                        {"model": self.embedder.id, "content_hash": key, "kind": "chunk", "row": first + 1 + i, **c}
+                        for i, c in enumerate(chunks)
+                    ),
+                ])
+                db.commit()
+            added += 1
+        return added
+
+    def index_later(self, db: Session, keys: Iterable[str]) -> int:
+        """
+        Queue the given texts that aren't indexed yet for the background indexer, so a request
+        never embeds a whole project itself. Returns how many texts are still waiting.
+        """
+        keys = {key for key in keys if key}
+        missing = keys - set(self._paper_rows(db, keys))
+        with self._pending_changed:
+            self._pending |= missing
+            if self._pending and self._indexer is None:
+                self._indexer = threading.Thread(target=self._index_pending, name="embedding-indexer", daemon=True)
+                self._indexer.start()
+            return len(self._pending & keys)
+
+    def wait_indexed(self, timeout: Optional[float] = None) -> bool:
+        """Block until the background indexer has nothing left to do (False on timeout)"""
+        with self._pending_changed:
+            return self._pending_changed.wait_for(lambda: not self._pending, timeout)
+
+    def _index_pending(self):
+        """Background indexer: embeds queued texts one at a time, each with its own session"""
+        while True:
+            with self._pending_changed:
+                if not self._pending:
+                    self._indexer = None
+                    self._pending_changed.notify_all()
+                    return
+                key = min(self._pending)
+            db = SessionLocal()
+            try:
+                self.ensure_indexed(db, [key])
+            except Exception as e:
+                logger.error(f"Embedding {key} failed: {e}")
+            finally:
+                db.close()
+            with self._pending_changed:
+                self._pending.discard(key)
+                self._pending_changed.notify_all()
+
+    def remove(self, db: Session, keys: List[str]):
+        """Forget deleted texts (caller commits); their vectors stay in the file until rebuild()"""
+        if keys:
+            db.query(ContentChunk).filter(ContentChunk.content_hash.in_(keys)).delete(synchronize_session=False)
+
+    def rebuild(self, db: Session) -> int:
+        """Drop every embedder's vectors and re-embed all stored text with the current one (commits)"""
+        db.query(ContentChunk).delete(synchronize_session=False)
+        db.commit()
+        with self._lock:
+            files, self._files = self._files, {}
+        for vectors in files.values():
+            vectors.close()
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".f32"):
+                    os.remove(os.path.join(self.directory, name))
+        return self.ensure_indexed(db, [row[0] for row in db.query(PaperContent.hash)])
+
+    def embed_query(self, query: str) -> np.ndarray:
+        return self.embedder.embed([query])[0]
+
+    def similar_papers(self, db: Session, paper: Paper, project_id: Optional[str], limit: int) -> Tuple[List[Tuple[Any, float]], int]:
+        """
+        Papers (of project_id, or all projects when None) whose text is most similar to paper's:
+        ([(row with id, project_id, title, status, content_hash; score)] best first, texts still
+        being indexed). Texts not indexed yet are queued for the background indexer and left out.
+        """
+        if not paper.content_hash:
+            return [], 0
+        candidates = db.query(Paper.id, Paper.project_id, Paper.title, Paper.status, Paper.content_hash).filter(
+            Paper.content_hash.isnot(None), Paper.content_hash != paper.content_hash
+        )
+        if project_id:
+            candidates = candidates.filter(Paper.project_id == project_id)
+        by_hash: Dict[str, List[Any]] = {}
+        for candidate in candidates.order_by(Paper.created_at, Paper.id):
+            by_hash.setdefault(candidate.content_hash, []).append(candidate)
+        pending = self.index_later(db, [paper.content_hash, *by_hash])
+
+        rows = self._paper_rows(db, [paper.content_hash, *by_hash])
+        if paper.content_hash not in rows:
+            return [], pending
+        vectors = self.vectors()
+        query = vectors.matrix(rows[paper.content_hash] + 1)[rows[paper.content_hash]]
+        keys = [key for key in by_hash if key in rows]
+        similar = []
+        for index, score in top_k(vectors, [rows[key] for key in keys], query, limit):
+            similar.extend((candidate, score) for candidate in by_hash[keys[index]])
+        return similar[:limit], pending
+
+    def relevant_chunks(self, db: Session, project_id: str, query: str, limit: int, paper_id: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """
+        Passages of the project's papers (or one of them) most relevant to a question:
+        ([{"paper" (id, title, content_hash), "section", "start", "end", "text", "score"}] best
+        first, texts still being indexed). Texts not indexed yet are queued and left out.
+        """
+        from app.services.content_store import load_content
+
+        papers = db.query(Paper.id, Paper.title, Paper.content_hash).filter(
+            Paper.project_id == project_id, Paper.content_hash.isnot(None)
+        )
+        if paper_id:
+            papers = papers.filter(Paper.id == paper_id)
+        pending = self.index_later(db, [paper.content_hash for paper in papers.with_entities(Paper.content_hash).distinct()])
+
+        # Only the vector rows are loaded for scoring; passage details for the best few
+        rows = [row for (row,) in db.query(ContentChunk.row).filter(
+            ContentChunk.model == self.embedder.id,
+            ContentChunk.content_hash.in_(papers.with_entities(Paper.content_hash)),
+            ContentChunk.kind == "chunk"
+        )]
+        best = top_k(self.vectors(), rows, self.embed_query(query), limit)
+        if not best:
+            return [], pending
+        chunks = {chunk.row: chunk for chunk in db.query(
+            ContentChunk.row, ContentChunk.content_hash, ContentChunk.section, ContentChunk.start, ContentChunk.end
+        ).filter(ContentChunk.model == self.embedder.id, ContentChunk.row.in_([rows[index] for index, _ in best]))}
+        by_hash = {}
+        for paper in papers.filter(Paper.content_hash.in_({chunk.content_hash for chunk in chunks.values()})):
+            by_hash.setdefault(paper.content_hash, paper)
+
+        texts: Dict[str, Optional[str]] = {}
+        hits = []
+        for index, score in best:
+            chunk = chunks.get(rows[index])
+            if chunk is None or chunk.content_hash not in by_hash:
+                continue
+            if chunk.content_hash not in texts:
+                texts[chunk.content_hash] = load_content(db, chunk.content_hash)
+            text = texts[chunk.content_hash] or ""
+            hits.append({
+                "paper": by_hash[chunk.content_hash], "section": chunk.section, "start": chunk.start,
+                "end": chunk.end, "text": text[chunk.start:chunk.end].strip(), "score": score,
+            })
+        return hits, pending
+
+    def _chunks(self, db: Session, keys: List[str]) -> list:
+        """Passage rows (row, content_hash, section, start, end) of the given texts"""
+        chunks = []
+        for i in range(0, len(keys), 500):
+            chunks.extend(db.query(
+                ContentChunk.row, ContentChunk.content_hash, ContentChunk.section, ContentChunk.start, ContentChunk.end
+            ).filter(
+                ContentChunk.model == self.embedder.id,
+                ContentChunk.kind == "chunk",
+                ContentChunk.content_hash.in_(keys[i:i + 500])
+            ))
+        return chunks
+
+    def tool_sections(self, db: Session, key: Optional[str], sections: List[Dict], tool_names: Iterable[str]) -> List[Dict]:
+        """
+        sections plus, for each tool that has a retrieval_query and none of its own sections in
+        this paper, the paper's passages most relevant to that query as "retrieved:<tool>"
+        sections (overlapping passages merged), so the tool reads those instead of the paper's
+        first pages. Embeds the text first if it isn't indexed yet (commits).
+        """
+        from app.tools.registry import TOOL_REGISTRY
+
+        found = {s["name"] for s in sections}
+        tools = [
+            TOOL_REGISTRY[name] for name in sorted(set(tool_names))
+            if name in TOOL_REGISTRY and TOOL_REGISTRY[name].retrieval_query
+            and not found.intersection(TOOL_REGISTRY[name].content_sections)
+        ]
+        if not key:
+            return sections
+        try:
+            # Indexed even when no tool needs passages, so analyzed papers are ready for similarity search
+            self.ensure_indexed(db, [key])
+            if not tools:
+                return sections
+            chunks = self._chunks(db, [key])
+        except Exception as e:
+            # Retrieval only improves what the tools read; analysis goes on with the paper's start
+            logger.error(f"Passage retrieval failed for {key}: {e}")
+            db.rollback()
+            return sections
+
+        retrieved = []
+        for tool in tools:
+            best = top_k(self.vectors(), [c.row for c in chunks], self.embed_query(tool.retrieval_query), TOOL_CHUNKS)
+            spans = sorted((chunks[index].start, chunks[index].end) for index, _ in best)
+            merged: List[List[int]] = []
+            for start, end in spans:
+                if merged and start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            retrieved.extend(
+                {"name": f"retrieved:{tool.name}", "title": "", "start": start, "end": end}
+                for start, end in merged
+            )
+        return sections + retrieved
+
+    def stats(self) -> dict:
+        return {"embedder": self.embedder.id, "dim": self.embedder.dim, "rows": self.vectors().rows}
+
+
+embedding_index = EmbeddingIndex()
+
+
+def load_tool_sections(key: Optional[str], sections: List[Dict], tool_names: Iterable[str]) -> List[Dict]:
+    """embedding_index.tool_sections with its own session, for running in a worker thread"""
+    db = SessionLocal()
+    try:
+        return embedding_index.tool_sections(db, key, sections, tool_names)
+    finally:
+        db.close()
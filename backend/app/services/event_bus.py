@@ -0,0 +1,335 @@
+import asyncio
+import json
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (cursor, event); cursor is None for live-only events (not replayable)
+Delivery = Tuple[Optional[str], Dict[str, Any]]
+
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    """
+    One subscriber's bounded delivery queue. A subscriber that falls behind has its
+    backlog replaced by a single resync event, so slow clients never hold up publishers.
+    """
+
+    def __init__(self, project_id: str, queue_size: int):
+        self.project_id = project_id
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._on_close = None
+
+    def push(self, delivery: Delivery):
+        try:
+            self._queue.put_nowait(delivery)
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait((None, RESYNC))
+
+    async def get(self, timeout: float) -> Optional[Delivery]:
+        """Next delivery, or None after timeout seconds"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        if self._on_close:
+            await self._on_close()
+            self._on_close = None
+
+
+class EventBackend(ABC):
+    @abstractmethod
+    def append(self, project_id: str, event: Dict[str, Any]):
+        """Publish a durable event: sequenced and kept for resuming subscribers"""
+
+    @abstractmethod
+    def broadcast(self, project_id: str, event: Dict[str, Any]):
+        """Publish a live-only event (e.g. streamed partial text) to current subscribers"""
+
+    @abstractmethod
+    async def subscribe(self, project_id: str, cursor: Optional[str]) -> Subscription:
+        """Deliver events after cursor (None: from now on); a cursor that can't be resumed yields resync"""
+
+    def has_subscribers(self, project_id: str) -> bool:
+        return True
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryEventBackend(EventBackend):
+    """
+    Single-process backend: per-project ring buffer of recent durable events.
+    Cursors are "<epoch>-<seq>"; the epoch changes on restart, so stale cursors resync.
+    """
+
+    def __init__(self, buffer_size: int, queue_size: int):
+        self.buffer_size = buffer_size
+        self.queue_size = queue_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq: Dict[str, int] = defaultdict(int)
+        self._buffers: Dict[str, Deque[Tuple[int, Dict[str, Any]]]] = {}
+        self._subscribers: Dict[str, Set[Subscription]] = defaultdict(set)
+
+    def _cursor(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def _parse(self, cursor: str) -> Optional[int]:
+        epoch, _, seq = cursor.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def append(self, project_id: str, event: Dict[str, Any]):
+        self._seq[project_id] += 1
+        seq = self._seq[project_id]
+        buffer = self._buffers.get(project_id)
+        if buffer is None:
+            buffer = self._buffers[project_id] = deque(maxlen=self.buffer_size)
+        buffer.append((seq, event))
+        for subscription in self._subscribers.get(project_id, ()):
+            subscription.push((self._cursor(seq), event))
+
+    def broadcast(self, project_id: str, event: Dict[str, Any]):
+        for subscription in self._subscribers.get(project_id, ()):
+            subscription.push((None, event))
+
+    async def subscribe(self, project_id: str, cursor: Optional[str]) -> Subscription:
+        subscription = Subscription(project_id, self.queue_size)
+        if cursor:
+            seq = self._parse(cursor)
+            buffer = self._buffers.get(project_id) or ()
+            oldest = buffer[0][0] if buffer else self._seq[project_id] + 1
+            if seq is None or seq > self._seq[project_id] or seq < oldest - 1:
+                subscription.push((None, RESYNC))
+            else:
+                for event_seq, event in buffer:
+                    if event_seq > seq:
+                        subscription.push((self._cursor(event_seq), event))
+
+        self._subscribers[project_id].add(subscription)
+
+        async def close():
+            subscribers = self._subscribers.get(project_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[project_id]
+
+        subscription._on_close = close
+        return subscription
+
+    def has_subscribers(self, project_id: str) -> bool:
+        return bool(self._subscribers.get(project_id))
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "subscribers": {project_id: len(subs) for project_id, subs in self._subscribers.items()},
+        }
+
+
+def _stream_id(value: str) -> Tuple[int, int]:
+    ms, _, seq = value.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class RedisEventBackend(EventBackend):
+    """
+    Redis (or any server speaking its protocol) backend, shared by all app processes:
+    durable events go to a capped stream per project (stream ids are the cursors),
+    live-only events to a pub/sub channel. Publishing is fire-and-forget through one
+    writer task, so publish order is preserved and publishers never wait on Redis.
+    """
+
+    def __init__(self, url: str, max_len: int, queue_size: int, prefix: str = "scholarpilot:events", client=None):
+        self.url = url
+        self.max_len = max_len
+        self.queue_size = queue_size
+        self.prefix = prefix
+        # A redis.asyncio-compatible client (e.g. a local stand-in); created from url when None
+        self._redis = client
+        self._outbox: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    def _stream(self, project_id: str) -> str:
+        return f"{self.prefix}:{project_id}"
+
+    def _channel(self, project_id: str) -> str:
+        return f"{self.prefix}:{project_id}:live"
+
+    async def start(self):
+        if self._redis is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("EVENT_BUS_URL is set but the 'redis' package is not installed (pip install redis)")
+            self._redis = redis.from_url(self.url, decode_responses=True)
+        self._outbox = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write_loop(), name="event-bus-writer")
+
+    async def stop(self):
+        if self._writer:
+            self._writer.cancel()
+            await asyncio.gather(self._writer, return_exceptions=True)
+            self._writer = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def append(self, project_id: str, event: Dict[str, Any]):
+        if self._outbox is not None:
+            self._outbox.put_nowait((True, project_id, event))
+
+    def broadcast(self, project_id: str, event: Dict[str, Any]):
+        if self._outbox is not None:
+            self._outbox.put_nowait((False, project_id, event))
+
+    async def _write_loop(self):
+        while True:
+            durable, project_id, event = await self._outbox.get()
+            data = json.dumps(event)
+            try:
+                if durable:
+                    await self._redis.xadd(self._stream(project_id), {"data": data}, maxlen=self.max_len, approximate=True)
+                else:
+                    await self._redis.publish(self._channel(project_id), data)
+            except Exception as e:
+                logger.error(f"Event bus publish failed: {e}")
+
+    async def _resumable(self, key: str, cursor: str) -> bool:
+        """False when events after cursor may have been trimmed from the stream"""
+        try:
+            requested = _stream_id(cursor)
+        except ValueError:
+            return False
+        first = await self._redis.xrange(key, "-", "+", count=1)
+        if not first or _stream_id(first[0][0]) <= requested:
+            return True
+        # The oldest entry is newer than the cursor: fine only if nothing after the cursor was trimmed.
+        # Redis 7 reports the last trimmed id; without it assume the worst.
+        info = await self._redis.xinfo_stream(key)
+        deleted = info.get("max-deleted-entry-id")
+        return deleted is not None and _stream_id(deleted) <= requested
+
+    async def subscribe(self, project_id: str, cursor: Optional[str]) -> Subscription:
+        subscription = Subscription(project_id, self.queue_size)
+        key = self._stream(project_id)
+
+        if cursor and await self._resumable(key, cursor):
+            last_id = cursor
+        else:
+            if cursor:
+                subscription.push((None, RESYNC))
+            latest = await self._redis.xrevrange(key, "+", "-", count=1)
+            last_id = latest[0][0] if latest else "0-0"
+
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(self._channel(project_id))
+
+        async def read_stream():
+            nonlocal last_id
+            while True:
+                response = await self._redis.xread({key: last_id}, block=15000, count=100)
+                for _, entries in response or ():
+                    for entry_id, fields in entries:
+                        last_id = entry_id
+                        subscription.push((entry_id, json.loads(fields["data"])))
+
+        async def read_live():
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    subscription.push((None, json.loads(message["data"])))
+
+        tasks = [asyncio.create_task(read_stream()), asyncio.create_task(read_live())]
+
+        async def close():
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await pubsub.aclose()
+
+        subscription._on_close = close
+        return subscription
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "outbox": self._outbox.qsize() if self._outbox else 0}
+
+
+class EventBus:
+    """
+    Project-scoped change events (paper status, result cells, streamed partial text) for
+    live clients. In-process by default; set EVENT_BUS_URL (redis://...) to share events
+    between app processes and keep them across restarts.
+    """
+
+    def __init__(self):
+        self._backend: Optional[EventBackend] = None
+        # Event loop that owns the subscriber queues; publishes from other threads
+        # (sync endpoints run in a threadpool) are handed over to it
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def backend(self) -> EventBackend:
+        if self._backend is None:
+            self._backend = InMemoryEventBackend(settings.EVENT_BUS_BUFFER_SIZE, settings.EVENT_BUS_QUEUE_SIZE)
+        return self._backend
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        if settings.EVENT_BUS_URL:
+            self._backend = RedisEventBackend(settings.EVENT_BUS_URL, settings.EVENT_BUS_BUFFER_SIZE, settings.EVENT_BUS_QUEUE_SIZE)
+        await self.backend.start()
+
+    async def stop(self):
+        if self._backend is not None:
+            await self._backend.stop()
+
+    def publish(self, project_id: Optional[str], event: Dict[str, Any], durable: bool = True):
+        """Publish an event; durable events are sequenced and replayed to resuming subscribers"""
+        if not project_id:
+            return
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+        if self._loop is not None and not in_loop and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._publish, project_id, event, durable)
+        else:
+            self._publish(project_id, event, durable)
+
+    def _publish(self, project_id: str, event: Dict[str, Any], durable: bool):
+        if durable:
+            self.backend.append(project_id, event)
+        else:
+            self.backend.broadcast(project_id, event)
+
+    async def subscribe(self, project_id: str, cursor: Optional[str] = None) -> Subscription:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        return await self.backend.subscribe(project_id, cursor)
+
+    def has_subscribers(self, project_id: str) -> bool:
+        return self.backend.has_subscribers(project_id)
+
+    def stats(self) -> dict:
+        return self.backend.stats()
+
+
+event_bus = EventBus()
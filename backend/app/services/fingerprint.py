@@ -0,0 +1,95 @@
+import hashlib
+import json
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from app.models.column import ColumnDef
+from app.models.paper import Paper
+from app.models.result import Result
+from app.services.embedding_index import embedding_index
+from app.tools.registry import TOOL_REGISTRY
+
+# Papers whose cells are checked for staleness: queued/processing papers are about to get
+# a full run anyway, and papers in other states have no content to analyze
+STALE_CHECK_STATUSES = ("done", "error")
+
+
+def result_fingerprint(column: ColumnDef, model: str, content_hash: Optional[str]) -> str:
+    """
+    Hash of everything that determines a cell's value: tool name and prompt version,
+    the custom prompt (custom_prompt tool only, other tools ignore it), model and paper content.
+    Tools with a retrieval_query may read retrieved passages, so the embedder is an input too.
+    """
+    tool = TOOL_REGISTRY.get(column.tool_name)
+    custom_prompt = (column.custom_prompt or "") if column.tool_name == "custom_prompt" else ""
+    inputs = [column.tool_name, getattr(tool, "prompt_version", None), custom_prompt, model, content_hash]
+    if getattr(tool, "retrieval_query", None):
+        inputs.append(embedding_index.retrieval_id)
+    return hashlib.sha256(json.dumps(inputs).encode("utf-8")).hexdigest()[:32]
+
+
+def column_fingerprints(columns: List[ColumnDef], model: str, content_hash: Optional[str]) -> Dict[str, str]:
+    """column_id -> fingerprint for one paper"""
+    return {column.id: result_fingerprint(column, model, content_hash) for column in columns}
+
+
+def shared_results(db: Session, fingerprints: Dict[str, str], paper_id: str) -> Dict[str, str]:
+    """
+    column_id -> stored value of a done result with the same fingerprint on another paper.
+    Equal fingerprints mean equal content, tool, prompts and model, so the value can be reused.
+    """
+    if not fingerprints:
+        return {}
+    values = dict(
+        db.query(Result.fingerprint, Result.value).filter(
+            Result.fingerprint.in_(set(fingerprints.values())),
+            Result.status == "done",
+            Result.paper_id != paper_id
+        ).all()
+    )
+    return {
+        column_id: values[fingerprint]
+        for column_id, fingerprint in fingerprints.items()
+        if fingerprint in values
+    }
+
+
+def find_stale_cells(db: Session, project_id: str, model: str, column_ids: Optional[List[str]] = None) -> Dict[str, List[str]]:
+    """
+    paper_id -> ids of the columns whose result is missing, not done, or was computed from
+    different inputs (edited custom prompt, new tool prompt version, other model or content).
+    column_ids restricts the check to those columns.
+    """
+    query = db.query(ColumnDef).filter(ColumnDef.project_id == project_id)
+    if column_ids:
+        query = query.filter(ColumnDef.id.in_(column_ids))
+    columns = query.all()
+    if not columns:
+        return {}
+
+    papers = db.query(Paper.id, Paper.content_hash).filter(
+        Paper.project_id == project_id,
+        Paper.status.in_(STALE_CHECK_STATUSES),
+        Paper.content_hash.isnot(None)
+    ).all()
+    # Only done results count as current; one query for the whole project
+    current = {
+        (row.paper_id, row.column_id): row.fingerprint
+        for row in db.query(Result.paper_id, Result.column_id, Result.fingerprint).join(
+            Paper, Result.paper_id == Paper.id
+        ).filter(
+            Paper.project_id == project_id,
+            Result.column_id.in_([c.id for c in columns]),
+            Result.status == "done"
+        )
+    }
+
+    stale = {}
+    for paper in papers:
+        expected = column_fingerprints(columns, model, paper.content_hash)
+        outdated = [
+            column.id for column in columns
+            if current.get((paper.id, column.id)) != expected[column.id]
+        ]
+        if outdated:
+            stale[paper.id] = outdated
+    return stale
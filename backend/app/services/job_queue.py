@@ -0,0 +1,308 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional, Tuple
+from sqlalchemy import update, or_, and_
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import AnalysisJob
+from app.models.paper import Paper
+from app.services.scheduler import analysis_scheduler, PRIORITY_BULK
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process as lease owner
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# (paper_id, project_id, column_ids); column_ids None = all columns
+PaperProcessor = Callable[[str, str, Optional[List[str]]], Awaitable[None]]
+
+
+def job_column_ids(job: AnalysisJob) -> Optional[List[str]]:
+    return json.loads(job.column_ids) if job.column_ids else None
+
+
+def _covers(job: AnalysisJob, column_ids: Optional[List[str]]) -> bool:
+    """Whether the job computes every column in column_ids"""
+    existing = job_column_ids(job)
+    return existing is None or (column_ids is not None and set(column_ids) <= set(existing))
+
+
+def enqueue_job(
+    db: Session,
+    paper_id: str,
+    project_id: str,
+    priority: int = PRIORITY_BULK,
+    column_ids: Optional[List[str]] = None,
+    absorb_running: bool = True
+) -> Tuple[AnalysisJob, bool]:
+    """
+    Persist an analysis job for a paper (caller commits); column_ids limits it to those columns.
+    Returns (job, created). A queued job for the paper absorbs the request (columns merged,
+    better priority kept); so does a running one that already computes those columns, unless
+    absorb_running is False (a retry: the running job may have finished those cells already).
+    Otherwise a new job is queued behind the running one.
+    """
+    # "queued" sorts before "running"
+    job = db.query(AnalysisJob).filter(
+        AnalysisJob.paper_id == paper_id,
+        AnalysisJob.status.in_(ACTIVE_STATUSES)
+    ).order_by(AnalysisJob.status).first()
+    if job and (job.status == "queued" or (absorb_running and _covers(job, column_ids))):
+        if priority < job.priority:
+            job.priority = priority
+        if job.status == "queued" and not _covers(job, column_ids):
+            if column_ids is None:
+                job.column_ids = None
+            else:
+                job.column_ids = json.dumps(sorted(set(job_column_ids(job)) | set(column_ids)))
+        return job, False
+
+    job = AnalysisJob(
+        paper_id=paper_id,
+        project_id=project_id,
+        priority=priority,
+        status="queued",
+        column_ids=json.dumps(sorted(set(column_ids))) if column_ids is not None else None,
+        max_attempts=settings.JOB_MAX_ATTEMPTS
+    )
+    db.add(job)
+    return job, True
+
+
+def claim_job(db: Session, job_id: str) -> bool:
+    """Atomically take the lease on a queued (or lease-expired) job"""
+    now = datetime.utcnow()
+    result = db.execute(
+        update(AnalysisJob)
+        .where(
+            AnalysisJob.id == job_id,
+            or_(
+                AnalysisJob.status == "queued",
+                and_(AnalysisJob.status == "running", AnalysisJob.lease_expires_at < now)
+            )
+        )
+        .values(
+            status="running",
+            lease_owner=WORKER_ID,
+            lease_expires_at=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            heartbeat_at=now,
+            attempts=AnalysisJob.attempts + 1,
+            updated_at=now
+        )
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def heartbeat_job(db: Session, job_id: str) -> bool:
+    """Extend our lease. False means the lease was lost to another worker."""
+    now = datetime.utcnow()
+    result = db.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.id == job_id, AnalysisJob.lease_owner == WORKER_ID, AnalysisJob.status == "running")
+        .values(heartbeat_at=now, lease_expires_at=now + timedelta(seconds=settings.JOB_LEASE_SECONDS))
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def finish_job(db: Session, job_id: str, error: Optional[str] = None):
+    """Release the lease: done on success, re-queued or failed on error"""
+    job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id, AnalysisJob.lease_owner == WORKER_ID).first()
+    if not job:
+        return
+    job.lease_owner = None
+    job.lease_expires_at = None
+    if error is None:
+        job.status = "done"
+    else:
+        job.last_error = error
+        job.status = "queued" if job.attempts < job.max_attempts else "failed"
+    db.commit()
+
+
+def requeue_job(db: Session, job_id: str):
+    """Release the lease of an interrupted job (not a failure) so it runs again"""
+    job = db.query(AnalysisJob).filter(AnalysisJob.id == job_id, AnalysisJob.lease_owner == WORKER_ID).first()
+    if not job:
+        return
+    job.lease_owner = None
+    job.lease_expires_at = None
+    job.status = "queued"
+    # The interrupted run does not count against max_attempts
+    job.attempts = max(0, job.attempts - 1)
+    paper = db.query(Paper).filter(Paper.id == job.paper_id).first()
+    if paper and paper.status == "processing":
+        paper.status = "queued"
+    db.commit()
+
+
+def recover_expired_jobs(db: Session) -> int:
+    """
+    Requeue running jobs whose lease expired (worker crashed or restarted).
+    Jobs out of attempts are failed and their paper marked as error.
+    """
+    now = datetime.utcnow()
+    expired = db.query(AnalysisJob).filter(
+        AnalysisJob.status == "running",
+        AnalysisJob.lease_expires_at < now
+    ).all()
+
+    for job in expired:
+        job.lease_owner = None
+        job.lease_expires_at = None
+        paper = db.query(Paper).filter(Paper.id == job.paper_id).first()
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            job.last_error = "Lease expired after the final attempt"
+            if paper:
+                paper.status = "error"
+                paper.error_message = f"Analysis did not complete after {job.attempts} attempts"
+        else:
+            job.status = "queued"
+            if paper and paper.status == "processing":
+                paper.status = "queued"
+
+    db.commit()
+    if expired:
+        logger.warning(f"Recovered {len(expired)} analysis jobs with expired leases")
+    return len(expired)
+
+
+def get_queued_jobs(db: Session) -> List[AnalysisJob]:
+    return db.query(AnalysisJob).filter(
+        AnalysisJob.status == "queued"
+    ).order_by(AnalysisJob.priority, AnalysisJob.created_at).all()
+
+
+class JobQueueWorker:
+    """
+    Bridges the persistent job table and the in-process scheduler.
+    On start (and every poll interval) it recovers expired leases and feeds queued
+    jobs to the scheduler; each scheduled run claims its job before doing any work.
+    """
+
+    def __init__(self, poll_interval: float):
+        self.poll_interval = poll_interval
+        self._processor: Optional[PaperProcessor] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    async def start(self, processor: PaperProcessor):
+        self._processor = processor
+        await analysis_scheduler.start(self.run_paper)
+        await self.poll()
+        self._poller = asyncio.create_task(self._poll_loop(), name="job-queue-poller")
+
+    async def stop(self):
+        if self._poller:
+            self._poller.cancel()
+            await asyncio.gather(self._poller, return_exceptions=True)
+            self._poller = None
+        await analysis_scheduler.stop()
+
+    async def poll(self):
+        """Recover expired leases, then hand every queued job to the scheduler"""
+        from app.api.analysis import get_model_provider
+        db = SessionLocal()
+        try:
+            recover_expired_jobs(db)
+            jobs = [(job.paper_id, job.project_id, job.priority) for job in get_queued_jobs(db)]
+            provider = get_model_provider(db)
+        finally:
+            db.close()
+
+        for paper_id, project_id, priority in jobs:
+            await analysis_scheduler.submit(paper_id, project_id, provider, priority)
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Job queue poll failed: {e}")
+
+    async def run_paper(self, paper_id: str, project_id: str):
+        """Scheduler runner: claim the paper's job, heartbeat while processing, then release"""
+        db = SessionLocal()
+        try:
+            jobs = db.query(AnalysisJob).filter(
+                AnalysisJob.paper_id == paper_id,
+                AnalysisJob.status.in_(ACTIVE_STATUSES)
+            ).order_by(AnalysisJob.status).all()
+            now = datetime.utcnow()
+            if any(j.status == "running" and j.lease_expires_at and j.lease_expires_at > now for j in jobs):
+                # Another worker is on this paper; it submits the follow-up job when it finishes
+                return
+            job = jobs[0] if jobs else None
+            if not job or not claim_job(db, job.id):
+                # Finished already, or another worker took it first
+                return
+            job_id = job.id
+            column_ids = job_column_ids(job)
+        finally:
+            db.close()
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        error = None
+        # Stays False on cancellation (not an Exception): the job is requeued, not finished
+        settled = False
+        try:
+            await self._processor(paper_id, project_id, column_ids)
+            settled = True
+        except Exception as e:
+            error = str(e)
+            settled = True
+            raise
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            follow_up = self._release(job_id, paper_id, settled, error)
+            if follow_up:
+                # Work queued for this paper while it ran (a retry, a skipped follow-up job);
+                # the scheduler runs it as soon as this run ends
+                await analysis_scheduler.submit(paper_id, *follow_up)
+
+    def _release(self, job_id: str, paper_id: str, settled: bool, error: Optional[str]) -> Optional[Tuple[str, str, int]]:
+        """Finish (or requeue) the job; returns (project_id, provider, priority) of the paper's next queued job"""
+        from app.api.analysis import get_model_provider
+        db = SessionLocal()
+        try:
+            if not settled:
+                requeue_job(db, job_id)
+                return None
+            finish_job(db, job_id, error)
+            # A failed job requeued for another attempt waits for the poll like before
+            follow_up = db.query(AnalysisJob).filter(
+                AnalysisJob.paper_id == paper_id,
+                AnalysisJob.status == "queued",
+                AnalysisJob.id != job_id
+            ).order_by(AnalysisJob.priority, AnalysisJob.created_at).first()
+            if not follow_up:
+                return None
+            return follow_up.project_id, get_model_provider(db), follow_up.priority
+        finally:
+            db.close()
+
+    async def _heartbeat(self, job_id: str):
+        interval = max(1.0, settings.JOB_LEASE_SECONDS / 3)
+        while True:
+            await asyncio.sleep(interval)
+            db = SessionLocal()
+            try:
+                if not heartbeat_job(db, job_id):
+                    logger.warning(f"Lost lease on analysis job {job_id}")
+                    return
+            finally:
+                db.close()
+
+
+job_queue_worker = JobQueueWorker(poll_interval=settings.JOB_POLL_INTERVAL)
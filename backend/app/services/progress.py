@@ -0,0 +1,93 @@
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set
+from app.config import settings
+from app.models.column import ColumnDef
+from app.services.event_bus import EventBus, event_bus
+from app.services.result_writer import build_result_rows, result_writer
+
+logger = logging.getLogger(__name__)
+
+
+class PaperProgress:
+    """
+    Progress of one paper's analysis. Each finished column is persisted through the result
+    writer right away (so the grid fills in cell by cell) and announced to subscribers;
+    while a column's model call streams, its partial text is published (throttled, live only).
+    """
+
+    def __init__(
+        self,
+        project_id: str,
+        paper_id: str,
+        columns: List[ColumnDef],
+        fingerprints: Optional[Dict[str, str]] = None,
+        bus: EventBus = event_bus
+    ):
+        self.project_id = project_id
+        self.paper_id = paper_id
+        self.columns = {c.id: c for c in columns}
+        # column_id -> input fingerprint recorded with each done result
+        self.fingerprints = fingerprints or {}
+        self.bus = bus
+        # Columns whose result is already committed
+        self.persisted: Set[str] = set()
+        self._last_partial: Dict[str, float] = {}
+
+    def _publish(self, event: Dict[str, Any], durable: bool = True):
+        self.bus.publish(self.project_id, {"paper_id": self.paper_id, **event}, durable)
+
+    def paper(self, status: str, **fields):
+        """Announce a paper status change (fields: title, error_message)"""
+        self._publish({"type": "paper", "status": status, **fields})
+
+    def started(self, column_ids: List[str]):
+        for column_id in column_ids:
+            self._publish({"type": "cell", "column_id": column_id, "status": "processing"})
+
+    def partial_listener(self, column_ids: List[str]) -> Optional[Callable[[str], None]]:
+        """Listener for streamed text of a call serving column_ids (None: nobody is watching, don't stream)"""
+        if not settings.ANALYSIS_STREAMING or not self.bus.has_subscribers(self.project_id):
+            return None
+        key = ",".join(column_ids)
+
+        def listener(text: str):
+            now = time.monotonic()
+            if now - self._last_partial.get(key, 0.0) < settings.PROGRESS_PARTIAL_INTERVAL:
+                return
+            self._last_partial[key] = now
+            for column_id in column_ids:
+                self._publish({"type": "partial", "column_id": column_id, "text": text}, durable=False)
+
+        return listener
+
+    def _publish_cell(self, column_id: str, row: Dict[str, Any]):
+        self._publish({
+            "type": "cell", "column_id": column_id,
+            "status": row["status"], "value": row["value"], "error_message": row["error_message"]
+        })
+
+    async def copied(self, values: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """
+        Persist result values copied from an identical analysis (see fingerprint.shared_results),
+        then announce them. Returns the paper fields they imply (title from metadata).
+        """
+        columns = [c for c in self.columns.values() if c.id in values]
+        results = {c.id: {"status": "done", "value": values[c.id], "error_message": None} for c in columns}
+        result_rows, paper_fields = build_result_rows(columns, results, self.fingerprints)
+        await result_writer.write(self.paper_id, result_rows)
+        self.persisted.update(result_rows)
+        for column_id, row in result_rows.items():
+            self._publish_cell(column_id, row)
+        paper_fields.pop("status", None)
+        return paper_fields
+
+    async def finished(self, column_id: str, result: Dict[str, Any]):
+        """Persist one column's result, then announce it"""
+        column = self.columns.get(column_id)
+        if column is None:
+            return
+        result_rows, _ = build_result_rows([column], {column_id: result}, self.fingerprints)
+        await result_writer.write(self.paper_id, result_rows)
+        self.persisted.add(column_id)
+        self._publish_cell(column_id, result_rows[column_id])
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models.column import ColumnDef
+from app.models.paper import Paper
+from app.models.result import Result
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PaperWrite:
+    paper_id: str
+    # column_id -> {"value": str | None, "status": str, "error_message": str | None, "fingerprint": str | None}
+    results: Dict[str, Dict[str, Any]]
+    # Paper attributes to set in the same transaction (status, title, ...)
+    paper_fields: Dict[str, Any] = field(default_factory=dict)
+    future: Optional[asyncio.Future] = None
+
+
+def build_result_rows(
+    columns: List[ColumnDef],
+    results_map: Dict[str, Any],
+    fingerprints: Optional[Dict[str, str]] = None
+) -> Tuple[Dict[str, dict], Dict[str, Any]]:
+    """
+    Turn orchestrator output into result rows for the result writer, plus the paper fields
+    to set with them (status, and the title found by metadata_extractor).
+    fingerprints (column_id -> input fingerprint) are recorded on done rows.
+    """
+    fingerprints = fingerprints or {}
+    # Map column IDs to tool names
+    col_tool_map = {c.id: c.tool_name for c in columns}
+    # Current logic: 'done' if process finished, even if individual cols failed.
+    paper_fields = {"status": "done"}
+    result_rows = {}
+
+    for col_id, res_data in results_map.items():
+        value = res_data['value']
+        
+        # Special Handling: If this is metadata_extractor, try to update Paper Title
+        tool_name = col_tool_map.get(col_id)
+        metadata = value
+        if tool_name == "metadata_extractor" and isinstance(value, str):
+            # Stored JSON (a result copied from another paper)
+            try:
+                metadata = json.loads(value)
+            except ValueError:
+                metadata = None
+        if tool_name == "metadata_extractor" and metadata and isinstance(metadata, dict):
+            extracted_title = metadata.get("title") or metadata.get("Title")
+            if extracted_title and isinstance(extracted_title, str):
+                paper_fields["title"] = extracted_title
+        
+        if value is None:
+            value_str = None
+        elif isinstance(value, (dict, list)):
+            value_str = json.dumps(value)
+        else:
+            value_str = str(value)
+        
+        result_rows[col_id] = {
+            "value": value_str,
+            "status": res_data['status'],
+            "error_message": res_data['error_message'],
+            "fingerprint": fingerprints.get(col_id) if res_data['status'] == "done" else None
+        }
+    return result_rows, paper_fields
+
+
+def upsert_results(db: Session, rows: List[Dict[str, Any]]):
+    """
+    Insert-or-update result rows keyed by (paper_id, column_id) in a single
+    INSERT ... ON CONFLICT DO UPDATE statement (SQLite / PostgreSQL).
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        _merge_results(db, rows)
+        return
+
+    now = datetime.utcnow()
+    values = [
+        {"id": str(uuid.uuid4()), "created_at": now, "updated_at": now, "fingerprint": None, **row}
+        for row in rows
+    ]
+    stmt = insert(Result).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["paper_id", "column_id"],
+        set_={
+            "value": stmt.excluded.value,
+            "status": stmt.excluded.status,
+            "error_message": stmt.excluded.error_message,
+            "fingerprint": stmt.excluded.fingerprint,
+            "updated_at": stmt.excluded.updated_at,
+        }
+    )
+    db.execute(stmt)
+
+
+def _merge_results(db: Session, rows: List[Dict[str, Any]]):
+    """Select-then-write fallback for databases without ON CONFLICT"""
+    for row in rows:
+        result = db.query(Result).filter(
+            Result.paper_id == row["paper_id"],
+            Result.column_id == row["column_id"]
+        ).first()
+        if result:
+            result.value = row["value"]
+            result.status = row["status"]
+            result.error_message = row["error_message"]
+            result.fingerprint = row.get("fingerprint")
+        else:
+            db.add(Result(**row))
+
+
+def apply_writes(writes: List[PaperWrite]):
+    """Write a batch of paper results in one transaction (runs on the writer thread)"""
+    db = SessionLocal()
+    try:
+        rows = [
+            {"paper_id": write.paper_id, "column_id": column_id, **data}
+            for write in writes
+            for column_id, data in write.results.items()
+        ]
+        # SQLite caps bound parameters per statement; 8 columns per row
+        for start in range(0, len(rows), 100):
+            upsert_results(db, rows[start:start + 100])
+
+        for write in writes:
+            if write.paper_fields:
+                db.query(Paper).filter(Paper.id == write.paper_id).update(write.paper_fields)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+class ResultWriter:
+    """
+    Single writer for analysis results. Analysis tasks hand finished papers to a queue;
+    one background task drains it and commits up to max_batch papers per transaction,
+    so many concurrent analyses don't contend for SQLite's write lock.
+    """
+
+    def __init__(self, max_batch: int = 50, flush_interval: float = 0.05):
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run(), name="result-writer")
+
+    async def stop(self):
+        """Flush pending writes, then stop"""
+        if not self.running:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def write(self, paper_id: str, results: Dict[str, Dict[str, Any]], paper_fields: Optional[Dict[str, Any]] = None):
+        """Queue a paper's results and wait until they are committed"""
+        write = PaperWrite(paper_id=paper_id, results=results, paper_fields=paper_fields or {})
+        if not self.running:
+            # No writer loop (scripts, tests): write directly off the event loop
+            await asyncio.to_thread(apply_writes, [write])
+            return
+        write.future = asyncio.get_running_loop().create_future()
+        await self._queue.put(write)
+        await write.future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Give concurrent tasks a moment to join this transaction
+            await asyncio.sleep(self.flush_interval)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                await asyncio.to_thread(apply_writes, batch)
+                error = None
+            except Exception as e:
+                logger.error(f"Result batch of {len(batch)} papers failed: {e}")
+                error = e
+
+            if error is not None and len(batch) > 1:
+                # Retry one by one so a single bad write doesn't fail the whole batch
+                for write in batch:
+                    try:
+                        await asyncio.to_thread(apply_writes, [write])
+                        self._resolve(write)
+                    except Exception as e:
+                        self._resolve(write, e)
+            else:
+                for write in batch:
+                    self._resolve(write, error)
+
+            for _ in batch:
+                self._queue.task_done()
+
+    @staticmethod
+    def _resolve(write: PaperWrite, error: Optional[Exception] = None):
+        if write.future is None or write.future.done():
+            return
+        if error is None:
+            write.future.set_result(None)
+        else:
+            write.future.set_exception(error)
+
+
+result_writer = ResultWriter()
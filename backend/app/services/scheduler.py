@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Deque, Dict, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower value runs first
+PRIORITY_RETRY = 0
+PRIORITY_BULK = 10
+
+PaperRunner = Callable[[str, str], Awaitable[None]]
+
+
+@dataclass
+class AnalysisTask:
+    paper_id: str
+    project_id: str
+    provider: str
+    priority: int = PRIORITY_BULK
+    submitted_at: float = field(default_factory=time.monotonic)
+    cancelled: bool = False
+
+
+class AnalysisScheduler:
+    """
+    In-process worker pool for paper analysis.
+    - Global cap: number of workers (max_concurrency)
+    - Per-provider cap: papers in flight per LLM provider
+    - Fairness: round-robin across projects within a priority level
+    - Priority: lower priority value is always dispatched first
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        provider_limits: Optional[Dict[str, int]] = None,
+        default_provider_limit: int = 4,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.provider_limits = dict(provider_limits or {})
+        self.default_provider_limit = max(1, default_provider_limit)
+
+        # priority -> project_id -> queued tasks; OrderedDict order is the round-robin rotation
+        self._queues: Dict[int, "OrderedDict[str, Deque[AnalysisTask]]"] = {}
+        self._pending: Dict[str, AnalysisTask] = {}
+        self._in_flight: Dict[str, AnalysisTask] = {}
+        self._provider_in_flight: Dict[str, int] = {}
+        self._completed = 0
+        self._failed = 0
+
+        # paper_id -> timer of a delayed submit (see submit_later)
+        self._delayed: Dict[str, asyncio.TimerHandle] = {}
+        # paper_id -> task submitted while the paper was in flight; queued when that run ends
+        self._rerun: Dict[str, AnalysisTask] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._runner: Optional[PaperRunner] = None
+        self._workers: list = []
+        self._cond: Optional[asyncio.Condition] = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def start(self, runner: PaperRunner):
+        """Spawn the worker pool. runner(paper_id, project_id) does the actual work."""
+        if self._workers:
+            return
+        self._runner = runner
+        self._loop = asyncio.get_running_loop()
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"analysis-worker-{i}")
+            for i in range(self.max_concurrency)
+        ]
+        logger.info(f"Analysis scheduler started with {self.max_concurrency} workers")
+
+    async def stop(self):
+        for timer in self._delayed.values():
+            timer.cancel()
+        self._delayed.clear()
+        self._rerun.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def provider_limit(self, provider: str) -> int:
+        return max(1, self.provider_limits.get(provider, self.default_provider_limit))
+
+    async def submit(self, paper_id: str, project_id: str, provider: str, priority: int = PRIORITY_BULK) -> bool:
+        """
+        Queue a paper for analysis. Returns False if it is already queued at the same or
+        better priority (a better priority re-queues it). A paper that is in flight is queued
+        again once its current run ends, so work persisted meanwhile (a follow-up job) runs then.
+        """
+        cond = self._condition()
+        async with cond:
+            if paper_id in self._in_flight:
+                rerun = self._rerun.get(paper_id)
+                if rerun and rerun.priority <= priority:
+                    return False
+                self._rerun[paper_id] = AnalysisTask(paper_id=paper_id, project_id=project_id, provider=provider, priority=priority)
+                return True
+            existing = self._pending.get(paper_id)
+            if existing:
+                if existing.priority <= priority:
+                    return False
+                # Promote: leave the old entry behind as a tombstone
+                existing.cancelled = True
+
+            self._enqueue(AnalysisTask(paper_id=paper_id, project_id=project_id, provider=provider, priority=priority))
+            cond.notify()
+            return True
+
+    def _enqueue(self, task: AnalysisTask):
+        """Caller must hold the condition lock"""
+        projects = self._queues.setdefault(task.priority, OrderedDict())
+        projects.setdefault(task.project_id, deque()).append(task)
+        self._pending[task.paper_id] = task
+
+    def submit_later(self, paper_id: str, project_id: str, provider: str, priority: int = PRIORITY_BULK, delay: float = 0.0):
+        """
+        Submit after delay seconds. Further calls for the paper within that window add nothing,
+        so requests merged into its persisted job meanwhile (e.g. several retried cells) run together.
+        Safe to call from any thread (e.g. sync request handlers). Before start() it does nothing:
+        the persisted job is picked up by the job queue's poll.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+
+        def schedule():
+            if paper_id in self._delayed:
+                return
+
+            def fire():
+                self._delayed.pop(paper_id, None)
+                loop.create_task(self.submit(paper_id, project_id, provider, priority))
+
+            self._delayed[paper_id] = loop.call_later(delay, fire)
+
+        loop.call_soon_threadsafe(schedule)
+
+    def _pop_next(self) -> Optional[AnalysisTask]:
+        """Pick the next runnable task. Caller must hold the condition lock."""
+        for priority in sorted(self._queues):
+            projects = self._queues[priority]
+            for project_id in list(projects.keys()):
+                queue = projects[project_id]
+                while queue and queue[0].cancelled:
+                    queue.popleft()
+                if not queue:
+                    del projects[project_id]
+                    continue
+                task = queue[0]
+                if self._provider_in_flight.get(task.provider, 0) >= self.provider_limit(task.provider):
+                    continue
+                queue.popleft()
+                # Rotate the project to the back so other projects get the next slot
+                if queue:
+                    projects.move_to_end(project_id)
+                else:
+                    del projects[project_id]
+                return task
+            if not projects:
+                del self._queues[priority]
+        return None
+
+    async def _worker(self, index: int):
+        cond = self._condition()
+        while True:
+            async with cond:
+                task = self._pop_next()
+                while task is None:
+                    await cond.wait()
+                    task = self._pop_next()
+                self._pending.pop(task.paper_id, None)
+                self._in_flight[task.paper_id] = task
+                self._provider_in_flight[task.provider] = self._provider_in_flight.get(task.provider, 0) + 1
+
+            try:
+                await self._runner(task.paper_id, task.project_id)
+                self._completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"Analysis worker {index} failed on paper {task.paper_id}: {e}")
+            finally:
+                async with cond:
+                    self._in_flight.pop(task.paper_id, None)
+                    self._provider_in_flight[task.provider] -= 1
+                    rerun = self._rerun.pop(task.paper_id, None)
+                    if rerun and task.paper_id not in self._pending:
+                        self._enqueue(rerun)
+                    # A provider slot freed up; any idle worker may now find a runnable task
+                    cond.notify_all()
+
+    def stats(self) -> dict:
+        queued_by_priority: Dict[int, int] = {}
+        queued_by_project: Dict[str, int] = {}
+        for task in self._pending.values():
+            queued_by_priority[task.priority] = queued_by_priority.get(task.priority, 0) + 1
+            queued_by_project[task.project_id] = queued_by_project.get(task.project_id, 0) + 1
+
+        return {
+            "running": self.running,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": len(self._pending),
+            "delayed": len(self._delayed),
+            "rerun_after_current": len(self._rerun),
+            "queued_by_priority": queued_by_priority,
+            "queued_by_project": queued_by_project,
+            "in_flight": len(self._in_flight),
+            "in_flight_by_provider": {k: v for k, v in self._provider_in_flight.items() if v},
+            "provider_limits": {
+                provider: self.provider_limit(provider)
+                for provider in set(self.provider_limits) | set(self._provider_in_flight)
+            },
+            "completed": self._completed,
+            "failed": self._failed,
+        }
+
+
+analysis_scheduler = AnalysisScheduler(
+    max_concurrency=settings.ANALYSIS_MAX_CONCURRENCY,
+    provider_limits=settings.ANALYSIS_PROVIDER_CONCURRENCY,
+    default_provider_limit=settings.ANALYSIS_PROVIDER_DEFAULT_CONCURRENCY,
+)
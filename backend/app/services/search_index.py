@@ -0,0 +1,212 @@
+import html
+import re
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, or_, text
+from sqlalchemy.orm import Session, selectinload
+from app.models.paper import Paper
+from app.models.result import Result
+
+# Matches shown per paper, best first
+MAX_MATCHES = 3
+SNIPPET_TOKENS = 12
+MARK_OPEN, MARK_CLOSE = "<mark>", "</mark>"
+# Placeholders FTS5 wraps around matched terms; the text is HTML-escaped before they become <mark>
+_HIT_OPEN, _HIT_CLOSE = "\x02", "\x03"
+# bm25 is negative (lower is better); title hits count double
+TITLE_WEIGHT = 2.0
+
+# Search hits per paper, best rank first (all three indexes, restricted to the project).
+# CROSS JOIN and +p.project_id keep the FTS match as the outer loop; otherwise SQLite may
+# walk every paper of the project and probe the index once per paper.
+_PAPER_HITS = """
+WITH hits AS (
+    SELECT p.id AS paper_id, bm25(papers_fts) * :title_weight AS rank
+    FROM papers_fts CROSS JOIN papers p ON p.rowid = papers_fts.rowid
+    WHERE papers_fts MATCH :query AND +p.project_id = :project_id
+    UNION ALL
+    SELECT r.paper_id, bm25(results_fts)
+    FROM results_fts CROSS JOIN results r ON r.rowid = results_fts.rowid CROSS JOIN papers p ON p.id = r.paper_id
+    WHERE results_fts MATCH :query AND +p.project_id = :project_id
+    UNION ALL
+    SELECT p.id, bm25(content_fts)
+    FROM content_fts CROSS JOIN papers p ON p.content_hash = content_fts.hash
+    WHERE content_fts MATCH :body_query AND +p.project_id = :project_id
+)
+SELECT paper_id, MIN(rank) AS score, COUNT(*) OVER () AS total
+FROM hits GROUP BY paper_id ORDER BY score, paper_id LIMIT :limit OFFSET :offset
+"""
+
+# Snippets for one page of papers
+_MATCHES = """
+SELECT p.id AS paper_id, 'title' AS kind, NULL AS ref, bm25(papers_fts) * :title_weight AS rank,
+       snippet(papers_fts, 0, :open, :close, '…', :tokens) AS snippet
+FROM papers_fts CROSS JOIN papers p ON p.rowid = papers_fts.rowid
+WHERE papers_fts MATCH :query AND p.id IN :paper_ids
+UNION ALL
+SELECT r.paper_id, 'result', r.column_id, bm25(results_fts), snippet(results_fts, 0, :open, :close, '…', :tokens)
+FROM results_fts CROSS JOIN results r ON r.rowid = results_fts.rowid
+WHERE results_fts MATCH :query AND r.paper_id IN :paper_ids
+UNION ALL
+SELECT p.id, 'section', content_fts.section, bm25(content_fts), snippet(content_fts, 0, :open, :close, '…', :tokens)
+FROM content_fts CROSS JOIN papers p ON p.content_hash = content_fts.hash
+WHERE content_fts MATCH :body_query AND p.id IN :paper_ids
+"""
+
+_QUERY_TOKEN = re.compile(r'"([^"]*)"|(\w+)(\*?)')
+
+
+def fts_enabled(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def fts_query(query: str) -> str:
+    """
+    User input as an FTS5 query: words are ANDed, "quoted text" is a phrase and word* a prefix.
+    Operators and punctuation are not passed through, so no input is a syntax error.
+    """
+    parts = []
+    for phrase, word, star in _QUERY_TOKEN.findall(query):
+        words = re.findall(r"\w+", phrase) if phrase else [word]
+        if words:
+            parts.append('"' + " ".join(words) + '"' + star)
+    return " ".join(parts)
+
+
+def index_content(db: Session, key: str, text_value: str, sections: List[Dict]):
+    """Add a newly stored paper text to the section index (caller commits)"""
+    if not fts_enabled(db):
+        return
+    parts = sections or [{"name": "", "start": 0, "end": len(text_value)}]
+    values = [
+        {"body": text_value[s["start"]:s["end"]], "hash": key, "section": s["name"]}
+        for s in parts if s["end"] > s["start"]
+    ]
+    if values:
+        db.execute(text("INSERT INTO content_fts(body, hash, section) VALUES (:body, :hash, :section)"), values)
+
+
+def unindex_content(db: Session, keys: List[str]):
+    """Drop deleted paper texts from the section index (caller commits)"""
+    if not fts_enabled(db):
+        return
+    for key in keys:
+        db.execute(
+            text("DELETE FROM content_fts WHERE rowid IN (SELECT rowid FROM content_fts WHERE content_fts MATCH :match)"),
+            {"match": f'hash : "{key}"'}
+        )
+
+
+def rebuild_index(db: Session):
+    """
+    Rebuild all indexes from the base tables (e.g. after restoring a backup or a VACUUM that
+    renumbered rows); caller commits
+    """
+    if not fts_enabled(db):
+        return
+    from app.services.content_store import load_document
+
+    db.execute(text("INSERT INTO papers_fts(papers_fts) VALUES ('rebuild')"))
+    db.execute(text("INSERT INTO results_fts(results_fts) VALUES ('rebuild')"))
+    db.execute(text("DELETE FROM content_fts"))
+    keys = [row[0] for row in db.execute(text("SELECT hash FROM paper_contents"))]
+    for key in keys:
+        body, sections = load_document(db, key)
+        if body is not None:
+            index_content(db, key, body, sections)
+
+
+def search_project(db: Session, project_id: str, query: str, limit: int, offset: int) -> Tuple[int, List[dict]]:
+    """
+    Rank the project's papers by matches in title, result values and section text.
+    Returns (total matching papers, page of {paper_id, title, status, score, matches}).
+    """
+    match = fts_query(query)
+    if not match:
+        return 0, []
+    if not fts_enabled(db):
+        return _like_search(db, project_id, query, limit, offset)
+
+    params = {
+        "query": match, "body_query": f"body : ({match})", "project_id": project_id,
+        "title_weight": TITLE_WEIGHT,
+    }
+    rows = db.execute(text(_PAPER_HITS), {**params, "limit": limit, "offset": offset}).fetchall()
+    if not rows:
+        total = 0
+        if offset:
+            total = db.execute(
+                text(f"SELECT COUNT(*) FROM ({_PAPER_HITS})"), {**params, "limit": -1, "offset": 0}
+            ).scalar() or 0
+        return total, []
+
+    paper_ids = [row.paper_id for row in rows]
+    matches: Dict[str, List[tuple]] = {paper_id: [] for paper_id in paper_ids}
+    statement = text(_MATCHES).bindparams(bindparam("paper_ids", expanding=True))
+    for row in db.execute(statement, {
+        **params, "paper_ids": paper_ids, "open": _HIT_OPEN, "close": _HIT_CLOSE, "tokens": SNIPPET_TOKENS
+    }):
+        matches[row.paper_id].append((row.rank, row.kind, row.ref, row.snippet))
+
+    papers = {p.id: p for p in db.query(Paper.id, Paper.title, Paper.status).filter(Paper.id.in_(paper_ids))}
+    hits = []
+    for row in rows:
+        paper = papers.get(row.paper_id)
+        if paper is None:
+            continue
+        hits.append({
+            "paper_id": row.paper_id,
+            "title": paper.title,
+            "status": paper.status,
+            # Higher is better for clients
+            "score": round(-row.score, 4),
+            "matches": [_match(kind, ref, snippet) for _, kind, ref, snippet in sorted(matches[row.paper_id], key=lambda m: m[0])[:MAX_MATCHES]],
+        })
+    return rows[0].total, hits
+
+
+def _match(kind: str, ref: Optional[str], snippet: str) -> dict:
+    return {
+        "kind": kind,
+        "column_id": ref if kind == "result" else None,
+        "section": ref if kind == "section" else None,
+        "snippet": _highlight(snippet),
+    }
+
+
+def _highlight(snippet: str) -> str:
+    """Escaped snippet text with the placeholder-wrapped hits as <mark> (safe to render as HTML)"""
+    return html.escape(snippet).replace(_HIT_OPEN, MARK_OPEN).replace(_HIT_CLOSE, MARK_CLOSE)
+
+
+def _like_snippet(value: str, needle: str, width: int = 60) -> str:
+    at = value.lower().find(needle.lower())
+    if at < 0:
+        return value[:2 * width]
+    start, end = max(0, at - width), at + len(needle) + width
+    return ("…" if start else "") + value[start:at] + _HIT_OPEN + value[at:at + len(needle)] + _HIT_CLOSE + value[at + len(needle):end] + ("…" if end < len(value) else "")
+
+
+def _like_search(db: Session, project_id: str, query: str, limit: int, offset: int) -> Tuple[int, List[dict]]:
+    """Databases without FTS5: substring match on titles and result values (no ranking, no section text)"""
+    words = re.findall(r"\w+", query)
+    # \w includes "_", a LIKE wildcard
+    patterns = ["%" + w.replace("_", "\\_") + "%" for w in words]
+    conditions = [or_(Paper.title.ilike(p, escape="\\"), Result.value.ilike(p, escape="\\")) for p in patterns]
+    base = db.query(Paper.id).outerjoin(Result, Result.paper_id == Paper.id).filter(
+        Paper.project_id == project_id, *conditions
+    ).distinct()
+    total = base.count()
+    paper_ids = [row.id for row in base.order_by(Paper.id).limit(limit).offset(offset)]
+    papers = db.query(Paper).options(selectinload(Paper.results)).filter(Paper.id.in_(paper_ids)).all() if paper_ids else []
+    hits = []
+    for paper in sorted(papers, key=lambda p: paper_ids.index(p.id)):
+        matches = []
+        if paper.title and words[0].lower() in paper.title.lower():
+            matches.append(_match("title", None, _like_snippet(paper.title, words[0])))
+        for result in paper.results:
+            if len(matches) >= MAX_MATCHES:
+                break
+            if result.value and words[0].lower() in result.value.lower():
+                matches.append(_match("result", result.column_id, _like_snippet(result.value, words[0])))
+        hits.append({"paper_id": paper.id, "title": paper.title, "status": paper.status, "score": 0.0, "matches": matches})
+    return total, hits
@@ -3,6 +3,7 @@ from app.tools.base import BaseTool
 class ArchitectureExtractor(BaseTool):
     name = "architecture_extractor"
     description = "Extracts system/model architecture details"
+    content_sections = ["method", "abstract"]
     
     async def run(self, paper_content: str, **kwargs) -> str:
         prompt = """
@@ -19,6 +20,6 @@ Paper content:
 {content}
 
 Architecture description:
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        return await self.model.complete(prompt, self.get_system_prompt())
+        return await self.complete(prompt)
@@ -1,11 +1,32 @@
+import json
 from abc import ABC, abstractmethod
-from typing import Any, Optional
+from typing import Any, List, Optional
 from app.adapters.model_adapter import BaseModelAdapter
+from app.tools.prompt_budget import PromptBudget, complete_with_estimate
 
 class BaseTool(ABC):
     name: str
     description: str
     
+    # Fused extraction: JSON tools that can share one LLM call with other fusable tools.
+    # fused_instruction describes the expected value for this tool's key in the combined object.
+    fusable: bool = False
+    fused_instruction: str = ""
+    fused_type: type = dict
+    
+    # Paper content budget in tokens (scaled by PROMPT_BUDGET_SCALE, capped by the model's context)
+    content_tokens: int = 3000
+    # Sections this tool reads, in priority order (names from app.parsers.section_segmenter);
+    # empty means the start of the paper
+    content_sections: List[str] = []
+    # When none of content_sections is found in a paper, the passages most similar to this text
+    # (from the embedding index, see app.services.embedding_index) are read instead of the start
+    retrieval_query: str = ""
+    
+    # Bump when the tool's prompts or parsing change: results from older versions become stale
+    # and are recomputed by the "stale" analysis mode (see app.services.fingerprint)
+    prompt_version: int = 1
+    
     def __init__(self, model: BaseModelAdapter):
         self.model = model
     
@@ -15,3 +36,37 @@ class BaseTool(ABC):
     
     def get_system_prompt(self) -> str:
         return "You are a research paper analyzer. Provide accurate, concise analysis based on the paper content."
+    
+    def select_content(self, paper_content: str, sections: Optional[List[dict]] = None, reserved_tokens: int = 0) -> str:
+        """Prompt content: this tool's sections (or retrieved passages, or the paper prefix) within its token budget"""
+        wanted = self.content_sections
+        if self.retrieval_query and sections and not any(s["name"] in wanted for s in sections):
+            wanted = [f"retrieved:{self.name}"]
+        return PromptBudget(self.model).fit(
+            paper_content, sections, wanted, self.content_tokens, reserved_tokens
+        )
+    
+    async def complete(self, prompt: str) -> str:
+        """Call the model with this tool's system prompt, recording estimated token usage"""
+        return await complete_with_estimate(self.model, self.name, prompt, self.get_system_prompt())
+    
+    def parse_fused(self, value: Any) -> Any:
+        """
+        Validate this tool's slice of a fused response; raise ValueError to fall back to an
+        individual call. null (the prompt allows it for "no information") is the empty value.
+        """
+        if value is None:
+            return self.fused_type()
+        if not isinstance(value, self.fused_type):
+            raise ValueError(f"{self.name}: expected {self.fused_type.__name__}, got {type(value).__name__}")
+        return value
+
+
+def parse_json_response(response: str) -> Any:
+    """Parse a JSON model response, stripping a surrounding ``` / ```json fence"""
+    cleaned = response.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.split("```")[1]
+        if cleaned.startswith("json"):
+            cleaned = cleaned[4:]
+    return json.loads(cleaned)
@@ -4,6 +4,11 @@ from app.tools.base import BaseTool
 class BaselineExtractor(BaseTool):
     name = "baseline_extractor"
     description = "Extracts baseline methods/systems for comparison"
+    fusable = True
+    fused_type = list
+    content_tokens = 3000
+    content_sections = ["experiments", "results", "related_work"]
+    fused_instruction = "Array of strings naming the baseline methods, models, or systems this paper compares against"
     
     async def run(self, paper_content: str, **kwargs) -> list:
         prompt = """
@@ -14,9 +19,9 @@ Paper content:
 {content}
 
 Baselines (JSON array):
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             cleaned = response.strip()
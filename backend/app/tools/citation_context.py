@@ -4,6 +4,8 @@ from app.tools.base import BaseTool
 class CitationContext(BaseTool):
     name = "citation_context"
     description = "Extracts key citations and their context"
+    content_sections = ["introduction", "related_work", "background"]
+    retrieval_query = "prior work cited by this paper (et al.), the methods and results it builds on, compares with or extends"
     
     async def run(self, paper_content: str, **kwargs) -> list:
         prompt = """
@@ -15,9 +17,9 @@ Paper content:
 {content}
 
 Key citations (JSON array):
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             cleaned = response.strip()
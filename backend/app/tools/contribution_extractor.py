@@ -4,6 +4,11 @@ from app.tools.base import BaseTool
 class ContributionExtractor(BaseTool):
     name = "contribution_extractor"
     description = "Extracts key contributions as a list"
+    fusable = True
+    fused_type = list
+    content_tokens = 3000
+    content_sections = ["abstract", "introduction", "conclusion"]
+    fused_instruction = "Array of strings, the main contributions of the paper (typically 3-5)"
     
     async def run(self, paper_content: str, **kwargs) -> list:
         prompt = """
@@ -14,9 +19,9 @@ Paper content:
 {content}
 
 Contributions (JSON array):
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             cleaned = response.strip()
@@ -1,4 +1,5 @@
 from app.tools.base import BaseTool
+from app.tools.prompt_budget import estimate_tokens
 
 class CustomPromptTool(BaseTool):
     name = "custom_prompt"
@@ -15,6 +16,8 @@ Paper content:
 {content}
 
 Result:
-""".format(custom_prompt=custom_prompt, content=paper_content[:12000])
+""".format(custom_prompt=custom_prompt, content=self.select_content(
+            paper_content, kwargs.get("sections"), reserved_tokens=estimate_tokens(custom_prompt)
+        ))
         
-        return await self.model.complete(prompt, self.get_system_prompt())
+        return await self.complete(prompt)
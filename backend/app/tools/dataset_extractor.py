@@ -4,6 +4,11 @@ from app.tools.base import BaseTool
 class DatasetExtractor(BaseTool):
     name = "dataset_extractor"
     description = "Extracts dataset information"
+    fusable = True
+    fused_type = list
+    content_tokens = 3000
+    content_sections = ["experiments", "method", "results"]
+    fused_instruction = "Array of objects, one per dataset used, with fields: name, size (if mentioned), source/url (if mentioned), description"
     
     async def run(self, paper_content: str, **kwargs) -> list:
         prompt = """
@@ -15,9 +20,9 @@ Paper content:
 {content}
 
 Datasets (JSON array):
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             cleaned = response.strip()
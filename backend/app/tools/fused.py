@@ -0,0 +1,61 @@
+from typing import Any, Dict, List, Optional
+from app.adapters.model_adapter import BaseModelAdapter
+from app.tools.prompt_budget import PromptBudget, complete_with_estimate
+from app.tools.base import BaseTool, parse_json_response
+
+class FusedExtractor:
+    """
+    Runs several fusable JSON tools in one LLM call: the paper content is sent once
+    and the model returns a single JSON object keyed by tool name.
+    """
+    
+    def __init__(self, model: BaseModelAdapter, tools: List[BaseTool]):
+        self.model = model
+        self.tools = tools
+        # Budget when the content is the paper's start: every member would read that same prefix
+        self.content_tokens = max(tool.content_tokens for tool in tools)
+        # Union of the members' sections (first-listed first); any member reading the prefix wins
+        self.content_sections = []
+        if all(tool.content_sections for tool in tools):
+            for tool in tools:
+                self.content_sections += [s for s in tool.content_sections if s not in self.content_sections]
+    
+    def build_prompt(self, paper_content: str, sections: Optional[List[dict]] = None) -> str:
+        fields = "\n".join(f'- "{tool.name}": {tool.fused_instruction}' for tool in self.tools)
+        return """
+Analyze this research paper and extract several pieces of information at once.
+Return a single JSON object with exactly these keys, no explanation:
+
+{fields}
+
+Use null, [] or {{}} where the paper gives no information.
+
+Paper content:
+{content}
+
+Return JSON only:
+""".format(fields=fields, content=self.select_content(paper_content, sections))
+    
+    def content_budget(self, sections: Optional[List[dict]] = None) -> int:
+        """
+        Tokens for the union of the members' sections: each member that finds its sections in
+        this paper brings its own budget for them. With none found, the prefix budget.
+        """
+        found = {s["name"] for s in sections or []}
+        owners = [tool for tool in self.tools if found.intersection(tool.content_sections)]
+        if not self.content_sections or not owners:
+            return self.content_tokens
+        return sum(tool.content_tokens for tool in owners)
+    
+    def select_content(self, paper_content: str, sections: Optional[List[dict]] = None) -> str:
+        return PromptBudget(self.model).fit(paper_content, sections, self.content_sections, self.content_budget(sections))
+    
+    async def run(self, paper_content: str, sections: Optional[List[dict]] = None) -> Dict[str, Any]:
+        """Returns the raw per-tool values; raises if the response is not a JSON object"""
+        response = await complete_with_estimate(
+            self.model, "fused", self.build_prompt(paper_content, sections), self.tools[0].get_system_prompt()
+        )
+        parsed = parse_json_response(response)
+        if not isinstance(parsed, dict):
+            raise ValueError("Fused response is not a JSON object")
+        return parsed
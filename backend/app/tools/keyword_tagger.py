@@ -4,6 +4,11 @@ from app.tools.base import BaseTool
 class KeywordTagger(BaseTool):
     name = "keyword_tagger"
     description = "Extracts research field, technologies, and keywords"
+    fusable = True
+    fused_type = dict
+    content_tokens = 2000
+    content_sections = ["front", "abstract", "introduction"]
+    fused_instruction = "Object with fields: field (list of research fields), technologies (list of technologies/frameworks used), keywords (list of important keywords/terms)"
     
     async def run(self, paper_content: str, **kwargs) -> dict:
         prompt = """
@@ -17,9 +22,9 @@ Paper content:
 {content}
 
 Return JSON only:
-""".format(content=paper_content[:8000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             cleaned = response.strip()
@@ -4,6 +4,7 @@ from app.tools.base import BaseTool
 class LimitationFinder(BaseTool):
     name = "limitation_finder"
     description = "Finds limitations and future work"
+    content_sections = ["limitations", "discussion", "conclusion"]
     
     async def run(self, paper_content: str, **kwargs) -> dict:
         prompt = """
@@ -14,9 +15,9 @@ Paper content:
 {content}
 
 Return JSON only:
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             cleaned = response.strip()
@@ -4,6 +4,11 @@ from app.tools.base import BaseTool
 class MetadataExtractor(BaseTool):
     name = "metadata_extractor"
     description = "Extracts title, authors, year, affiliation, and links from paper"
+    fusable = True
+    fused_type = dict
+    content_tokens = 2000
+    content_sections = ["front", "abstract"]
+    fused_instruction = "Object with fields: title, authors (list of names), year (integer), affiliation (primary institution), venue, github_url (null if not found), doi (null if not found)"
     
     async def run(self, paper_content: str, **kwargs) -> dict:
         prompt = """
@@ -22,9 +27,9 @@ Paper content:
 {content}
 
 Return JSON only:
-""".format(content=paper_content[:8000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             # Clean response and parse JSON
@@ -3,6 +3,7 @@ from app.tools.base import BaseTool
 class MethodologyAnalyzer(BaseTool):
     name = "methodology_analyzer"
     description = "Analyzes the methodology and approach"
+    content_sections = ["method", "abstract", "introduction"]
     
     async def run(self, paper_content: str, **kwargs) -> str:
         prompt = """
@@ -22,6 +23,6 @@ Structure the analysis exactly as follows:
 
 Paper content:
 {content}
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        return await self.model.complete(prompt, self.get_system_prompt())
+        return await self.complete(prompt)
@@ -4,6 +4,11 @@ from app.tools.base import BaseTool
 class MetricExtractor(BaseTool):
     name = "metric_extractor"
     description = "Extracts evaluation metrics and results"
+    fusable = True
+    fused_type = dict
+    content_tokens = 3750
+    content_sections = ["results", "experiments", "abstract"]
+    fused_instruction = 'Object with keys "metrics" (list of metric names used) and "results" (object mapping each metric name to the reported value of the main proposed method, e.g. "94.5%")'
     
     async def run(self, paper_content: str, **kwargs) -> dict:
         prompt = """
@@ -21,9 +26,9 @@ Paper content:
 {content}
 
 Return ONLY valid JSON:
-""".format(content=paper_content[:15000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             cleaned = response.strip()
@@ -3,6 +3,8 @@ from app.tools.base import BaseTool
 class OneSentenceSummary(BaseTool):
     name = "one_sentence_summary"
     description = "Generates a single sentence summary"
+    content_tokens = 2000
+    content_sections = ["abstract", "introduction", "conclusion"]
     
     async def run(self, paper_content: str, **kwargs) -> str:
         prompt = """
@@ -13,6 +15,6 @@ Paper content:
 {content}
 
 One sentence summary:
-""".format(content=paper_content[:8000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        return await self.model.complete(prompt, self.get_system_prompt())
+        return await self.complete(prompt)
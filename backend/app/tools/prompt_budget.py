@@ -0,0 +1,149 @@
+import logging
+import math
+import re
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+from app.adapters.model_adapter import BaseModelAdapter
+from app.config import settings
+from app.parsers.section_segmenter import select_sections
+
+logger = logging.getLogger(__name__)
+
+# Letter runs, digit runs, single non-space symbols (CJK / Hangul characters fall in the last group)
+_PIECES = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """
+    Fast local token estimate (no tokenizer download, no network).
+    BPE vocabularies encode most English words as one token and longer ones as ~1 token per
+    6 letters, numbers in groups of up to 3 digits, and punctuation / non-Latin characters
+    as roughly one token each.
+    """
+    if not text:
+        return 0
+    tokens = 0
+    for piece in _PIECES.findall(text):
+        first = piece[0]
+        if first.isascii() and first.isalpha():
+            tokens += math.ceil(len(piece) / 6)
+        elif first.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+@dataclass
+class TokenEstimate:
+    input_tokens: int
+    output_tokens: int
+
+
+class PromptBudget:
+    """
+    Fits paper content into a tool's token budget, capped by what the model can take:
+    context window minus reserved output tokens and instruction overhead.
+    """
+
+    def __init__(self, model: BaseModelAdapter):
+        self.context_window = getattr(model, "context_window", BaseModelAdapter.context_window)
+        self.max_output_tokens = getattr(model, "max_output_tokens", BaseModelAdapter.max_output_tokens)
+
+    def content_budget(self, tool_tokens: int, reserved_tokens: int = 0) -> int:
+        """Tokens available for paper content"""
+        available = self.context_window - self.max_output_tokens - settings.PROMPT_RESERVED_TOKENS - reserved_tokens
+        return max(0, min(int(tool_tokens * settings.PROMPT_BUDGET_SCALE), available))
+
+    def fit(
+        self,
+        paper_content: str,
+        sections: Optional[List[dict]],
+        wanted: List[str],
+        tool_tokens: int,
+        reserved_tokens: int = 0,
+    ) -> str:
+        """The wanted sections (or the paper prefix) trimmed to the content budget"""
+        budget = self.content_budget(tool_tokens, reserved_tokens)
+        total = estimate_tokens(paper_content)
+        if total <= budget and not wanted:
+            return paper_content
+
+        # Convert the token budget to characters at this paper's own density, then verify
+        chars = int(budget * len(paper_content) / max(total, 1))
+        for _ in range(3):
+            selected = select_sections(paper_content, sections, wanted, chars)
+            if selected is None:
+                selected = paper_content[:chars]
+            tokens = estimate_tokens(selected)
+            if tokens <= budget:
+                break
+            chars = int(chars * budget / tokens * 0.95)
+        return selected
+
+    def estimate(self, prompt: str, system_prompt: Optional[str] = None) -> TokenEstimate:
+        """Estimated input tokens, and the output tokens the call may use at most"""
+        return TokenEstimate(estimate_tokens(prompt) + estimate_tokens(system_prompt), self.max_output_tokens)
+
+
+class TokenUsage:
+    """Running totals of estimated tokens per provider and tool, for throughput planning"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, Dict[str, int]]] = {}
+
+    def record(self, provider: str, tool: str, input_tokens: int, output_tokens: int):
+        with self._lock:
+            entry = self._totals.setdefault(provider or "unknown", {}).setdefault(
+                tool, {"calls": 0, "input_tokens": 0, "output_tokens": 0}
+            )
+            entry["calls"] += 1
+            entry["input_tokens"] += input_tokens
+            entry["output_tokens"] += output_tokens
+
+    def stats(self) -> dict:
+        with self._lock:
+            providers = {}
+            for provider, tools in self._totals.items():
+                calls = sum(t["calls"] for t in tools.values())
+                input_tokens = sum(t["input_tokens"] for t in tools.values())
+                output_tokens = sum(t["output_tokens"] for t in tools.values())
+                providers[provider] = {
+                    "calls": calls,
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "avg_input_tokens": round(input_tokens / calls) if calls else 0,
+                    "avg_output_tokens": round(output_tokens / calls) if calls else 0,
+                    "tools": {name: dict(t) for name, t in tools.items()},
+                }
+            return providers
+
+
+token_usage = TokenUsage()
+
+
+# Receives the text generated so far while a tool's model call streams. Set per task (one
+# analysis cell or fused call) by the orchestrator; when unset, calls don't stream.
+partial_listener: ContextVar[Optional[Callable[[str], None]]] = ContextVar("partial_listener", default=None)
+
+
+async def complete_with_estimate(
+    model: BaseModelAdapter, tool_name: str, prompt: str, system_prompt: Optional[str] = None
+) -> str:
+    """Call the model, logging and recording estimated input tokens and (from the response) output tokens"""
+    estimate = PromptBudget(model).estimate(prompt, system_prompt)
+    listener = partial_listener.get()
+    if listener is None:
+        response = await model.complete(prompt, system_prompt)
+    else:
+        response = ""
+        async for chunk in model.stream(prompt, system_prompt):
+            response += chunk
+            listener(response)
+    output_tokens = estimate_tokens(response)
+    logger.debug(f"{tool_name}: ~{estimate.input_tokens} input / ~{output_tokens} output tokens")
+    token_usage.record(getattr(model, "provider", ""), tool_name, estimate.input_tokens, output_tokens)
+    return response
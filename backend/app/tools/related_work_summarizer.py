@@ -3,6 +3,8 @@ from app.tools.base import BaseTool
 class RelatedWorkSummarizer(BaseTool):
     name = "related_work_summarizer"
     description = "Summarizes related work section"
+    content_sections = ["related_work", "background", "introduction"]
+    retrieval_query = "related work and previous approaches to this problem, and how this paper differs from them"
     
     async def run(self, paper_content: str, **kwargs) -> str:
         prompt = """
@@ -19,6 +21,6 @@ Structure the summary exactly as follows:
 
 Paper content:
 {content}
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        return await self.model.complete(prompt, self.get_system_prompt())
+        return await self.complete(prompt)
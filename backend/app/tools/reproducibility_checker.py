@@ -4,6 +4,11 @@ from app.tools.base import BaseTool
 class ReproducibilityChecker(BaseTool):
     name = "reproducibility_checker"
     description = "Checks code/data availability and reproducibility info"
+    fusable = True
+    fused_type = dict
+    content_tokens = 3000
+    content_sections = ["front", "abstract", "experiments", "conclusion", "appendix"]
+    fused_instruction = "Object with fields: code_available (boolean), code_url, data_available (boolean), data_url, environment_info, reproducibility_notes"
     
     async def run(self, paper_content: str, **kwargs) -> dict:
         prompt = """
@@ -20,9 +25,9 @@ Paper content:
 {content}
 
 Return JSON only:
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             cleaned = response.strip()
@@ -4,6 +4,11 @@ from app.tools.base import BaseTool
 class ResearchQuestionExtractor(BaseTool):
     name = "research_question_extractor"
     description = "Extracts research questions"
+    fusable = True
+    fused_type = list
+    content_tokens = 3000
+    content_sections = ["abstract", "introduction", "experiments"]
+    fused_instruction = 'Array of strings in format "RQ1: ..." (infer the main questions if none are stated explicitly)'
     
     async def run(self, paper_content: str, **kwargs) -> list:
         prompt = """
@@ -16,9 +21,9 @@ Paper content:
 {content}
 
 Research questions (JSON array):
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             cleaned = response.strip()
@@ -3,6 +3,7 @@ from app.tools.base import BaseTool
 class Summarizer(BaseTool):
     name = "summarizer"
     description = "Generates 3-5 sentence summary of the paper"
+    content_sections = ["abstract", "introduction", "method", "conclusion"]
     
     async def run(self, paper_content: str, **kwargs) -> str:
         prompt = """
@@ -23,6 +24,6 @@ Structure the summary exactly as follows:
 
 Paper content:
 {content}
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        return await self.model.complete(prompt, self.get_system_prompt())
+        return await self.complete(prompt)
@@ -4,6 +4,7 @@ from app.tools.base import BaseTool
 class ThreatToValidity(BaseTool):
     name = "threat_to_validity"
     description = "Extracts threats to validity (for SE papers)"
+    content_sections = ["limitations", "discussion", "experiments"]
     
     async def run(self, paper_content: str, **kwargs) -> dict:
         prompt = """
@@ -17,9 +18,9 @@ Paper content:
 {content}
 
 Return JSON only:
-""".format(content=paper_content[:12000])
+""".format(content=self.select_content(paper_content, kwargs.get("sections")))
         
-        response = await self.model.complete(prompt, self.get_system_prompt())
+        response = await self.complete(prompt)
         
         try:
             cleaned = response.strip()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+
+# Settings are read at import time: point the app at a throwaway database first
+_tmp = tempfile.mkdtemp(prefix="scholarpilot-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["DATA_DIR"] = _tmp
+os.environ["DEBUG_QUERY_COUNT"] = "true"
+os.environ["PDF_PARSE_WORKERS"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main  # noqa: E402 - creates and migrates the schema
+from app.database import SessionLocal
+from app.models.column import ColumnDef
+from app.models.paper import Paper
+from app.models.project import Project
+from app.models.result import Result
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    # Without the context manager the lifespan (scheduler, writer, batch runner) does not start
+    return TestClient(app.main.app)
+
+
+@pytest.fixture
+def seed_project(db):
+    """seed_project(papers, columns) -> project id, with a done result in every cell"""
+    def seed(papers: int, columns: int = 3) -> str:
+        project = Project(name="test")
+        db.add(project)
+        db.flush()
+        column_defs = [
+            ColumnDef(project_id=project.id, name=f"Column {i}", tool_name="summarizer", order_index=i)
+            for i in range(columns)
+        ]
+        db.add_all(column_defs)
+        db.flush()
+        for i in range(papers):
+            paper = Paper(project_id=project.id, title=f"Paper {i}", status="done")
+            db.add(paper)
+            db.flush()
+            db.add_all(
+                Result(paper_id=paper.id, column_id=column.id, value=f"value {i}", status="done")
+                for column in column_defs
+            )
+        db.commit()
+        return project.id
+    return seed
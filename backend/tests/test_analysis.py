@@ -0,0 +1,25 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api.analysis import get_model_name
+from app.models.settings import Settings
+
+
+def test_model_name_without_adapter():
+    assert get_model_name("openai") == "gpt-4o"
+    with pytest.raises(HTTPException) as error:
+        get_model_name("unknown")
+    assert error.value.status_code == 400
+
+
+def test_stale_preview_rejects_unknown_provider(client, db, seed_project):
+    project_id = seed_project(1)
+    setting = Settings(key="model_provider", value="unknown")
+    db.add(setting)
+    db.commit()
+    try:
+        response = client.get("/api/analyze/stale", params={"project_id": project_id})
+        assert response.status_code == 400
+    finally:
+        db.delete(setting)
+        db.commit()
@@ -0,0 +1,130 @@
+import asyncio
+import json
+
+import pytest
+
+from app.adapters import batch_api
+from app.config import settings
+from app.models.batch import BatchRun
+from app.models.column import ColumnDef
+from app.models.paper import Paper
+from app.models.project import Project
+from app.models.result import Result
+from app.models.settings import Settings
+from app.services import batch_runner as batch_runner_module
+from app.services.batch_runner import BatchRunner, create_batch_run
+from app.services.content_store import store_content
+from app.services.result_writer import result_writer
+
+PAPER_TEXT = """Abstract
+We study batch analysis of papers ({}).
+
+1 Introduction
+Batch APIs trade latency for price.
+
+2 Method
+Requests are written to JSONL files and submitted together.
+"""
+
+
+@pytest.fixture
+def fake_provider(db, monkeypatch):
+    """Route batch calls to a fresh FakeBatchServer; provider(name) selects it in the settings table"""
+    monkeypatch.setattr(settings, "BATCH_FAKE_SERVER", True)
+    monkeypatch.setattr(settings, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(batch_api, "_fake_client", None)
+
+    def provider(name: str):
+        for key, value in (("model_provider", name), ("api_key", "test-key")):
+            row = db.get(Settings, key) or Settings(key=key)
+            row.value = value
+            db.merge(row)
+        db.commit()
+    yield provider
+    db.query(Settings).filter(Settings.key.in_(["model_provider", "api_key"])).delete(synchronize_session=False)
+    db.commit()
+
+
+def _batch_run(db, provider: str, papers: int = 2) -> str:
+    project = Project(name="batch")
+    db.add(project)
+    db.flush()
+    db.add_all([
+        ColumnDef(project_id=project.id, name="Summary", tool_name="summarizer", order_index=0),
+        ColumnDef(project_id=project.id, name="Keywords", tool_name="keyword_tagger", order_index=1),
+    ])
+    rows = []
+    for i in range(papers):
+        paper = Paper(project_id=project.id, title=f"Paper {i}", content_hash=store_content(db, PAPER_TEXT.format(f"paper {project.id} {i}")))
+        db.add(paper)
+        rows.append(paper)
+    db.flush()
+    run = create_batch_run(db, rows, provider, None, project.id)
+    db.commit()
+    return run.id
+
+
+def _drive(run_id: str, steps: int):
+    async def drive():
+        runner = BatchRunner(poll_interval=60)
+        await result_writer.start()
+        try:
+            for _ in range(steps):
+                await runner.step(run_id)
+        finally:
+            await result_writer.stop()
+    asyncio.run(drive())
+
+
+@pytest.mark.parametrize("provider", ["openai", "claude"])
+def test_run_goes_pending_submitted_completed(db, fake_provider, provider):
+    fake_provider(provider)
+    run_id = _batch_run(db, provider)
+
+    _drive(run_id, 1)
+    run = db.get(BatchRun, run_id)
+    assert run.status == "submitted"
+    assert run.provider_batch_id and run.request_count == 4
+
+    # The fake batch reports in progress for the first status check
+    _drive(run_id, 1)
+    db.refresh(run)
+    assert run.status == "submitted"
+
+    _drive(run_id, 1)
+    db.refresh(run)
+    assert run.status == "completed", run.error_message
+    assert (run.succeeded_count, run.failed_count) == (4, 0)
+    assert batch_api.batch_request_files(run_id) == []
+
+    paper_ids = json.loads(run.paper_ids)
+    db.expire_all()
+    assert {p.status for p in db.query(Paper).filter(Paper.id.in_(paper_ids))} == {"done"}
+    results = db.query(Result).filter(Result.paper_id.in_(paper_ids)).all()
+    assert len(results) == 4 and {r.status for r in results} == {"done"}
+
+
+def test_large_run_is_split_into_several_batches(db, fake_provider, monkeypatch):
+    fake_provider("openai")
+    # Room for about one request per file
+    monkeypatch.setattr(batch_runner_module, "FILE_HEADROOM_BYTES", 0)
+    monkeypatch.setattr(batch_api.OpenAIBatchClient, "max_file_bytes", 3000)
+    run_id = _batch_run(db, "openai", papers=3)
+
+    _drive(run_id, 3)
+    run = db.get(BatchRun, run_id)
+    assert run.status == "completed", run.error_message
+    assert len(run.provider_batch_id.split(",")) > 1
+    assert (run.succeeded_count, run.failed_count) == (6, 0)
+
+
+def test_request_count_limit_splits_batches(db, fake_provider, monkeypatch):
+    fake_provider("claude")
+    monkeypatch.setattr(settings, "BATCH_MAX_REQUESTS", 4)
+    run_id = _batch_run(db, "claude", papers=3)
+
+    _drive(run_id, 1)
+    run = db.get(BatchRun, run_id)
+    assert run.status == "submitted"
+    assert len(run.provider_batch_id.split(",")) == 2
+    assert len(batch_api.batch_request_files(run_id)) == 2
@@ -0,0 +1,45 @@
+from app.models.paper import Paper
+from app.services.content_store import store_content
+from app.services.embedding_index import embedding_index
+
+TEXTS = {
+    "graphs": "Abstract\nGraph neural networks learn node embeddings by message passing over graph edges.\n",
+    "graphs2": "Abstract\nMessage passing graph neural networks for node classification on citation graphs.\n",
+    "baking": "Abstract\nSourdough bread baking depends on flour hydration, fermentation time and oven temperature.\n",
+}
+
+
+def _seed(db, seed_project):
+    project_id = seed_project(0)
+    papers = {}
+    for name, text in TEXTS.items():
+        paper = Paper(project_id=project_id, title=name, status="done", content_hash=store_content(db, text))
+        db.add(paper)
+        papers[name] = paper
+    db.commit()
+    return project_id, papers
+
+
+def test_similar_papers_are_indexed_in_the_background(client, db, seed_project):
+    _, papers = _seed(db, seed_project)
+    url = f"/api/papers/{papers['graphs'].id}/similar"
+
+    first = client.get(url)
+    assert first.status_code == 202 and int(first.headers["X-Index-Pending"]) > 0
+    assert embedding_index.wait_indexed(timeout=30)
+
+    ready = client.get(url)
+    assert ready.status_code == 200 and "X-Index-Pending" not in ready.headers
+    assert [hit["title"] for hit in ready.json()] == ["graphs2", "baking"]
+
+
+def test_relevant_chunks(client, db, seed_project):
+    project_id, _ = _seed(db, seed_project)
+    url = f"/api/projects/{project_id}/chunks"
+    client.get(url, params={"q": "bread fermentation"})
+    assert embedding_index.wait_indexed(timeout=30)
+
+    response = client.get(url, params={"q": "bread fermentation", "limit": 1})
+    assert response.status_code == 200
+    (hit,) = response.json()
+    assert hit["title"] == "baking" and "Sourdough" in hit["text"]
@@ -0,0 +1,65 @@
+import asyncio
+
+from app.services.event_bus import RESYNC, InMemoryEventBackend
+
+
+async def _drain(subscription):
+    deliveries = []
+    while (delivery := await subscription.get(timeout=0.01)) is not None:
+        deliveries.append(delivery)
+    return deliveries
+
+
+def test_resume_from_cursor():
+    async def run():
+        bus = InMemoryEventBackend(buffer_size=10, queue_size=10)
+        live = await bus.subscribe("p", None)
+        for i in range(3):
+            bus.append("p", {"n": i})
+        bus.broadcast("p", {"partial": True})
+        delivered = await _drain(live)
+        assert [event for _, event in delivered] == [{"n": 0}, {"n": 1}, {"n": 2}, {"partial": True}]
+        # Live-only events have no cursor and are not replayed
+        assert delivered[-1][0] is None
+        await live.close()
+        assert not bus.has_subscribers("p")
+
+        resumed = await bus.subscribe("p", delivered[0][0])
+        assert [event for _, event in await _drain(resumed)] == [{"n": 1}, {"n": 2}]
+        # Up to date: nothing to replay
+        caught_up = await bus.subscribe("p", delivered[2][0])
+        assert await _drain(caught_up) == []
+
+    asyncio.run(run())
+
+
+def test_unresumable_cursors_resync():
+    async def run():
+        bus = InMemoryEventBackend(buffer_size=2, queue_size=10)
+        first = await bus.subscribe("p", None)
+        for i in range(5):
+            bus.append("p", {"n": i})
+        cursors = [cursor for cursor, _ in await _drain(first)]
+
+        evicted = cursors[0]  # events after it have left the ring buffer
+        other_epoch = "0000000-" + cursors[-1].partition("-")[2]
+        future = f"{bus.epoch}-99"
+        for cursor in (evicted, other_epoch, future, "garbage"):
+            subscription = await bus.subscribe("p", cursor)
+            assert await _drain(subscription) == [(None, RESYNC)]
+        # The oldest kept event's predecessor can still resume
+        subscription = await bus.subscribe("p", cursors[2])
+        assert [event for _, event in await _drain(subscription)] == [{"n": 3}, {"n": 4}]
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_gets_resync_instead_of_backlog():
+    async def run():
+        bus = InMemoryEventBackend(buffer_size=10, queue_size=2)
+        slow = await bus.subscribe("p", None)
+        for i in range(3):
+            bus.append("p", {"n": i})
+        assert await _drain(slow) == [(None, RESYNC)]
+
+    asyncio.run(run())
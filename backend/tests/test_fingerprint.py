@@ -0,0 +1,21 @@
+from app.config import settings
+from app.models.column import ColumnDef
+from app.services.fingerprint import result_fingerprint
+
+
+def _fingerprint(tool_name: str) -> str:
+    return result_fingerprint(ColumnDef(id="c", tool_name=tool_name), "model-a", "content-hash")
+
+
+def test_fingerprint_depends_on_model_and_content():
+    column = ColumnDef(id="c", tool_name="summarizer")
+    assert result_fingerprint(column, "model-a", "h1") == result_fingerprint(column, "model-a", "h1")
+    assert result_fingerprint(column, "model-a", "h1") != result_fingerprint(column, "model-b", "h1")
+    assert result_fingerprint(column, "model-a", "h1") != result_fingerprint(column, "model-a", "h2")
+
+
+def test_retrieval_tools_depend_on_the_embedder(monkeypatch):
+    retrieval, plain = _fingerprint("citation_context"), _fingerprint("summarizer")
+    monkeypatch.setattr(settings, "EMBEDDING_HASH_DIM", settings.EMBEDDING_HASH_DIM * 2)
+    assert _fingerprint("citation_context") != retrieval
+    assert _fingerprint("summarizer") == plain
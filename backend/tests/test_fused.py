@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+from app.adapters.model_adapter import OpenAIAdapter
+from app.agents.orchestrator import OrchestratorAgent
+from app.models.column import ColumnDef
+from app.tools.fused import FusedExtractor
+from app.tools.keyword_tagger import KeywordTagger
+from app.tools.metric_extractor import MetricExtractor
+
+
+def _sections(*names):
+    return [{"name": name, "title": name, "start": 0, "end": 0} for name in names]
+
+
+def test_each_member_with_sections_brings_its_budget():
+    model = OpenAIAdapter("")
+    keywords, metrics = KeywordTagger(model), MetricExtractor(model)
+    fused = FusedExtractor(model, [keywords, metrics])
+
+    both = fused.content_budget(_sections("abstract", "results"))
+    assert both == keywords.content_tokens + metrics.content_tokens
+    # Only the metric extractor's results section is present
+    assert fused.content_budget(_sections("results")) == metrics.content_tokens
+    # No member's sections found: everyone reads the paper's start
+    assert fused.content_budget(_sections("method")) == max(keywords.content_tokens, metrics.content_tokens)
+
+
+class FusedAdapter(OpenAIAdapter):
+    """Answers every call with the same fused response"""
+    def __init__(self, response: dict):
+        super().__init__("")
+        self.response = response
+        self.calls = 0
+
+    async def complete(self, prompt, system_prompt=None):
+        self.calls += 1
+        return json.dumps(self.response)
+
+
+def _columns(*tool_names):
+    return [ColumnDef(id=name, project_id="p", name=name, tool_name=name, order_index=i) for i, name in enumerate(tool_names)]
+
+
+def test_null_slice_is_empty_without_fallback():
+    model = FusedAdapter({"keyword_tagger": None, "metric_extractor": {"metrics": ["F1"], "results": {}}})
+    agent = OrchestratorAgent(model, max_concurrency=1, fuse=True)
+
+    results = asyncio.run(agent.analyze_paper("Paper text", _columns("keyword_tagger", "metric_extractor")))
+    assert model.calls == 1
+    assert results["keyword_tagger"] == {"status": "done", "value": {}, "error_message": None}
+    assert results["metric_extractor"]["value"]["metrics"] == ["F1"]
+
+
+def test_missing_slice_falls_back():
+    model = FusedAdapter({"metric_extractor": {"metrics": [], "results": {}}})
+    agent = OrchestratorAgent(model, max_concurrency=1, fuse=True)
+
+    asyncio.run(agent.analyze_paper("Paper text", _columns("keyword_tagger", "metric_extractor")))
+    assert model.calls == 2
@@ -0,0 +1,184 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal
+from app.models.job import AnalysisJob
+from app.models.paper import Paper
+from app.services import job_queue
+from app.services.job_queue import (
+    JobQueueWorker, WORKER_ID, claim_job, enqueue_job, finish_job, recover_expired_jobs
+)
+from app.services.scheduler import PRIORITY_RETRY
+
+
+def _paper(db, seed_project) -> Paper:
+    project_id = seed_project(1)
+    return db.query(Paper).filter(Paper.project_id == project_id).one()
+
+
+def test_enqueue_coalesces_queued_jobs(db, seed_project):
+    paper = _paper(db, seed_project)
+    job, created = enqueue_job(db, paper.id, paper.project_id, column_ids=["a"])
+    db.commit()
+    assert created
+
+    again, created = enqueue_job(db, paper.id, paper.project_id, priority=PRIORITY_RETRY, column_ids=["b"])
+    db.commit()
+    assert not created and again.id == job.id
+    assert again.priority == PRIORITY_RETRY
+    assert json.loads(again.column_ids) == ["a", "b"]
+
+
+def test_running_job_gets_a_follow_up_for_new_columns(db, seed_project):
+    paper = _paper(db, seed_project)
+    job, _ = enqueue_job(db, paper.id, paper.project_id, column_ids=["a"])
+    db.commit()
+    assert claim_job(db, job.id)
+
+    covered, created = enqueue_job(db, paper.id, paper.project_id, column_ids=["a"])
+    assert not created and covered.id == job.id
+    follow_up, created = enqueue_job(db, paper.id, paper.project_id, column_ids=["b"])
+    db.commit()
+    assert created and follow_up.status == "queued"
+
+
+def test_claim_and_finish(db, seed_project):
+    paper = _paper(db, seed_project)
+    job, _ = enqueue_job(db, paper.id, paper.project_id)
+    db.commit()
+
+    assert claim_job(db, job.id)
+    assert not claim_job(db, job.id)
+    db.refresh(job)
+    assert (job.status, job.lease_owner, job.attempts) == ("running", WORKER_ID, 1)
+
+    finish_job(db, job.id, "boom")
+    db.refresh(job)
+    assert (job.status, job.lease_owner, job.last_error) == ("queued", None, "boom")
+
+    assert claim_job(db, job.id)
+    finish_job(db, job.id)
+    db.refresh(job)
+    assert job.status == "done"
+
+
+def test_expired_lease_is_recovered(db, seed_project):
+    paper = _paper(db, seed_project)
+    job, _ = enqueue_job(db, paper.id, paper.project_id)
+    db.commit()
+    assert claim_job(db, job.id)
+    job.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    paper.status = "processing"
+    db.commit()
+
+    assert recover_expired_jobs(db) >= 1
+    db.refresh(job)
+    db.refresh(paper)
+    assert (job.status, job.lease_owner, paper.status) == ("queued", None, "queued")
+
+
+def test_run_paper_releases_the_lease(db, seed_project):
+    paper = _paper(db, seed_project)
+    job, _ = enqueue_job(db, paper.id, paper.project_id)
+    db.commit()
+    processed = []
+
+    async def processor(paper_id, project_id, column_ids):
+        processed.append((paper_id, column_ids))
+
+    worker = JobQueueWorker(poll_interval=60)
+    worker._processor = processor
+    asyncio.run(worker.run_paper(paper.id, paper.project_id))
+
+    db.refresh(job)
+    assert processed == [(paper.id, None)]
+    assert (job.status, job.lease_owner) == ("done", None)
+
+
+def test_cancelled_run_is_requeued(db, seed_project):
+    paper = _paper(db, seed_project)
+    job, _ = enqueue_job(db, paper.id, paper.project_id)
+    paper.status = "processing"
+    db.commit()
+
+    async def processor(paper_id, project_id, column_ids):
+        await asyncio.sleep(60)
+
+    async def run_and_cancel():
+        worker = JobQueueWorker(poll_interval=60)
+        worker._processor = processor
+        task = asyncio.create_task(worker.run_paper(paper.id, paper.project_id))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run_and_cancel())
+    db.refresh(job)
+    db.refresh(paper)
+    assert (job.status, job.lease_owner, job.attempts) == ("queued", None, 0)
+    assert paper.status == "queued"
+
+
+def test_retry_of_a_running_cell_gets_a_follow_up(db, seed_project):
+    paper = _paper(db, seed_project)
+    job, _ = enqueue_job(db, paper.id, paper.project_id)
+    db.commit()
+    assert claim_job(db, job.id)
+
+    # The running job covers every column, but may already be past the retried one
+    follow_up, created = enqueue_job(db, paper.id, paper.project_id, PRIORITY_RETRY, ["c1"], absorb_running=False)
+    db.commit()
+    assert created and follow_up.id != job.id and follow_up.status == "queued"
+
+
+def test_finished_run_submits_the_follow_up(db, seed_project, monkeypatch):
+    paper = _paper(db, seed_project)
+    job, _ = enqueue_job(db, paper.id, paper.project_id)
+    db.commit()
+    submitted = []
+
+    async def submit(paper_id, project_id, provider, priority):
+        submitted.append((paper_id, priority))
+        return True
+
+    async def processor(paper_id, project_id, column_ids):
+        # A retry arrives while the paper is running
+        session = SessionLocal()
+        try:
+            enqueue_job(session, paper_id, project_id, PRIORITY_RETRY, ["c1"], absorb_running=False)
+            session.commit()
+        finally:
+            session.close()
+
+    monkeypatch.setattr(job_queue.analysis_scheduler, "submit", submit)
+    worker = JobQueueWorker(poll_interval=60)
+    worker._processor = processor
+    asyncio.run(worker.run_paper(paper.id, paper.project_id))
+
+    db.refresh(job)
+    assert job.status == "done"
+    assert submitted == [(paper.id, PRIORITY_RETRY)]
+
+
+def test_failed_analysis_is_retried_then_failed(db, seed_project):
+    from app.api.analysis import process_paper_task
+
+    paper = _paper(db, seed_project)
+    job, _ = enqueue_job(db, paper.id, paper.project_id)
+    job.max_attempts = 2
+    db.commit()
+    worker = JobQueueWorker(poll_interval=60)
+    worker._processor = process_paper_task
+
+    # No API key is configured: the analysis fails before any LLM call
+    for expected in ("queued", "failed"):
+        try:
+            asyncio.run(worker.run_paper(paper.id, paper.project_id))
+        except ValueError:
+            pass
+        db.refresh(job)
+        db.refresh(paper)
+        assert job.status == expected and "API Key" in job.last_error
+        assert paper.status == "error"
+    assert job.attempts == 2
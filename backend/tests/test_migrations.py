@@ -0,0 +1,98 @@
+"""Startup schema path (create_all, then Alembic) on a fresh and on a pre-migration database"""
+import sqlalchemy as sa
+
+from app.config import settings
+from app.database import Base, run_migrations
+
+# Schema as created by the first release, before any migration existed
+BASELINE_SCHEMA = [
+    "CREATE TABLE projects (id VARCHAR PRIMARY KEY, name VARCHAR NOT NULL, template VARCHAR, created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE columns (id VARCHAR PRIMARY KEY, project_id VARCHAR NOT NULL REFERENCES projects(id), name VARCHAR NOT NULL, "
+    "tool_name VARCHAR, custom_prompt TEXT, order_index INTEGER, created_at DATETIME)",
+    "CREATE TABLE papers (id VARCHAR PRIMARY KEY, project_id VARCHAR NOT NULL REFERENCES projects(id), title VARCHAR, status VARCHAR, "
+    "pdf_path VARCHAR, source_url VARCHAR, source_type VARCHAR, raw_content TEXT, error_message TEXT, created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE results (id VARCHAR PRIMARY KEY, paper_id VARCHAR NOT NULL REFERENCES papers(id), column_id VARCHAR NOT NULL REFERENCES columns(id), "
+    "value TEXT, status VARCHAR, error_message TEXT, created_at DATETIME, updated_at DATETIME)",
+    "CREATE TABLE settings (key VARCHAR PRIMARY KEY, value TEXT)",
+]
+
+
+def _migrate(monkeypatch, url: str) -> sa.Engine:
+    """What app.main does on startup, against the database at url"""
+    engine = sa.create_engine(url)
+    monkeypatch.setattr(settings, "DATABASE_URL", url)
+    Base.metadata.create_all(bind=engine)
+    run_migrations()
+    return engine
+
+
+def _head(engine) -> str:
+    with engine.connect() as conn:
+        return conn.execute(sa.text("SELECT version_num FROM alembic_version")).scalar_one()
+
+
+def test_fresh_database_reaches_head_and_is_rerunnable(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    engine = _migrate(monkeypatch, url)
+    head = _head(engine)
+    # A second startup is a no-op
+    engine = _migrate(monkeypatch, url)
+    assert _head(engine) == head
+
+    inspector = sa.inspect(engine)
+    assert "papers_fts" in inspector.get_table_names()
+    assert "uq_results_paper_column" in {ix["name"] for ix in inspector.get_indexes("results")}
+
+
+def test_baseline_database_is_upgraded(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'baseline.db'}"
+    engine = sa.create_engine(url)
+    with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            conn.execute(sa.text(statement))
+        conn.execute(sa.text("INSERT INTO projects (id, name) VALUES ('p1', 'Legacy')"))
+        conn.execute(sa.text("INSERT INTO columns (id, project_id, name, tool_name) VALUES ('c1', 'p1', 'Summary', 'summarizer')"))
+        conn.execute(sa.text(
+            "INSERT INTO papers (id, project_id, title, status, raw_content) VALUES ('a1', 'p1', 'Old paper', 'done', 'Legacy paper text')"
+        ))
+        # Duplicate cells were possible before the unique index; the newest one is kept
+        conn.execute(sa.text(
+            "INSERT INTO results (id, paper_id, column_id, value, status, created_at, updated_at) VALUES "
+            "('r1', 'a1', 'c1', 'old', 'done', '2024-01-01', '2024-01-01'), "
+            "('r2', 'a1', 'c1', 'new', 'done', '2024-01-02', '2024-01-02')"
+        ))
+    engine.dispose()
+
+    engine = _migrate(monkeypatch, url)
+    inspector = sa.inspect(engine)
+    assert "raw_content" not in {c["name"] for c in inspector.get_columns("papers")}
+    assert {"llm_cache_enabled"} <= {c["name"] for c in inspector.get_columns("projects")}
+    assert {"fingerprint"} <= {c["name"] for c in inspector.get_columns("results")}
+    assert {"uq_results_paper_column", "ix_results_fingerprint"} <= {ix["name"] for ix in inspector.get_indexes("results")}
+    assert "ix_papers_project_created" in {ix["name"] for ix in inspector.get_indexes("papers")}
+
+    with engine.connect() as conn:
+        assert conn.execute(sa.text("SELECT id, value FROM results")).all() == [("r2", "new")]
+        assert conn.execute(sa.text("SELECT llm_cache_enabled FROM projects")).scalar_one() == 1
+        # Legacy rows without timestamps get one (the listing orders and pages by them)
+        assert conn.execute(sa.text("SELECT COUNT(*) FROM papers WHERE created_at IS NULL OR updated_at IS NULL")).scalar_one() == 0
+        content_hash = conn.execute(sa.text("SELECT content_hash FROM papers WHERE id = 'a1'")).scalar_one()
+        assert conn.execute(
+            sa.text("SELECT COUNT(*) FROM paper_contents WHERE hash = :hash"), {"hash": content_hash}
+        ).scalar_one() == 1
+        # The migrated title is searchable
+        assert conn.execute(sa.text("SELECT COUNT(*) FROM papers_fts WHERE papers_fts MATCH 'legacy OR old'")).scalar_one() == 1
+
+
+def test_alembic_alone_creates_the_job_table(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'alembic-only.db'}"
+    engine = sa.create_engine(url)
+    with engine.begin() as conn:
+        for statement in BASELINE_SCHEMA:
+            conn.execute(sa.text(statement))
+    engine.dispose()
+
+    monkeypatch.setattr(settings, "DATABASE_URL", url)
+    run_migrations()
+    inspector = sa.inspect(engine)
+    assert {"column_ids", "lease_owner", "attempts"} <= {c["name"] for c in inspector.get_columns("analysis_jobs")}
@@ -0,0 +1,66 @@
+from app.models.paper import Paper
+
+
+def test_title_search_is_literal(client, db, seed_project):
+    project_id = seed_project(0)
+    db.add_all(Paper(project_id=project_id, title=title, status="done") for title in ["100% recall", "1000 recalls", "a_b", "axb"])
+    db.commit()
+
+    def titles(q):
+        response = client.get(f"/api/projects/{project_id}/papers", params={"q": q})
+        return sorted(paper["title"] for paper in response.json())
+
+    assert titles("100%") == ["100% recall"]
+    assert titles("a_b") == ["a_b"]
+    assert titles("A") == ["100% recall", "1000 recalls", "a_b", "axb"]
+
+
+def test_paging_and_etag(client, seed_project):
+    project_id = seed_project(5, columns=1)
+    url = f"/api/projects/{project_id}/papers"
+
+    first = client.get(url, params={"limit": 3})
+    assert len(first.json()) == 3 and first.headers["X-Total-Count"] == "5"
+    rest = client.get(url, params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+    assert len(rest.json()) == 2 and "X-Next-Cursor" not in rest.headers
+    assert {p["id"] for p in first.json()} | {p["id"] for p in rest.json()} == {p["id"] for p in client.get(url).json()}
+
+    unchanged = client.get(url, params={"limit": 3}, headers={"If-None-Match": first.headers["ETag"]})
+    assert unchanged.status_code == 304
+
+
+def test_uploaded_text_is_stored_off_the_event_loop(client, db, seed_project, monkeypatch):
+    import asyncio
+    from app.api import papers
+    from app.services.content_store import load_document
+
+    async def parse(self, content):
+        return "Abstract\nA paper about storing text.\n"
+
+    on_loop = []
+
+    def store_content(session, text):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return original(session, text)
+
+    original = papers.store_content
+    monkeypatch.setattr(papers.PDFParser, "parse", parse)
+    monkeypatch.setattr(papers, "store_content", store_content)
+    project_id = seed_project(0)
+
+    response = client.post(f"/api/projects/{project_id}/papers", files={"file": ("upload.pdf", b"%PDF-1.4 stored", "application/pdf")})
+    assert response.status_code == 200
+    assert on_loop == [False]
+    paper = db.get(Paper, response.json()["id"])
+    assert load_document(db, paper.content_hash)[0].startswith("Abstract")
+
+
+def test_listing_without_results(client, seed_project, recwarn):
+    project_id = seed_project(2)
+    response = client.get(f"/api/projects/{project_id}/papers", params={"columns": ""})
+    assert [paper["results"] for paper in response.json()] == [{}, {}]
+    assert not [w for w in recwarn if "noload" in str(w.message)]
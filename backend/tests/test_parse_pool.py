@@ -0,0 +1,74 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from app.parsers.pdf_parser import ParsePool
+
+
+def _alive(pid: int) -> bool:
+    """Running (not gone, not a zombie waiting to be reaped)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.fixture
+def pool():
+    pools = []
+
+    def make(size):
+        pools.append(ParsePool(size))
+        return pools[-1]
+
+    yield make
+    for created in pools:
+        created.shutdown(kill=True)
+
+
+def test_timed_out_worker_is_killed_and_replaced(pool):
+    parse_pool = pool(1)
+
+    async def run():
+        first = await parse_pool.run(10, os.getpid)
+        with pytest.raises(Exception, match="timed out"):
+            await parse_pool.run(0.5, time.sleep, 30)
+        second = await parse_pool.run(10, os.getpid)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first != second
+    deadline = time.monotonic() + 5
+    while _alive(first) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not _alive(first)
+
+
+def test_failing_parse_keeps_its_worker(pool):
+    parse_pool = pool(1)
+
+    async def run():
+        first = await parse_pool.run(10, os.getpid)
+        with pytest.raises(ValueError):
+            await parse_pool.run(10, int, "not a number")
+        return first, await parse_pool.run(10, os.getpid)
+
+    first, second = asyncio.run(run())
+    assert first == second
+
+
+def test_timeout_does_not_disturb_other_workers(pool):
+    parse_pool = pool(2)
+
+    async def run():
+        slow = asyncio.ensure_future(parse_pool.run(1, time.sleep, 30))
+        await asyncio.sleep(0.1)
+        # The other worker parses while the slow one runs into its timeout
+        assert await parse_pool.run(10, sum, [1, 2, 3]) == 6
+        with pytest.raises(Exception, match="timed out"):
+            await slow
+
+    asyncio.run(run())
@@ -0,0 +1,16 @@
+def test_llm_cache_flag_updates(client):
+    project = client.post("/api/projects/", json={"name": "cache"}).json()
+    assert project["llm_cache_enabled"] is True
+
+    response = client.put(f"/api/projects/{project['id']}", json={"llm_cache_enabled": False})
+    assert response.status_code == 200 and response.json()["llm_cache_enabled"] is False
+
+    # Omitted: unchanged
+    response = client.put(f"/api/projects/{project['id']}", json={"name": "renamed"})
+    assert response.json()["llm_cache_enabled"] is False
+
+
+def test_llm_cache_flag_rejects_null(client):
+    project = client.post("/api/projects/", json={"name": "cache"}).json()
+    response = client.put(f"/api/projects/{project['id']}", json={"llm_cache_enabled": None})
+    assert response.status_code == 422
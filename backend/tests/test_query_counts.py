@@ -0,0 +1,50 @@
+"""The listing and export paths must not issue a query per paper (N+1)"""
+from app.api.export import _stream_csv, _stream_excel
+from app.database import count_queries
+
+
+def _list_query_count(client, project_id: str, **params) -> int:
+    response = client.get(f"/api/projects/{project_id}/papers", params=params)
+    assert response.status_code == 200
+    count = int(response.headers["X-Query-Count"])
+    assert count > 0
+    return count
+
+
+def test_list_papers_query_count_is_constant(client, seed_project):
+    small, large = seed_project(3), seed_project(40)
+    assert _list_query_count(client, small) == _list_query_count(client, large)
+    assert _list_query_count(client, small, limit=2) == _list_query_count(client, large, limit=2)
+    assert _list_query_count(client, small, columns="") == _list_query_count(client, large, columns="")
+
+
+def test_list_papers_embeds_results(client, seed_project):
+    project_id = seed_project(5, columns=2)
+    papers = client.get(f"/api/projects/{project_id}/papers").json()
+    assert len(papers) == 5
+    assert all(len(paper["results"]) == 2 for paper in papers)
+
+
+def _export_query_count(stream, project_id: str) -> int:
+    with count_queries() as queries:
+        for _ in stream(project_id):
+            pass
+    assert queries
+    return len(queries)
+
+
+def test_csv_export_query_count_is_constant(seed_project):
+    small, large = seed_project(3), seed_project(40)
+    assert _export_query_count(_stream_csv, small) == _export_query_count(_stream_csv, large)
+
+
+def test_excel_export_query_count_is_constant(seed_project):
+    small, large = seed_project(3), seed_project(40)
+    assert _export_query_count(_stream_excel, small) == _export_query_count(_stream_excel, large)
+
+
+def test_csv_export_rows(seed_project):
+    project_id = seed_project(4, columns=2)
+    lines = "".join(_stream_csv(project_id)).strip().splitlines()
+    assert lines[0] == "Paper,Column 0,Column 1"
+    assert len(lines) == 5
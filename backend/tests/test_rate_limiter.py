@@ -0,0 +1,90 @@
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.adapters import rate_limiter
+from app.adapters.rate_limiter import ProviderRateLimiter, TokenBucket, _parse_reset, parse_retry_after
+
+
+class Clock:
+    """Stands in for the limiter's time module (asyncio keeps the real clock)"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+def test_token_bucket_reserves_and_refills(clock):
+    bucket = TokenBucket(60)
+    assert bucket.reserve(60) == 0.0
+    # Empty: the next token is a second away, the one after that two
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+    clock.now += 30
+    assert bucket.reserve(1) == 0.0
+    # The server has less left than we think
+    bucket.sync(0)
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert TokenBucket(None).reserve(10 ** 6) == 0.0
+
+
+def test_concurrency_grows_additively_and_halves_on_throttling(clock):
+    limiter = ProviderRateLimiter("openai", initial_concurrency=8, min_concurrency=1, max_concurrency=32)
+
+    async def run():
+        await limiter.acquire(10)
+        await limiter.release(succeeded=True)
+        assert limiter.limit == pytest.approx(8 + 1 / 8)
+
+        # Two requests in flight see the same overload: one congestion event, one halving
+        await limiter.acquire(10)
+        await limiter.acquire(10)
+        await limiter.release(succeeded=False, throttled=True, retry_after=5)
+        await limiter.release(succeeded=False, throttled=True)
+        assert limiter.limit == pytest.approx((8 + 1 / 8) / 2)
+        assert limiter.blocked_until == clock.now + 5
+        assert limiter.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_retry_after_forms():
+    assert parse_retry_after({"retry-after": "7"}) == 7.0
+    assert parse_retry_after({"retry-after-ms": "250", "retry-after": "7"}) == 0.25
+    http_date = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < parse_retry_after({"retry-after": http_date}) <= 30
+    assert parse_retry_after({"retry-after": "soon"}) is None
+    assert parse_retry_after({}) is None
+
+
+def test_reset_forms():
+    assert _parse_reset("1.5") == 1.5
+    assert _parse_reset("6m0s") == 360.0
+    assert _parse_reset("20ms") == pytest.approx(0.02)
+    timestamp = (datetime.now(timezone.utc) + timedelta(seconds=60)).isoformat().replace("+00:00", "Z")
+    assert 55 < _parse_reset(timestamp) <= 60
+    assert _parse_reset("later") is None
+
+
+def test_limits_are_learned_from_headers(clock):
+    limiter = ProviderRateLimiter("claude", rpm=100)
+    limiter.update_from_headers({
+        "anthropic-ratelimit-requests-limit": "500",
+        "anthropic-ratelimit-tokens-limit": "40000",
+        "anthropic-ratelimit-requests-remaining": "0",
+        "anthropic-ratelimit-requests-reset": "20s",
+    })
+    # The configured limit stays the ceiling; the token limit is learned
+    assert (limiter.requests.per_minute, limiter.tokens.per_minute) == (100, 40000)
+    # Out of requests: blocked until the reset
+    assert limiter.blocked_until == clock.now + 20
@@ -0,0 +1,35 @@
+import asyncio
+
+from app.adapters.model_adapter import OpenAIAdapter
+from app.adapters.response_cache import CachedModelAdapter, ResponseCache
+
+
+class CountingAdapter(OpenAIAdapter):
+    def __init__(self):
+        super().__init__("")
+        self.calls = 0
+
+    async def complete(self, prompt, system_prompt=None):
+        self.calls += 1
+        return f"answer to {prompt}"
+
+
+def test_identical_requests_are_served_from_the_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=3600, max_entries=100, max_bytes=1 << 20)
+    inner = CountingAdapter()
+    adapter = CachedModelAdapter(inner, cache)
+
+    async def run():
+        return [await adapter.complete("q1"), await adapter.complete("q1"), await adapter.complete("q2")]
+
+    assert asyncio.run(run()) == ["answer to q1", "answer to q1", "answer to q2"]
+    assert inner.calls == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=3600, max_entries=10, max_bytes=1 << 20)
+    for i in range(11):
+        cache.set(f"k{i}", "value")
+    assert cache.stats()["entries"] <= 10
+    assert cache.get("k0") is None and cache.get("k10") == "value"
@@ -0,0 +1,49 @@
+import asyncio
+
+from app.models.column import ColumnDef
+from app.models.paper import Paper
+from app.models.result import Result
+from app.services.result_writer import ResultWriter, upsert_results
+
+
+def _cell(db, seed_project):
+    project_id = seed_project(1, columns=1)
+    paper = db.query(Paper).filter(Paper.project_id == project_id).one()
+    column = db.query(ColumnDef).filter(ColumnDef.project_id == project_id).one()
+    return paper, column
+
+
+def _row(paper, column, value, status="done"):
+    return {"paper_id": paper.id, "column_id": column.id, "value": value, "status": status, "error_message": None}
+
+
+def test_upsert_updates_the_existing_cell(db, seed_project):
+    paper, column = _cell(db, seed_project)
+    upsert_results(db, [_row(paper, column, "first")])
+    upsert_results(db, [_row(paper, column, "second", status="error")])
+    db.commit()
+
+    results = db.query(Result).filter(Result.paper_id == paper.id, Result.column_id == column.id).all()
+    assert [(r.value, r.status) for r in results] == [("second", "error")]
+
+
+def test_writer_applies_results_and_paper_fields(db, seed_project):
+    paper, column = _cell(db, seed_project)
+
+    async def write():
+        writer = ResultWriter()
+        await writer.start()
+        try:
+            await writer.write(
+                paper.id,
+                {column.id: {"value": "written", "status": "done", "error_message": None, "fingerprint": "abc"}},
+                {"status": "done", "title": "New title"}
+            )
+        finally:
+            await writer.stop()
+
+    asyncio.run(write())
+    db.expire_all()
+    result = db.query(Result).filter(Result.paper_id == paper.id, Result.column_id == column.id).one()
+    assert (result.value, result.fingerprint) == ("written", "abc")
+    assert db.get(Paper, paper.id).title == "New title"
@@ -0,0 +1,71 @@
+import asyncio
+
+from app.services.scheduler import AnalysisScheduler, PRIORITY_BULK, PRIORITY_RETRY
+
+
+def test_priority_and_round_robin_order():
+    async def run():
+        order = []
+        scheduler = AnalysisScheduler(max_concurrency=1)
+
+        async def runner(paper_id, project_id):
+            order.append(paper_id)
+
+        for paper_id, project_id in [("a1", "A"), ("a2", "A"), ("b1", "B")]:
+            await scheduler.submit(paper_id, project_id, "openai", PRIORITY_BULK)
+        await scheduler.submit("r1", "A", "openai", PRIORITY_RETRY)
+        await scheduler.start(runner)
+        while len(order) < 4:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return order
+
+    assert asyncio.run(run()) == ["r1", "a1", "b1", "a2"]
+
+
+def test_submit_while_in_flight_runs_again_afterwards():
+    async def run():
+        runs = []
+        started = asyncio.Event()
+        release = asyncio.Event()
+        scheduler = AnalysisScheduler(max_concurrency=2)
+
+        async def runner(paper_id, project_id):
+            runs.append(paper_id)
+            if len(runs) == 1:
+                started.set()
+                await release.wait()
+
+        await scheduler.start(runner)
+        await scheduler.submit("p1", "A", "openai")
+        await started.wait()
+        # Not run next to itself, and not dropped either
+        assert await scheduler.submit("p1", "A", "openai", PRIORITY_RETRY)
+        await asyncio.sleep(0.05)
+        assert runs == ["p1"]
+        release.set()
+        while len(runs) < 2:
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return runs
+
+    assert asyncio.run(run()) == ["p1", "p1"]
+
+
+def test_submit_later_from_a_worker_thread():
+    async def run():
+        runs = []
+        scheduler = AnalysisScheduler(max_concurrency=1)
+
+        async def runner(paper_id, project_id):
+            runs.append(paper_id)
+
+        await scheduler.start(runner)
+        # Two retries within the delay coalesce into one run
+        await asyncio.to_thread(scheduler.submit_later, "p1", "A", "openai", PRIORITY_RETRY, 0.05)
+        await asyncio.to_thread(scheduler.submit_later, "p1", "A", "openai", PRIORITY_RETRY, 0.05)
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        return runs
+
+    assert asyncio.run(run()) == ["p1"]
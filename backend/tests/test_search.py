@@ -0,0 +1,51 @@
+from app.models.paper import Paper
+from app.services.search_index import _like_search
+
+
+def _add_paper(db, project_id, title):
+    db.add(Paper(project_id=project_id, title=title, status="done"))
+    db.commit()
+
+
+def test_snippets_escape_text(client, db, seed_project):
+    project_id = seed_project(0)
+    _add_paper(db, project_id, "<img src=x onerror=alert(1)> Attention & transformers")
+
+    response = client.get(f"/api/projects/{project_id}/search", params={"q": "transformers"})
+    assert response.status_code == 200
+    (hit,) = response.json()["hits"]
+    snippet = hit["matches"][0]["snippet"]
+    assert "<img" not in snippet
+    assert "&lt;img" in snippet and "&amp;" in snippet
+    assert "<mark>transformers</mark>" in snippet
+
+
+def test_like_snippets_escape_text(db, seed_project):
+    project_id = seed_project(0)
+    _add_paper(db, project_id, "<b>Bold</b> claims about transformers")
+
+    total, hits = _like_search(db, project_id, "transformers", 10, 0)
+    assert total == 1
+    assert hits[0]["matches"][0]["snippet"] == "&lt;b&gt;Bold&lt;/b&gt; claims about <mark>transformers</mark>"
+
+
+def test_like_search_underscore_is_literal(db, seed_project):
+    project_id = seed_project(0)
+    _add_paper(db, project_id, "snake_case names")
+    _add_paper(db, project_id, "snakeXcase names")
+
+    total, hits = _like_search(db, project_id, "snake_case", 10, 0)
+    assert total == 1 and hits[0]["title"] == "snake_case names"
+
+
+def test_like_search_query_count_is_flat(db, seed_project):
+    from app.database import count_queries
+
+    def queries(papers):
+        project_id = seed_project(papers)
+        db.expunge_all()
+        with count_queries() as log:
+            _like_search(db, project_id, "value", 50, 0)
+        return len(log)
+
+    assert queries(2) == queries(20)
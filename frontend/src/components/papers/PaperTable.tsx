@@ -57,6 +57,15 @@ export function PaperTable({ papers, columns, projectId }: PaperTableProps) {
         }
     };
 
+    // Re-runs just this cell; several cells retried in quick succession run as one job
+    const handleRetryCell = async (resultId: string) => {
+        try {
+            await axios.post(`${API_URL}/api/results/${resultId}/retry`);
+        } catch (error) {
+            console.error('Failed to retry cell', error);
+        }
+    };
+
     const openDetail = (title: string, content: any) => {
         setDetailModal({ isOpen: true, title, content });
     };
@@ -218,10 +227,31 @@ export function PaperTable({ papers, columns, projectId }: PaperTableProps) {
                 if (!result) return <span className="text-muted-foreground">-</span>;
 
                 if (result.status === 'processing') {
+                    // Streamed partial output while the model is still writing
+                    if (typeof result.value === 'string' && result.value) {
+                        return (
+                            <div className="max-h-[150px] overflow-hidden text-sm min-w-[200px] p-2 text-muted-foreground whitespace-pre-wrap">
+                                <RefreshCw className="inline h-3 w-3 mr-1 animate-spin" />
+                                {result.value}
+                            </div>
+                        );
+                    }
                     return <RefreshCw className="h-4 w-4 animate-spin text-muted-foreground" />;
                 }
+                if (result.status === 'pending') {
+                    return <RefreshCw className="h-4 w-4 text-muted-foreground" />;
+                }
                 if (result.status === 'error') {
-                    return <span className="text-red-500 text-xs" title={result.error_message || 'Error'}>Error</span>;
+                    return (
+                        <button
+                            className="inline-flex items-center gap-1 text-red-500 text-xs hover:underline"
+                            title={`${result.error_message || 'Error'} (click to retry)`}
+                            onClick={() => handleRetryCell(result.id)}
+                        >
+                            Error
+                            <RefreshCw className="h-3 w-3" />
+                        </button>
+                    );
                 }
 
                 // Click to view details
@@ -0,0 +1,54 @@
+import { useTranslation } from 'react-i18next';
+import { ColumnDef, SearchHit } from '../../types';
+import { cn } from '../../lib/utils';
+
+interface SearchResultsProps {
+    hits: SearchHit[];
+    total: number;
+    columns: ColumnDef[];
+}
+
+// Search hits as returned by GET /projects/{id}/search, in rank order; independent of the loaded paper list
+export function SearchResults({ hits, total, columns }: SearchResultsProps) {
+    const { t } = useTranslation();
+    const columnNames = Object.fromEntries(columns.map((column) => [column.id, column.name]));
+
+    const matchLabel = (match: SearchHit['matches'][number]) => {
+        if (match.kind === 'result') return (match.column_id && columnNames[match.column_id]) || t('project.searchMatchResult');
+        if (match.kind === 'section') return match.section || t('project.searchMatchText');
+        return t('project.searchMatchTitle');
+    };
+
+    return (
+        <div className="rounded-md border divide-y">
+            <div className="px-4 py-2 text-xs text-muted-foreground">
+                {t('project.searchResultCount', { count: hits.length, total })}
+            </div>
+            {hits.map((hit) => (
+                <div key={hit.paper_id} className="px-4 py-3">
+                    <div className="flex items-center gap-2">
+                        <span className="font-medium truncate" title={hit.title || undefined}>{hit.title || 'Untitled'}</span>
+                        <span className={cn(
+                            "px-1.5 py-0.5 rounded-full text-[10px] uppercase font-bold",
+                            hit.status === 'done' ? "bg-green-100 text-green-700" :
+                                hit.status === 'error' ? "bg-red-100 text-red-700" :
+                                    hit.status === 'processing' ? "bg-blue-100 text-blue-700" :
+                                        "bg-gray-100 text-gray-700"
+                        )}>
+                            {hit.status}
+                        </span>
+                    </div>
+                    <div className="mt-1 space-y-0.5">
+                        {hit.matches.map((match, index) => (
+                            <div key={index} className="flex items-baseline gap-2 text-xs">
+                                <span className="font-semibold text-muted-foreground capitalize text-[10px] whitespace-nowrap">{matchLabel(match)}:</span>
+                                {/* The server escapes snippet text; only its <mark> tags are markup */}
+                                <span className="[&_mark]:bg-yellow-200 [&_mark]:rounded-sm" dangerouslySetInnerHTML={{ __html: match.snippet }} />
+                            </div>
+                        ))}
+                    </div>
+                </div>
+            ))}
+        </div>
+    );
+}
@@ -3,37 +3,74 @@ import { useParams } from 'react-router-dom';
 import { Sidebar, Header } from '../components/layout/Layout';
 import { useProjectStore } from '../stores/projectStore';
 import { Button } from '../components/common/Button';
-import { Upload, Play, Settings2 } from 'lucide-react';
+import { Input } from '../components/common/Input';
+import { Upload, Play, RefreshCw, Settings2, Search } from 'lucide-react';
 import { PaperTable } from '../components/papers/PaperTable';
 import { AddPaperModal } from '../components/papers/AddPaperModal';
 import { ColumnManagerModal } from '../components/columns/ColumnManagerModal';
+import { SearchResults } from '../components/papers/SearchResults';
 import axios from 'axios';
 import toast from 'react-hot-toast';
 import { useTranslation } from 'react-i18next';
+import { SearchHit } from '../types';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
 export default function ProjectPage() {
     const { t } = useTranslation();
     const { id } = useParams<{ id: string }>();
-    const { currentProject, papers, columns, fetchProjectDetails, fetchPapers, isLoading } = useProjectStore();
+    const { currentProject, papers, columns, fetchProjectDetails, fetchPapers, applyProgressEvent, isLoading } = useProjectStore();
     const [isAddModalOpen, setIsAddModalOpen] = useState(false);
     const [isColumnModalOpen, setIsColumnModalOpen] = useState(false);
     const [isAnalyzing, setIsAnalyzing] = useState(false);
     const [isExporting, setIsExporting] = useState(false);
+    const [query, setQuery] = useState('');
+    // Server-side search results (null: no search, show every paper)
+    const [search, setSearch] = useState<{ hits: SearchHit[]; total: number } | null>(null);
 
     useEffect(() => {
         if (id) {
             fetchProjectDetails(id);
+            // Changes arrive as server-sent deltas; on reconnect EventSource resumes from the last
+            // event id, and the server sends resync if that's no longer possible. Polling is only
+            // the fallback while the stream is down.
+            const events = new EventSource(`${API_URL}/api/projects/${id}/events`);
+            const apply = (e: MessageEvent) => applyProgressEvent(JSON.parse(e.data));
+            ['paper', 'paper_deleted', 'cell', 'partial', 'resync'].forEach((type) => events.addEventListener(type, apply));
             const interval = setInterval(() => {
                 const hasProcessing = useProjectStore.getState().papers.some(p => p.status === 'processing');
-                if (hasProcessing) {
+                if (hasProcessing && events.readyState !== EventSource.OPEN) {
                     fetchPapers(id);
                 }
             }, 5000);
-            return () => clearInterval(interval);
+            return () => {
+                events.close();
+                clearInterval(interval);
+            };
         }
-    }, [id, fetchProjectDetails, fetchPapers]);
+    }, [id, fetchProjectDetails, fetchPapers, applyProgressEvent]);
+
+    // Debounced full-text search; the hits are rendered from the response in rank order, so
+    // matches show even for papers the table hasn't loaded
+    useEffect(() => {
+        if (!id || !query.trim()) {
+            setSearch(null);
+            return;
+        }
+        let cancelled = false;
+        const timer = setTimeout(async () => {
+            try {
+                const res = await axios.get(`${API_URL}/api/projects/${id}/search`, { params: { q: query, limit: 100 } });
+                if (!cancelled) setSearch({ hits: res.data.hits, total: res.data.total });
+            } catch (error) {
+                if (!cancelled) setSearch({ hits: [], total: 0 });
+            }
+        }, 250);
+        return () => {
+            cancelled = true;
+            clearTimeout(timer);
+        };
+    }, [id, query]);
 
     const handleAnalyzeAll = async () => {
         if (!id) return;
@@ -49,6 +86,25 @@ export default function ProjectPage() {
         }
     };
 
+    // Recompute only cells whose inputs changed (edited/new columns, new model, new content)
+    const handleAnalyzeStale = async () => {
+        if (!id) return;
+        setIsAnalyzing(true);
+        try {
+            const preview = await axios.get(`${API_URL}/api/analyze/stale`, { params: { project_id: id } });
+            if (!preview.data.cells) {
+                toast.success(t('project.nothingStale'));
+                return;
+            }
+            await axios.post(`${API_URL}/api/analyze`, { project_id: id, mode: 'stale' });
+            toast.success(t('project.staleAnalysisStarted', { count: preview.data.cells }));
+        } catch (error) {
+            toast.error(t('project.analysisFailed'));
+        } finally {
+            setIsAnalyzing(false);
+        }
+    };
+
     const handleExport = async (type: 'excel' | 'csv' | 'markdown' | 'notion') => {
         if (!id) return;
 
@@ -109,6 +165,10 @@ export default function ProjectPage() {
                                 <Play className="mr-2 h-4 w-4" />
                                 {t('project.runAnalysisButton')}
                             </Button>
+                            <Button variant="outline" onClick={handleAnalyzeStale} disabled={isAnalyzing}>
+                                <RefreshCw className="mr-2 h-4 w-4" />
+                                {t('project.updateStaleButton')}
+                            </Button>
                             <Button onClick={() => setIsAddModalOpen(true)}>
                                 <Upload className="mr-2 h-4 w-4" />
                                 {t('project.addPaperButton')}
@@ -117,11 +177,27 @@ export default function ProjectPage() {
                     }
                 />
                 <main className="flex-1 p-6 overflow-auto">
-                    <PaperTable
-                        papers={papers}
-                        columns={columns}
-                        projectId={id!}
-                    />
+                    <div className="relative mb-4 max-w-md">
+                        <Search className="absolute left-3 top-1/2 h-4 w-4 -translate-y-1/2 text-muted-foreground" />
+                        <Input
+                            type="search"
+                            value={query}
+                            onChange={(e) => setQuery(e.target.value)}
+                            placeholder={t('project.searchPlaceholder')}
+                            className="pl-9"
+                        />
+                    </div>
+                    {search === null ? (
+                        <PaperTable
+                            papers={papers}
+                            columns={columns}
+                            projectId={id!}
+                        />
+                    ) : search.hits.length === 0 ? (
+                        <p className="mb-4 text-sm text-muted-foreground">{t('project.noSearchResults', { query })}</p>
+                    ) : (
+                        <SearchResults hits={search.hits} total={search.total} columns={columns} />
+                    )}
                 </main>
             </div>
 
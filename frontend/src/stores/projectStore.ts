@@ -1,6 +1,6 @@
 import { create } from 'zustand';
 import axios from 'axios';
-import { Project, ColumnDef, Paper } from '../types';
+import { Project, ColumnDef, Paper, ProgressEvent, Result } from '../types';
 
 interface ProjectState {
     projects: Project[];
@@ -24,10 +24,21 @@ interface ProjectState {
     fetchPapers: (projectId: string) => Promise<void>;
     addPaper: (projectId: string, file: File | null, input: string) => Promise<void>;
     deletePaper: (paperId: string) => Promise<void>;
+    applyProgressEvent: (event: ProgressEvent) => void;
 }
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
+// Progress events received while fetchPapers is in flight (null when no fetch is running).
+// Fetches can overlap (upload, poll, resync); the buffer is drained when the last one finishes.
+let pendingEvents: ProgressEvent[] | null = null;
+let papersFetches = 0;
+
+// Papers are loaded in pages of this size (keyset cursor in X-Next-Cursor)
+const PAPER_PAGE_SIZE = 200;
+// ETag of the first page of the loaded list; an unchanged project is answered with 304
+let papersETag: { projectId: string; query: string; etag: string } | null = null;
+
 export const useProjectStore = create<ProjectState>((set, get) => ({
     projects: [],
     currentProject: null,
@@ -109,11 +120,44 @@ export const useProjectStore = create<ProjectState>((set, get) => ({
     },
 
     fetchPapers: async (projectId) => {
+        // Events arriving while the list loads are applied on top of it afterwards
+        pendingEvents = pendingEvents ?? [];
+        papersFetches += 1;
         try {
-            const response = await axios.get(`${API_URL}/api/projects/${projectId}/papers`);
-            set({ papers: response.data });
+            // Only the results of the table's columns (all of them until the columns are loaded)
+            const columnIds = get().columns.map((column) => column.id);
+            const params: Record<string, string | number> = { limit: PAPER_PAGE_SIZE };
+            if (columnIds.length) params.columns = columnIds.join(',');
+            const query = JSON.stringify(params);
+
+            // The ETag covers the whole project, so a 304 for the first page means nothing changed
+            const cached = papersETag && papersETag.projectId === projectId && papersETag.query === query
+                ? papersETag.etag : null;
+            const first = await axios.get(`${API_URL}/api/projects/${projectId}/papers`, {
+                params,
+                headers: cached ? { 'If-None-Match': cached } : undefined,
+                validateStatus: (status) => status === 200 || status === 304,
+            });
+            if (first.status === 304) return;
+
+            const papers: Paper[] = [...first.data];
+            let cursor: string | undefined = first.headers['x-next-cursor'];
+            while (cursor) {
+                const page = await axios.get(`${API_URL}/api/projects/${projectId}/papers`, { params: { ...params, cursor } });
+                papers.push(...page.data);
+                cursor = page.headers['x-next-cursor'];
+            }
+            set({ papers });
+            papersETag = first.headers['etag'] ? { projectId, query, etag: first.headers['etag'] } : null;
         } catch (error) {
             console.error('Failed to fetch papers');
+        } finally {
+            papersFetches -= 1;
+            if (papersFetches === 0) {
+                const events = pendingEvents;
+                pendingEvents = null;
+                events?.forEach((event) => get().applyProgressEvent(event));
+            }
         }
     },
 
@@ -151,6 +195,53 @@ export const useProjectStore = create<ProjectState>((set, get) => ({
             console.error('Failed to delete paper');
             throw error;
         }
+    },
+
+    // Incremental updates from GET /projects/{id}/events
+    applyProgressEvent: (event) => {
+        if (pendingEvents) {
+            pendingEvents.push(event);
+            return;
+        }
+        const projectId = get().currentProject?.id;
+        if (event.type === 'resync') {
+            if (projectId) get().fetchPapers(projectId);
+            return;
+        }
+        if (event.type === 'paper_deleted') {
+            set((state) => ({ papers: state.papers.filter((p) => p.id !== event.paper_id) }));
+            return;
+        }
+        if (!get().papers.some((p) => p.id === event.paper_id)) {
+            // A paper this client hasn't loaded yet (added elsewhere)
+            if (projectId) get().fetchPapers(projectId);
+            return;
+        }
+        set((state) => ({
+            papers: state.papers.map((paper) => {
+                if (paper.id !== event.paper_id) return paper;
+                if (event.type === 'paper') {
+                    return {
+                        ...paper,
+                        status: event.status,
+                        title: event.title ?? paper.title,
+                        error_message: event.error_message ?? (event.status === 'error' ? paper.error_message : null),
+                    };
+                }
+                const previous: Result = paper.results[event.column_id] ?? {
+                    id: '', paper_id: paper.id, column_id: event.column_id, value: null, status: 'pending', error_message: null,
+                };
+                const result: Result = event.type === 'partial'
+                    ? { ...previous, status: 'processing', value: event.text }
+                    : {
+                        ...previous,
+                        status: event.status,
+                        value: event.value !== undefined ? event.value : previous.value,
+                        error_message: event.error_message ?? null,
+                    };
+                return { ...paper, results: { ...paper.results, [event.column_id]: result } };
+            }),
+        }));
     }
 
 }));
@@ -45,6 +45,23 @@ export interface Result {
     error_message: string | null;
 }
 
+// Server-sent paper / result changes (GET /api/projects/{id}/events)
+export type ProgressEvent =
+    | { type: 'paper'; paper_id: string; status: Paper['status']; title?: string | null; error_message?: string }
+    | { type: 'paper_deleted'; paper_id: string }
+    | { type: 'cell'; paper_id: string; column_id: string; status: Result['status']; value?: string | null; error_message?: string | null }
+    | { type: 'partial'; paper_id: string; column_id: string; text: string }
+    | { type: 'resync' };
+
+// GET /api/projects/{id}/search
+export interface SearchHit {
+    paper_id: string;
+    title: string | null;
+    status: Paper['status'];
+    score: number;
+    matches: { kind: 'title' | 'result' | 'section'; column_id: string | null; section: string | null; snippet: string }[];
+}
+
 export interface Settings {
     model_provider: 'claude' | 'openai' | 'gemini' | 'grok' | 'solar';
     api_key: string;